@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.compare import compare_results, format_comparisons
+from benchmarks.runner import run_benchmarks
+from benchmarks.scenarios import SCENARIOS
+from urdf_compose import set_xml_backend
+
+
+def _run(args: argparse.Namespace) -> int:
+    set_xml_backend(args.xml_backend)
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_benchmarks(scenarios, Path(directory), args.quick, args.repeats)
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        args.output.write_text(text)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    comparisons = compare_results(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()))
+    sys.stdout.write(format_comparisons(comparisons, args.threshold))
+    return 1 if any(comparison.is_regression(args.threshold) for comparison in comparisons) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark urdf composition")
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Benchmark the scenarios, and write the results as JSON")
+    run_parser.add_argument("-o", "--output", type=Path, default=None, help="Default: stdout")
+    run_parser.add_argument("--quick", action="store_true", help="Use small sizes, to check the benchmarks run")
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument(
+        "--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS], help="Default: all"
+    )
+    run_parser.add_argument("--xml-backend", choices=["auto", "lxml", "etree"], default="auto")
+    run_parser.set_defaults(command=_run)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare two results, failing if any phase got slower than the threshold"
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Default: 0.1 (10%% slower)")
+    compare_parser.set_defaults(command=_compare)
+
+    args = parser.parse_args(argv)
+    return int(args.command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
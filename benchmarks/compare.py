@@ -0,0 +1,53 @@
+"""
+Compares the results of two benchmark runs (ex: of two commits)
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class PhaseComparison:
+    scenario: str
+    size: int
+    phase: str
+    # current / baseline, so > 1 is slower or bigger
+    time_ratio: float
+    memory_ratio: float
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.time_ratio > 1 + threshold
+
+
+def _ratio(current: float, baseline: float) -> float:
+    return current / baseline if baseline > 0 else float("inf") if current > 0 else 1.0
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> list[PhaseComparison]:
+    """
+    Compare the median times and peak memory of every phase that was run in both, at the same size
+    """
+    baseline_results = {(r["scenario"], r["size"], r["phase"]): r for r in baseline["results"]}
+    comparisons = list[PhaseComparison]()
+    for r in current["results"]:
+        baseline_result = baseline_results.get((r["scenario"], r["size"], r["phase"]))
+        if baseline_result is None:
+            continue
+        comparisons.append(
+            PhaseComparison(
+                r["scenario"],
+                r["size"],
+                r["phase"],
+                _ratio(r["median_seconds"], baseline_result["median_seconds"]),
+                _ratio(r["peak_bytes"], baseline_result["peak_bytes"]),
+            )
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: list[PhaseComparison], threshold: float) -> str:
+    lines = [f"{'scenario':<14}{'size':>6}  {'phase':<10}{'time':>8}{'memory':>8}"]
+    for c in comparisons:
+        flag = "  REGRESSION" if c.is_regression(threshold) else ""
+        lines.append(f"{c.scenario:<14}{c.size:>6}  {c.phase:<10}{c.time_ratio:>7.2f}x{c.memory_ratio:>7.2f}x{flag}")
+    return "\n".join(lines) + "\n"
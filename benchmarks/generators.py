@@ -0,0 +1,92 @@
+"""
+Synthetic component urdfs, of any size, to benchmark composition with
+"""
+
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class ComponentShape:
+    """
+    The shape of a synthetic component
+
+    Its links form a chain from its INPUT link, with a fixed joint between each pair of links,
+    and its ports are links on the last body link. The first port is the default output
+    ("OUTPUT-port0"), and the others are connected to with URDFConn(f"port{i}").
+
+    Materials are defined at the top level and used by the visuals of the body links in
+    turn. When shared_materials is set, every component with the same number of materials
+    defines the same ones, so composing them dedupes the materials rather than renaming them.
+    """
+
+    num_links: int = 4
+    num_materials: int = 1
+    num_meshes: int = 1
+    num_ports: int = 1
+    shared_materials: bool = True
+
+    def __post_init__(self) -> None:
+        assert self.num_links >= 1, "A component needs at least its input link"
+        assert self.num_ports >= 1, "A component needs at least one port"
+        assert self.num_meshes <= self.num_links, "Meshes are referenced by the visuals of links"
+
+
+def port_conn_name(port: int) -> str | None:
+    """
+    The URDFConn base_link that connects to the given port of a synthetic component
+    """
+    return None if port == 0 else f"port{port}"
+
+
+def component_tree(name: str, shape: ComponentShape) -> ET.ElementTree:
+    robot = ET.Element("robot", {"name": name})
+    material_prefix = "material" if shape.shared_materials else f"{name}_material"
+    materials = [f"{material_prefix}{i}" for i in range(shape.num_materials)]
+    for i, material in enumerate(materials):
+        material_el = ET.SubElement(robot, "material", {"name": material})
+        ET.SubElement(material_el, "color", {"rgba": f"{(i % 10) / 10} 0.5 0.5 1.0"})
+
+    links = ["INPUT-body"] + [f"body{i}" for i in range(1, shape.num_links)]
+    for i, link in enumerate(links):
+        link_el = ET.SubElement(robot, "link", {"name": link})
+        inertial = ET.SubElement(link_el, "inertial")
+        ET.SubElement(inertial, "origin", {"xyz": "0 0 0", "rpy": "0 0 0"})
+        ET.SubElement(inertial, "mass", {"value": "1.0"})
+        ET.SubElement(
+            inertial, "inertia", {"ixx": "1E-04", "ixy": "0", "ixz": "0", "iyy": "1E-04", "iyz": "0", "izz": "1E-05"}
+        )
+        visual = ET.SubElement(link_el, "visual")
+        geometry = ET.SubElement(visual, "geometry")
+        if i < shape.num_meshes:
+            ET.SubElement(geometry, "mesh", {"filename": f"meshes/{name}/{link}.stl"})
+        else:
+            ET.SubElement(geometry, "box", {"size": "0.1 0.1 0.1"})
+        if len(materials) > 0:
+            ET.SubElement(visual, "material", {"name": materials[i % len(materials)]})
+
+    ports = ["OUTPUT-port0"] + [f"output-port{i}" for i in range(1, shape.num_ports)]
+    for port in ports:
+        ET.SubElement(robot, "link", {"name": port})
+
+    children = links[1:] + ports
+    parents = links[:-1] + [links[-1]] * len(ports)
+    for i, (parent, child) in enumerate(zip(parents, children)):
+        joint = ET.SubElement(robot, "joint", {"name": f"joint{i}", "type": "fixed"})
+        ET.SubElement(joint, "origin", {"xyz": f"0 {i * 0.01:.2f} 0.05", "rpy": "0 0 0"})
+        ET.SubElement(joint, "parent", {"link": parent})
+        ET.SubElement(joint, "child", {"link": child})
+        ET.SubElement(joint, "axis", {"xyz": "0 0 0"})
+
+    ET.indent(robot, "    ")
+    return ET.ElementTree(robot)
+
+
+def write_component(directory: Path, name: str, shape: ComponentShape) -> Path:
+    """
+    Write a synthetic component to directory / f"{name}.urdf"
+    """
+    path = directory / f"{name}.urdf"
+    component_tree(name, shape).write(path, encoding="utf-8", xml_declaration=True)
+    return path
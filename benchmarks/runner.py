@@ -0,0 +1,144 @@
+"""
+Times and memory profiles every phase of the benchmarked scenarios
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import urdf_compose
+from benchmarks.generators import write_component
+from benchmarks.scenarios import Scenario
+from urdf_compose import (
+    ExplicitURDFObj,
+    URDFObj,
+    clear_parse_cache,
+    get_xml_backend,
+    globally_disable_check_urdf,
+    raise_if_compose_error,
+)
+from urdf_compose.urdf_obj import get_check_urdf_settings, set_check_urdf_settings
+
+PHASES = ("parse", "compose", "collapse", "serialize", "check")
+
+
+@dataclass(frozen=True)
+class PhaseResult:
+    scenario: str
+    size: int
+    phase: str
+    repeats: int
+    min_seconds: float
+    median_seconds: float
+    # The most memory allocated at once while running the phase, as traced by tracemalloc
+    peak_bytes: int
+
+
+def _measure(scenario: Scenario, size: int, phase: str, repeats: int, fn: Callable[[], object]) -> PhaseResult:
+    times = list[float]()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # Traced separately, as tracing slows down allocations
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return PhaseResult(scenario.name, size, phase, repeats, min(times), statistics.median(times), peak_bytes)
+
+
+def run_scenario(scenario: Scenario, directory: Path, size: int, repeats: int) -> list[PhaseResult]:
+    """
+    Benchmark every phase of a scenario, writing its components to directory
+    """
+    paths = {
+        name: write_component(directory, f"{scenario.name}-{name}-{size}", shape)
+        for name, shape in scenario.shapes(size).items()
+    }
+    clear_parse_cache()
+
+    loaded = list[tuple[str, URDFObj]]()
+
+    def load(name: str) -> URDFObj:
+        urdf = ExplicitURDFObj(paths[name], check=False, use_cache=True)
+        loaded.append((name, urdf))
+        return urdf
+
+    def compose() -> urdf_compose.ComposedURDFObj:
+        loaded.clear()
+        return raise_if_compose_error(scenario.compose(load, size))
+
+    composed = compose()
+
+    def parse() -> list[ExplicitURDFObj]:
+        # Every component that is loaded, without the parse cache
+        return [ExplicitURDFObj(paths[name], check=False, use_cache=False) for name, _ in loaded]
+
+    def check() -> None:
+        failure = composed.validate()
+        assert failure is None, f"{scenario.name} composed an invalid urdf: {failure}"
+
+    phases: dict[str, Callable[[], object]] = {
+        "parse": parse,
+        "compose": compose,
+        "collapse": lambda: composed.name_map.collapse({urdf for _, urdf in loaded}),
+        "serialize": lambda: composed.to_bytes(),
+        "check": check,
+    }
+    results = list[PhaseResult]()
+    for phase in PHASES:
+        results.append(_measure(scenario, size, phase, repeats, phases[phase]))
+        if phase == "compose":
+            # So the urdfs collapsed into are the components of composed
+            composed = compose()
+    return results
+
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(
+    scenarios: Iterable[Scenario], directory: Path, quick: bool = False, repeats: int = 5
+) -> dict[str, Any]:
+    """
+    Benchmark the scenarios, at their quick sizes if quick, without check_urdf
+
+    Returns the results as a JSON serializable dict, with what they were measured on
+    """
+    settings = get_check_urdf_settings()
+    globally_disable_check_urdf()
+    results = list[PhaseResult]()
+    try:
+        for scenario in scenarios:
+            size = scenario.quick_size if quick else scenario.default_size
+            results.extend(run_scenario(scenario, directory, size, repeats))
+    finally:
+        set_check_urdf_settings(settings)
+    return {
+        "meta": {
+            "urdf_compose_version": urdf_compose.__version__,
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "xml_backend": get_xml_backend(),
+            "quick": quick,
+        },
+        "results": [asdict(result) for result in results],
+    }
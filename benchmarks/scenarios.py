@@ -0,0 +1,75 @@
+"""
+The compositions that are benchmarked, each of which can be made larger with its size
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from benchmarks.generators import ComponentShape, port_conn_name
+from urdf_compose import (
+    ComposedURDFObj,
+    URDFComposeError,
+    URDFConn,
+    URDFObj,
+    branch,
+    sequence,
+)
+
+# Loads a new urdf obj of one of the scenario's components, by name
+ComponentLoader = Callable[[str], URDFObj]
+
+PART_SHAPE = ComponentShape(num_links=4, num_materials=2, num_meshes=2)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    default_size: int
+    quick_size: int
+    # The shapes of the components of the scenario, by name, for a size
+    shapes: Callable[[int], dict[str, ComponentShape]]
+    compose: Callable[[ComponentLoader, int], ComposedURDFObj | URDFComposeError]
+
+
+def _hub_shapes(size: int) -> dict[str, ComponentShape]:
+    return {"hub": ComponentShape(num_links=2, num_ports=size), "part": PART_SHAPE}
+
+
+def _chain(load: ComponentLoader, size: int) -> ComposedURDFObj | URDFComposeError:
+    return sequence(load("part"), *[load("part") for _ in range(size - 1)])
+
+
+def _wide_branch(load: ComponentLoader, size: int) -> ComposedURDFObj | URDFComposeError:
+    return branch(load("hub"), [(load("part"), URDFConn(port_conn_name(port))) for port in range(size)])
+
+
+def _deep_nesting(load: ComponentLoader, size: int) -> ComposedURDFObj | URDFComposeError:
+    # Each level is a composed urdf with the rest of the levels nested in it
+    nested: ComposedURDFObj | URDFComposeError = sequence(load("part"))
+    for _ in range(size - 1):
+        nested = sequence(load("part"), nested)
+    return nested
+
+
+def _fan_out(load: ComponentLoader, size: int) -> ComposedURDFObj | URDFComposeError:
+    # The same component, many times over, in short chains off of every port of a hub
+    return branch(
+        load("hub"),
+        [(sequence(load("part"), load("part"), load("part")), URDFConn(port_conn_name(port))) for port in range(size)],
+    )
+
+
+SCENARIOS = [
+    Scenario("chain", "A sequence of size parts", 200, 10, lambda size: {"part": PART_SHAPE}, _chain),
+    Scenario("wide_branch", "A hub with a part on each of its size ports", 200, 10, _hub_shapes, _wide_branch),
+    Scenario(
+        "deep_nesting",
+        "size parts, each sequenced onto the rest",
+        30,
+        5,
+        lambda size: {"part": PART_SHAPE},
+        _deep_nesting,
+    ),
+    Scenario("fan_out", "A hub with a chain of 3 parts on each of its size ports", 60, 5, _hub_shapes, _fan_out),
+]
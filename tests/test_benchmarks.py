@@ -0,0 +1,16 @@
+from pathlib import Path
+
+from benchmarks.compare import compare_results
+from benchmarks.runner import PHASES, run_benchmarks
+from benchmarks.scenarios import SCENARIOS
+
+
+class TestBenchmarks:
+    def test_quick_run(self, tmp_path: Path) -> None:
+        results = run_benchmarks(SCENARIOS, tmp_path, quick=True, repeats=1)
+        assert [(r["scenario"], r["phase"]) for r in results["results"]] == [
+            (scenario.name, phase) for scenario in SCENARIOS for phase in PHASES
+        ]
+        comparisons = compare_results(results, results)
+        assert len(comparisons) == len(results["results"])
+        assert not any(comparison.is_regression(0.1) for comparison in comparisons)
@@ -0,0 +1,70 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from urdf_compose import SpecError, build_spec, load_spec
+from urdf_compose.cli import main
+
+
+class TestBuild:
+    def test_incremental_build(self, tmp_path: Path) -> None:
+        dir = Path(__file__).parent
+        for name in ["rod.urdf", "hoop.urdf", "board.urdf"]:
+            shutil.copy(dir / name, tmp_path / name)
+        spec_path = tmp_path / "assembly.json"
+        spec = {
+            "components": {"rod": "rod.urdf", "hoop": "hoop.urdf", "board": "board.urdf"},
+            "outputs": {
+                "out/rods.urdf": {"sequence": ["rod", "rod"]},
+                "out/hoops.urdf": {"sequence": ["hoop", "hoop"]},
+                "out/board.urdf": {
+                    "branch": "board",
+                    "children": [
+                        {"urdf": "rod", "conn": "board-1"},
+                        {"urdf": {"sequence": ["hoop", "rod"]}, "conn": "board-2"},
+                    ],
+                },
+            },
+        }
+        spec_path.write_text(json.dumps(spec))
+
+        def built_outputs() -> list[str]:
+            return [result.output.name for result in build_spec(spec_path, jobs=2) if not result.up_to_date]
+
+        assert built_outputs() == ["rods.urdf", "hoops.urdf", "board.urdf"]
+        assert built_outputs() == []
+        shutil.copy(dir / "extender.urdf", tmp_path / "hoop.urdf")
+        assert built_outputs() == ["hoops.urdf", "board.urdf"]
+        (tmp_path / "out" / "rods.urdf").unlink()
+        assert main(["build", str(spec_path)]) == 0
+        assert built_outputs() == []
+
+    def test_invalid_spec(self, tmp_path: Path) -> None:
+        spec_path = tmp_path / "assembly.json"
+        spec_path.write_text(
+            json.dumps({"components": {"rod": "rod.urdf"}, "outputs": {"a.urdf": {"sequence": ["arm"]}}})
+        )
+        with pytest.raises(SpecError, match="unknown component arm"):
+            load_spec(spec_path)
+        spec_path.write_text('{"components": {"rod": "rod.urdf"},')
+        with pytest.raises(SpecError, match="assembly.json: invalid JSON"):
+            load_spec(spec_path)
+        toml_spec_path = tmp_path / "assembly.toml"
+        toml_spec_path.write_text("[components\nrod = 'rod.urdf'")
+        with pytest.raises(SpecError, match="assembly.toml: invalid TOML"):
+            load_spec(toml_spec_path)
+
+    def test_unparsable_component_fails_its_outputs(self, tmp_path: Path) -> None:
+        shutil.copy(Path(__file__).parent / "rod.urdf", tmp_path / "rod.urdf")
+        (tmp_path / "broken.urdf").write_text("<robot name=")
+        spec_path = tmp_path / "assembly.json"
+        spec = {
+            "components": {"rod": "rod.urdf", "broken": "broken.urdf"},
+            "outputs": {"rod_out.urdf": "rod", "broken_out.urdf": {"sequence": ["rod", "broken"]}},
+        }
+        spec_path.write_text(json.dumps(spec))
+        rod_result, broken_result = build_spec(spec_path, jobs=1)
+        assert rod_result.output.name == "rod_out.urdf"
+        assert broken_result.error is not None and not broken_result.up_to_date
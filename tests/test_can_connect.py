@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from urdf_compose import (
+    ConnectionCheck,
+    ExplicitURDFObj,
+    URDFComposeError,
+    URDFConn,
+    branch,
+    can_connect,
+    connection_error,
+    raise_if_compose_error,
+    sequence,
+)
+from urdf_compose.urdf_obj import URDFObj
+
+TEST_DIR = Path(__file__).parent
+
+
+def write_urdf(path: Path, body: str) -> ExplicitURDFObj:
+    path.write_text(f'<robot name="{path.stem}">{body}</robot>')
+    return ExplicitURDFObj(path, check=False, use_cache=False)
+
+
+class TestCanConnect:
+    def test_matches_branch(self, tmp_path: Path) -> None:
+        rod = ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)
+        board = ExplicitURDFObj(TEST_DIR / "board.urdf", check=False)
+        connected_output = write_urdf(
+            tmp_path / "connected_output.urdf",
+            '<link name="OUTPUT-a" /><link name="b" />'
+            '<joint name="j" type="fixed"><parent link="OUTPUT-a" /><child link="b" /></joint>',
+        )
+        connected_input = write_urdf(
+            tmp_path / "connected_input.urdf",
+            '<link name="INPUT-a" /><link name="b" />'
+            '<joint name="j" type="fixed"><parent link="b" /><child link="INPUT-a" /></joint>',
+        )
+        non_empty_output = write_urdf(
+            tmp_path / "non_empty_output.urdf", '<link name="OUTPUT-a"><inertial><mass value="1" /></inertial></link>'
+        )
+        two_inputs = write_urdf(tmp_path / "two_inputs.urdf", '<link name="INPUT-a" /><link name="INPUT-b" />')
+
+        cases: list[tuple[URDFObj, URDFObj, URDFConn, ConnectionCheck]] = [
+            (rod, rod, URDFConn(), "ok"),
+            (board, rod, URDFConn("board-1"), "ok"),
+            (raise_if_compose_error(sequence(rod, rod)), rod, URDFConn(), "ok"),
+            (board, rod, URDFConn(), "no_base_link"),
+            (board, rod, URDFConn("board-9"), "no_base_link"),
+            (rod, rod, URDFConn(extender_link="missing"), "no_extender_link"),
+            (rod, two_inputs, URDFConn(), "multiple_extender_links"),
+            (connected_output, rod, URDFConn(), "base_link_connected"),
+            (rod, connected_input, URDFConn(), "extender_link_connected"),
+            (non_empty_output, rod, URDFConn(), "non_empty_base_link"),
+        ]
+        for base, extender, conn, expected in cases:
+            assert can_connect(base, extender, conn) == expected, (base, extender, conn)
+            error = connection_error(base, extender, conn)
+            branched = branch(base, [(extender, conn)])
+            assert (error is None) == (expected == "ok") == (not isinstance(branched, URDFComposeError))
+            if error is not None:
+                assert isinstance(branched, URDFComposeError)
+                # The same issue as branch reports, though branch names copies of the urdfs
+                assert str(error).split(")]", 1)[1] == str(branched).split(")]", 1)[1]
@@ -0,0 +1,73 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import urdf_compose.urdf_obj as urdf_obj
+from urdf_compose import (
+    CheckURDFFailure,
+    ExplicitURDFObj,
+    check_urdf_cache_info,
+    clear_parse_cache,
+    disable_check_urdf_cache,
+    enable_check_urdf_cache,
+)
+from urdf_compose.check_cache import CheckURDFCache
+
+
+class TestCheckURDFCache:
+    def test_results_are_reused(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        dir = Path(__file__).parent
+        checked_paths = list[Path]()
+
+        def fake_check_urdf(urdf_path: Path) -> str:
+            checked_paths.append(urdf_path)
+            return "invalid hoop" if urdf_path.name == "hoop.urdf" else ""
+
+        monkeypatch.setattr(urdf_obj, "_run_check_urdf", fake_check_urdf)
+        monkeypatch.setattr(urdf_obj, "_global_check_urdf_enabled", True)
+        enable_check_urdf_cache(tmp_path / "cache", max_entries=2)
+        monkeypatch.setattr(urdf_obj, "_check_urdf_version", "fake")
+        clear_parse_cache()
+        try:
+            # (loading a file again reuses the result kept with the parsed files, see test_parse_cache)
+            for _ in range(2):
+                ExplicitURDFObj(dir / "rod.urdf")
+                with pytest.raises(CheckURDFFailure, match="invalid hoop"):
+                    ExplicitURDFObj(dir / "hoop.urdf")
+            assert [path.name for path in checked_paths] == ["rod.urdf", "hoop.urdf"]
+
+            # Same contents, different path
+            (tmp_path / "rod_copy.urdf").write_bytes((dir / "rod.urdf").read_bytes())
+            ExplicitURDFObj(tmp_path / "rod_copy.urdf")
+            assert len(checked_paths) == 2
+
+            ExplicitURDFObj(dir / "board.urdf")
+            info = check_urdf_cache_info()
+            assert info is not None
+            assert (info.hits, info.misses, info.currsize) == (1, 3, 2)
+
+            # A new check_urdf version invalidates every result
+            monkeypatch.setattr(urdf_obj, "_check_urdf_version", "fake2")
+            ExplicitURDFObj(dir / "board.urdf")
+            assert len(checked_paths) == 4
+        finally:
+            disable_check_urdf_cache()
+
+    def test_directory_is_only_listed_when_full(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache = CheckURDFCache(tmp_path / "cache", max_entries=100)
+        num_listings = 0
+        list_entries = cache._entries
+
+        def counted_entries() -> list[os.DirEntry[str]]:
+            nonlocal num_listings
+            num_listings += 1
+            return list_entries()
+
+        monkeypatch.setattr(cache, "_entries", counted_entries)
+        for i in range(300):
+            cache.put(f"{i:040x}", "")
+        # Once to count the results, then once the 101st is added and every 11 after that,
+        #   as 10 are evicted each time
+        assert num_listings == 1 + 1 + (300 - 101) // 11
+        assert len(list_entries()) <= 100
@@ -0,0 +1,65 @@
+from collections.abc import Mapping
+from pathlib import Path
+
+from urdf_compose import (
+    ExplicitURDFObj,
+    URDFConn,
+    URDFObjChild,
+    URDFObjOrError,
+    generate_configurations,
+    raise_if_compose_error,
+    sequence,
+    sequence_slots,
+)
+
+
+def compose_unless_hoop_first(components: Mapping[str, URDFObjChild]) -> URDFObjOrError:
+    base = components["base"]
+    if isinstance(base, tuple) and "hoop" in repr(base[0]):
+        raise ValueError("hoops go last")
+    return sequence_slots(components)
+
+
+class TestConfigurations:
+    def test_generate_configurations(self, tmp_path: Path) -> None:
+        dir = Path(__file__).parent
+        results = generate_configurations(
+            {
+                "base": {"rod": dir / "rod.urdf", "hoop": dir / "hoop.urdf"},
+                "end": {
+                    "rod": dir / "rod.urdf",
+                    "hoop": dir / "hoop.urdf",
+                    "bad": (dir / "rod.urdf", URDFConn("nope")),
+                },
+            },
+            tmp_path,
+            constraint=lambda configuration: configuration != {"base": "hoop", "end": "hoop"},
+            max_workers=2,
+        )
+        assert [(r.configuration["base"], r.configuration["end"]) for r in results] == [
+            ("rod", "rod"),
+            ("rod", "hoop"),
+            ("rod", "bad"),
+            ("hoop", "rod"),
+            ("hoop", "bad"),
+        ]
+        for result in results:
+            assert (result.error is not None) == (result.configuration["end"] == "bad"), result.error
+            assert result.dest.exists() == (result.error is None)
+            assert min(result.load_seconds, result.compose_seconds, result.write_seconds) >= 0
+
+        rod_urdf = ExplicitURDFObj(dir / "rod.urdf")
+        expected = raise_if_compose_error(sequence(rod_urdf, ExplicitURDFObj(dir / "hoop.urdf")))
+        assert ExplicitURDFObj(tmp_path / "rod-hoop.urdf").same_structure(expected)
+
+    def test_compose_errors_are_kept_per_configuration(self, tmp_path: Path) -> None:
+        dir = Path(__file__).parent
+        results = generate_configurations(
+            {"base": {"rod": dir / "rod.urdf", "hoop": dir / "hoop.urdf"}, "end": {"rod": dir / "rod.urdf"}},
+            tmp_path,
+            compose=compose_unless_hoop_first,
+            max_workers=2,
+            check=False,
+        )
+        assert [result.error for result in results] == [None, "ValueError: hoops go last"]
+        assert (tmp_path / "rod-rod.urdf").exists()
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from urdf_compose import (
+    ComposedURDFObj,
+    ExplicitURDFObj,
+    URDFConn,
+    branch,
+    instrument,
+    raise_if_compose_error,
+    sequence,
+)
+
+TEST_DIR = Path(__file__).parent
+
+
+class TestInstrumentation:
+    def test_records_phases_and_counters(self, tmp_path: Path) -> None:
+        with instrument(trace=True) as instrumentation:
+            board = ExplicitURDFObj(TEST_DIR / "board.urdf", check=False, use_cache=False)
+            rods = [ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False, use_cache=False) for _ in range(2)]
+            composed = raise_if_compose_error(branch(board, [(sequence(*rods), URDFConn("board-1"))]))
+            composed.to_bytes()
+            composed.name_map.collapse({board, *rods})
+
+        summary = instrumentation.summary()
+        for phase in ("parse", "resolve_conn", "check_for_connection_issue", "connect", "copy_tree", "serialize"):
+            assert summary["phases"][phase]["calls"] > 0, phase
+        assert summary["phases"]["parse"]["calls"] == 3
+        assert summary["phases"]["collapse"]["calls"] == 1
+        assert summary["counters"]["copied_trees"] == summary["phases"]["copy_tree"]["calls"]
+        assert summary["counters"]["parsed_elements"] > 0
+
+        trace_path = tmp_path / "trace.json"
+        instrumentation.write_chrome_trace(trace_path)
+        events = json.loads(trace_path.read_text())["traceEvents"]
+        assert len(events) == sum(stats["calls"] for stats in summary["phases"].values())
+        assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+    def test_records_renames_as_rename_elements(self) -> None:
+        rod = ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)
+        with instrument() as instrumentation:
+            composed = ComposedURDFObj.wrap(rod)
+        assert "rename_elements" not in instrumentation.summary()["phases"]
+
+        composed = ComposedURDFObj.construct(rod)
+        with instrument() as instrumentation:
+            composed.rename_elements({"INPUT-rod": "INPUT-other_rod"})
+        summary = instrumentation.summary()
+        assert summary["phases"]["rename_elements"]["calls"] == 1
+        assert summary["counters"]["renamed_elements"] == 1
+
+    def test_records_nothing_outside(self) -> None:
+        with instrument() as instrumentation:
+            pass
+        raise_if_compose_error(sequence(ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)))
+        assert instrumentation.summary() == {"phases": {}, "counters": {}}
+        assert instrumentation.events == []
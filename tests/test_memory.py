@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from urdf_compose import (
+    ExplicitURDFObj,
+    URDFConn,
+    branch,
+    memory_report,
+    raise_if_compose_error,
+    sequence,
+)
+
+TEST_DIR = Path(__file__).parent
+
+
+class TestMemoryReport:
+    def test_breaks_down_by_component(self) -> None:
+        board = ExplicitURDFObj(TEST_DIR / "board.urdf", check=False)
+        rod = ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)
+        extender = ExplicitURDFObj(TEST_DIR / "extender.urdf", check=False)
+        extenders = raise_if_compose_error(sequence(extender, extender))
+        composed = raise_if_compose_error(branch(board, [(rod, URDFConn("board-1")), (extenders, URDFConn("board-2"))]))
+        report = memory_report(composed)
+        by_urdf = {component.urdf: component for component in report.components}
+        assert by_urdf[board].elements == len(board.getroot())
+        assert by_urdf[rod].elements == len(rod.getroot())
+        assert by_urdf[extenders].elements == len(extenders.getroot())
+        # The joints connecting the board to the rod and extenders
+        assert by_urdf[None].elements == 2
+        assert sum(component.elements for component in report.components) == len(composed.getroot())
+        assert all(component.bytes > 0 for component in report.components)
+        assert report.index_bytes > 0 and report.name_map_bytes > 0
+        assert report.total_bytes > report.tree_bytes
+
+    def test_explicit_urdf(self) -> None:
+        rod = ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)
+        report = memory_report(rod)
+        assert [(component.urdf, component.elements) for component in report.components] == [(rod, 3)]
+        assert report.name_map_bytes == 0
+
+    def test_composing_shares_the_trees_of_children(self) -> None:
+        rod = ExplicitURDFObj(TEST_DIR / "rod.urdf", check=False)
+        composed = raise_if_compose_error(sequence(rod, rod))
+        assert not hasattr(composed, "__dict__") and not hasattr(composed.name_map, "__dict__")
+        # The second rod is keyed by a wrapper of it, which shares its tree rather than copying it
+        (wrapper,) = [urdf for urdf in composed.name_map.name_map_lookup if urdf is not rod]
+        assert wrapper.tree is rod.tree
@@ -1,8 +1,14 @@
+import gc
+import weakref
+from pathlib import Path
+
 from examples.simple_chain.make_chain import ROD_PATH
-from urdf_compose import ExplicitURDFObj
+from urdf_compose import ExplicitURDFObj, composed_urdf, reset_name_table
 from urdf_compose.compose import raise_if_compose_error, sequence
 from urdf_compose.composed_urdf import RepeatedURDFError
 
+EXTENDER_PATH = Path(__file__).parent / "extender.urdf"
+
 
 class TestNameMap:
     def test_simple_collapse(self) -> None:
@@ -27,3 +33,78 @@ class TestNameMap:
         composed_urdf = raise_if_compose_error(sequence(extender_urdf, extender_urdf2, extender_urdf))
         name_map = composed_urdf.name_map.collapse({extender_urdf2})
         assert name_map.lookup(extender_urdf2, "joint") == "joint(2)"
+
+    def test_copy_is_independent(self) -> None:
+        rod_urdf1 = ExplicitURDFObj(ROD_PATH)
+        rod_urdf2 = ExplicitURDFObj(ROD_PATH)
+        name_map = raise_if_compose_error(sequence(rod_urdf1, rod_urdf2)).name_map.collapse_strict(
+            {rod_urdf1, rod_urdf2}
+        )
+        name_map_copy = name_map.copy()
+        name_map._rename("joint(1)", "renamed_joint")
+        assert name_map.lookup(rod_urdf2, "joint") == "renamed_joint"
+        assert name_map.name_to_urdf_and_og_name["renamed_joint"] == (rod_urdf2, "joint")
+        assert name_map_copy.lookup(rod_urdf2, "joint") == "joint(1)"
+        assert name_map_copy.name_map_lookup[rod_urdf2]["joint"] == "joint(1)"
+        assert "renamed_joint" not in name_map_copy.name_to_urdf_and_og_name
+        # Copies share what neither has changed
+        assert name_map_copy._component_maps is name_map._component_maps
+        assert name_map_copy._name_entries is not name_map._name_entries
+        name_map_copy._rename("joint(1)", "copy_joint")
+        assert name_map.lookup(rod_urdf2, "joint") == "renamed_joint"
+        assert name_map_copy.lookup(rod_urdf2, "joint") == "copy_joint"
+
+    def test_lookup_many_and_items(self) -> None:
+        rod_urdf1 = ExplicitURDFObj(ROD_PATH)
+        rod_urdf2 = ExplicitURDFObj(ROD_PATH)
+        name_map = raise_if_compose_error(sequence(rod_urdf1, rod_urdf2)).name_map.collapse_strict(
+            {rod_urdf1, rod_urdf2}
+        )
+        assert name_map.lookup(rod_urdf2, "not_a_name") is None
+        assert name_map.lookup_many(rod_urdf2, ["joint", "not_a_name"]) == ["joint(1)", None]
+        items = list(name_map.items())
+        assert len(items) == len(name_map.name_to_urdf_and_og_name)
+        for urdf, og_name, name in items:
+            assert name_map.lookup(urdf, og_name) == name
+
+    def test_nested_collapse_follows_removed_materials(self) -> None:
+        extender_urdfs = [ExplicitURDFObj(EXTENDER_PATH) for _ in range(4)]
+        first_half = raise_if_compose_error(sequence(*extender_urdfs[:2]))
+        second_half = raise_if_compose_error(sequence(*extender_urdfs[2:]))
+        composed_urdf = raise_if_compose_error(sequence(first_half, second_half))
+        name_map = composed_urdf.name_map.collapse_strict(set(extender_urdfs))
+        # Only the first extender's material is left in the composed urdf
+        assert name_map.name_to_urdf_and_og_name["Silver"] == (extender_urdfs[0], "Silver")
+        assert [name_map.lookup(urdf, "Silver") for urdf in extender_urdfs] == ["Silver"] * 4
+
+    def test_nested_collapse_follows_renames_at_every_depth(self) -> None:
+        rod_urdfs = [ExplicitURDFObj(ROD_PATH) for _ in range(3)]
+        inner = raise_if_compose_error(sequence(rod_urdfs[0], rod_urdfs[1]))
+        inner.rename_elements({"joint(1)": "inner_joint"})
+        composed_urdf = raise_if_compose_error(sequence(rod_urdfs[2], inner))
+        composed_urdf.rename_elements({"inner_joint": "outer_joint"})
+        # Renaming inner afterwards doesn't change what composed_urdf was composed of
+        inner.rename_elements({"inner_joint": "unused"})
+        name_map = composed_urdf.name_map.collapse_strict(set(rod_urdfs))
+        assert name_map.lookup(rod_urdfs[1], "joint") == "outer_joint"
+        assert name_map.name_to_urdf_and_og_name["outer_joint"] == (rod_urdfs[1], "joint")
+        assert all(name_map.lookup(urdf, "joint") in composed_urdf.index.names() for urdf in rod_urdfs)
+
+    def test_reset_name_table(self) -> None:
+        rod_urdfs = [ExplicitURDFObj(ROD_PATH) for _ in range(3)]
+        expected_names = ["joint", "joint(1)", "joint(2)"]
+        # (so the old table is only used by this test)
+        reset_name_table()
+        old_table = weakref.ref(composed_urdf._name_table)
+        first_half = raise_if_compose_error(sequence(*rod_urdfs[:2]))
+        reset_name_table()
+        # Urdfs composed with the old table can be composed with ones of the new table
+        composed = raise_if_compose_error(sequence(first_half, rod_urdfs[2]))
+        name_map = composed.name_map.collapse_strict(set(rod_urdfs))
+        assert [name_map.lookup(urdf, "joint") for urdf in rod_urdfs] == expected_names
+        assert name_map.name_to_urdf_and_og_name["joint(2)"] == (rod_urdfs[2], "joint")
+
+        # The old table is freed with the last name map using it
+        del first_half, composed, name_map
+        gc.collect()
+        assert old_table() is None
@@ -0,0 +1,81 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+import urdf_compose.urdf_obj as urdf_obj
+from urdf_compose import (
+    CheckURDFFailure,
+    ExplicitURDFObj,
+    clear_parse_cache,
+    parse_cache_info,
+    raise_if_compose_error,
+    sequence,
+)
+
+
+class TestParseCache:
+    def test_same_file_is_parsed_once(self) -> None:
+        dir = Path(__file__).parent
+        clear_parse_cache()
+        urdf1 = ExplicitURDFObj(dir / "rod.urdf", use_cache=True)
+        urdf2 = ExplicitURDFObj(dir / "rod.urdf", use_cache=True)
+        info = parse_cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+        assert urdf1.tree is urdf2.tree
+        assert ExplicitURDFObj(dir / "rod.urdf").tree is not urdf1.tree
+
+        # Composition doesn't change the shared tree
+        raise_if_compose_error(sequence(urdf1, urdf2))
+        assert urdf1.same_structure(ExplicitURDFObj(dir / "rod.urdf"), use_fingerprint=False)
+
+    def test_urdfs_are_independent_by_default(self) -> None:
+        dir = Path(__file__).parent
+        clear_parse_cache()
+        urdf1 = ExplicitURDFObj(dir / "rod.urdf")
+        urdf2 = ExplicitURDFObj(dir / "rod.urdf")
+        assert parse_cache_info().currsize == 0
+
+        root = urdf1.getroot()
+        joint = root.find("joint")
+        assert joint is not None
+        root.remove(joint)
+        urdf1.index.remove(joint)
+        assert urdf2.getroot().find("joint") is not None
+        assert urdf2.index.find("joint", "joint") is not None
+
+    def test_changed_file_is_parsed_again(self, tmp_path: Path) -> None:
+        dir = Path(__file__).parent
+        clear_parse_cache()
+        path = tmp_path / "component.urdf"
+        shutil.copy(dir / "rod.urdf", path)
+        rod_urdf = ExplicitURDFObj(path, check=False, use_cache=True)
+        shutil.copy(dir / "hoop.urdf", path)
+        hoop_urdf = ExplicitURDFObj(path, check=False, use_cache=True)
+        assert parse_cache_info().misses == 2
+        assert not rod_urdf.same_structure(hoop_urdf)
+
+    def test_file_is_checked_once(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        checked_paths = list[Path]()
+
+        def run_check_urdf(urdf_path: Path) -> str:
+            checked_paths.append(urdf_path)
+            return "" if "rod" in urdf_path.read_text() else "Error: not a rod"
+
+        monkeypatch.setattr(urdf_obj, "_run_check_urdf", run_check_urdf)
+        monkeypatch.setattr(urdf_obj, "_global_check_urdf_enabled", True)
+        dir = Path(__file__).parent
+        clear_parse_cache()
+        path = tmp_path / "component.urdf"
+        shutil.copy(dir / "rod.urdf", path)
+        ExplicitURDFObj(path)
+        ExplicitURDFObj(path)
+        ExplicitURDFObj(path, use_cache=True)
+        assert checked_paths == [path]
+
+        # Failures are kept too, and a changed file is checked again
+        shutil.copy(dir / "hoop.urdf", path)
+        for use_cache in [False, True]:
+            with pytest.raises(CheckURDFFailure, match="not a rod"):
+                ExplicitURDFObj(path, use_cache=use_cache)
+        assert checked_paths == [path, path]
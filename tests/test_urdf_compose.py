@@ -1,7 +1,26 @@
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
-from urdf_compose import ExplicitURDFObj, URDFConn, branch, sequence
-from urdf_compose.compose import raise_if_compose_error, write_and_check_urdf
+from urdf_compose import (
+    ComposedURDFBuilder,
+    ComposedURDFObj,
+    CompositionCache,
+    ExplicitURDFObj,
+    URDFComposeError,
+    URDFConn,
+    branch,
+    lazy_branch,
+    lazy_sequence,
+    sequence,
+)
+from urdf_compose.compose import (
+    general_urdf_append,
+    raise_if_compose_error,
+    wrap_urdf_as_composed,
+    write_and_check_urdf,
+)
+from urdf_compose.resolve_connections import resolve_conn
+from urdf_compose.urdf_obj import URDFObj
 
 
 class TestURDFCompose:
@@ -103,3 +122,189 @@ class TestURDFCompose:
             )
         )
         write_and_check_urdf(composed_urdf, dir / "testout/test11.urdf")
+
+    def test_builder_matches_branch(self) -> None:
+        dir = Path(__file__).parent
+        board = ExplicitURDFObj(dir / "board.urdf")
+        rod = ExplicitURDFObj(dir / "rod.urdf")
+        hoop = ExplicitURDFObj(dir / "hoop.urdf")
+        children = [
+            (rod, URDFConn("board-1")),
+            (hoop, URDFConn("board-2")),
+            (rod, URDFConn("board-3")),
+        ]
+        branched_urdf = raise_if_compose_error(branch(board, children))
+        builder = ComposedURDFBuilder(board)
+        for child, conn in children:
+            builder.attach(child, conn)
+        built_urdf = raise_if_compose_error(builder.build())
+        assert built_urdf.same_structure(branched_urdf)
+        write_and_check_urdf(built_urdf, dir / "testout/test12.urdf")
+
+        appended_urdf = raise_if_compose_error(
+            general_urdf_append(
+                board,
+                [(child, raise_if_compose_error(resolve_conn(board, child, conn))) for child, conn in children],
+                use_name_map=False,
+            )
+        )
+        assert appended_urdf.to_bytes() == branched_urdf.to_bytes()
+
+    def test_builder_keeps_first_error(self) -> None:
+        dir = Path(__file__).parent
+        rod = ExplicitURDFObj(dir / "rod.urdf")
+        built_urdf = (
+            ComposedURDFBuilder(ExplicitURDFObj(dir / "board.urdf"))
+            .attach(rod, URDFConn("board-1"))
+            .attach(rod, URDFConn("board-1"))
+            .attach(rod, URDFConn("board-2"))
+            .build()
+        )
+        assert isinstance(built_urdf, URDFComposeError)
+
+    def test_long_sequence(self) -> None:
+        dir = Path(__file__).parent
+        num_rods = 1000
+        rods = [ExplicitURDFObj(dir / "rod.urdf") for _ in range(num_rods)]
+        composed_urdf = raise_if_compose_error(sequence(*rods))
+        # Each rod has 3 elements, plus a generated joint per connection
+        assert len(composed_urdf.getroot()) == 4 * num_rods - 1
+        name_map = composed_urdf.name_map.collapse_strict(set(rods))
+        # Named from the end of the sequence, as nested sequences are
+        assert name_map.lookup(rods[-1], "joint") == "joint(1)"
+        assert name_map.lookup(rods[1], "joint") == f"joint({num_rods - 1})"
+        assert name_map.lookup(rods[-1], "OUTPUT-rod") == "OUTPUT-rod"
+        write_and_check_urdf(composed_urdf, dir / "testout/test13.urdf")
+
+    def test_sequence_matches_nested_branch(self) -> None:
+        # expected_sequence.urdf was written by sequence when it nested branch, so names are
+        #   handed out the same way they were
+        dir = Path(__file__).parent
+        urdfs = [ExplicitURDFObj(dir / f"{name}.urdf") for name in ["rod", "extender", "rod", "extender", "rod"]]
+        composed_urdf = raise_if_compose_error(sequence(*urdfs))
+        assert composed_urdf.to_bytes() == (dir / "expected_sequence.urdf").read_bytes()
+
+    def test_sequence_onto_composed_urdf(self) -> None:
+        # The joints generated by both sequences are named GENERATED_CONNECTION at first
+        dir = Path(__file__).parent
+        urdfs = [ExplicitURDFObj(dir / "extender.urdf") for _ in range(4)]
+        composed_urdf = raise_if_compose_error(sequence(raise_if_compose_error(sequence(*urdfs[:2])), *urdfs[2:]))
+        joint_names = [el.attrib["name"] for el in composed_urdf.getroot().findall("joint")]
+        assert len([name for name in joint_names if name.startswith("GENERATED_CONNECTION")]) == 3
+        assert len(set(joint_names)) == len(joint_names)
+
+    def test_wrapped_urdf_is_a_copy(self) -> None:
+        rod_urdf = ExplicitURDFObj(Path(__file__).parent / "rod.urdf")
+        wrapped_urdf = wrap_urdf_as_composed(rod_urdf)
+        wrapped_urdf.rename_elements({"joint": "renamed_joint"})
+        assert wrapped_urdf.getroot().find("joint[@name='renamed_joint']") is not None
+        assert rod_urdf.getroot().find("joint[@name='joint']") is not None
+        assert "renamed_joint" not in rod_urdf.index.names()
+
+    def test_duplicate_materials_are_written_once(self) -> None:
+        dir = Path(__file__).parent
+        urdfs = [ExplicitURDFObj(dir / "extender.urdf") for _ in range(3)]
+        composed_urdf = raise_if_compose_error(
+            branch(
+                ExplicitURDFObj(dir / "board.urdf"),
+                [(urdf, URDFConn(f"board-{i + 1}")) for i, urdf in enumerate(urdfs)],
+            )
+        )
+        assert len(composed_urdf.getroot().findall("material")) == 1
+        name_map = composed_urdf.name_map.collapse(set(urdfs))
+        assert all(name_map.lookup(urdf, "Silver") == "Silver" for urdf in urdfs)
+        write_and_check_urdf(composed_urdf, dir / "testout/test14.urdf")
+
+    def test_composition_cache(self) -> None:
+        dir = Path(__file__).parent
+        rod_urdf = ExplicitURDFObj(dir / "rod.urdf")
+        end_urdfs = [ExplicitURDFObj(dir / "hoop.urdf"), ExplicitURDFObj(dir / "extender.urdf")]
+        cache = CompositionCache()
+        cached_urdfs = list[ComposedURDFObj]()
+        for end_urdf in end_urdfs:
+            cached = raise_if_compose_error(cache.sequence(rod_urdf, rod_urdf, rod_urdf, end_urdf))
+            expected = raise_if_compose_error(sequence(rod_urdf, rod_urdf, rod_urdf, end_urdf))
+            assert ET.tostring(cached.getroot()) == ET.tostring(expected.getroot())
+            assert (
+                cached.name_map.collapse({end_urdf}).name_map_lookup
+                == expected.name_map.collapse({end_urdf}).name_map_lookup
+            )
+            cached_urdfs.append(cached)
+        # The whole sequence is reused
+        assert cache.sequence(rod_urdf, rod_urdf, rod_urdf, end_urdfs[0]) is cached_urdfs[0]
+        assert cache.info().made_connections == 6
+        assert cache.info().reused_connections == 3
+
+        children = [(end_urdfs[0], URDFConn("board-1")), (end_urdfs[1], URDFConn("board-2"))]
+        board_urdf = ExplicitURDFObj(dir / "board.urdf")
+        cached_branch = raise_if_compose_error(cache.branch(board_urdf, children))
+        assert cached_branch.same_structure(raise_if_compose_error(branch(board_urdf, children)))
+
+        # The first children of a branch are reused
+        children.append((rod_urdf, URDFConn("board-3")))
+        cached_branch = raise_if_compose_error(cache.branch(board_urdf, children))
+        expected_branch = raise_if_compose_error(branch(board_urdf, children))
+        assert cached_branch.to_bytes() == expected_branch.to_bytes()
+        assert cached_branch.name_map.collapse({rod_urdf}).name_map_lookup == (
+            expected_branch.name_map.collapse({rod_urdf}).name_map_lookup
+        )
+        assert cache.info().reused_connections == 5 and cache.info().made_connections == 9
+
+    def test_composition_cache_evicts_least_recently_used(self) -> None:
+        dir = Path(__file__).parent
+        rod_urdf = ExplicitURDFObj(dir / "rod.urdf")
+        hoop_urdf = ExplicitURDFObj(dir / "hoop.urdf")
+        extender_urdf = ExplicitURDFObj(dir / "extender.urdf")
+        cache = CompositionCache(maxsize=2)
+        rod_hoop = cache.sequence(rod_urdf, hoop_urdf)
+        cache.sequence(rod_urdf, extender_urdf)
+        assert cache.sequence(rod_urdf, hoop_urdf) is rod_hoop
+        cache.sequence(extender_urdf, hoop_urdf)
+        assert cache.info().currsize == 2
+        assert cache.sequence(rod_urdf, hoop_urdf) is rod_hoop
+        # rod + extender was used least recently, so it was dropped
+        cache.sequence(rod_urdf, extender_urdf)
+        assert cache.info().made_connections == 4
+
+    def test_lazy_composition(self) -> None:
+        dir = Path(__file__).parent
+        rod_urdf = ExplicitURDFObj(dir / "rod.urdf")
+        hoop_urdf = ExplicitURDFObj(dir / "hoop.urdf")
+        extender_urdf = ExplicitURDFObj(dir / "extender.urdf")
+        board_urdf = ExplicitURDFObj(dir / "board.urdf")
+        primitive_urdfs: set[URDFObj] = {rod_urdf, hoop_urdf, extender_urdf, board_urdf}
+
+        inner_plan = lazy_sequence(rod_urdf, hoop_urdf)
+        plan = lazy_branch(board_urdf, [(inner_plan, URDFConn("board-1")), (extender_urdf, URDFConn("board-2"))])
+        inner_urdf = raise_if_compose_error(sequence(rod_urdf, hoop_urdf))
+        expected = raise_if_compose_error(
+            branch(board_urdf, [(inner_urdf, URDFConn("board-1")), (extender_urdf, URDFConn("board-2"))])
+        )
+
+        assert plan.check() is None
+        assert (
+            plan.name_map.collapse(primitive_urdfs).name_map_lookup
+            == expected.name_map.collapse(primitive_urdfs).name_map_lookup
+        )
+        assert plan.to_bytes() == expected.to_bytes()
+        assert plan._result is None and inner_plan._result is None, "Checking and writing shouldn't compose the urdfs"
+        assert ET.tostring(plan.getroot()) == ET.tostring(expected.getroot())
+
+        assert isinstance(lazy_sequence(rod_urdf, (rod_urdf, URDFConn("nope"))).check(), URDFComposeError)
+        failing_plan = lazy_sequence(rod_urdf, (rod_urdf, URDFConn("nope")))
+        assert isinstance(lazy_sequence(rod_urdf, failing_plan).check(), URDFComposeError)
+
+    def test_lazy_composition_renames_materials(self, tmp_path: Path) -> None:
+        dir = Path(__file__).parent
+        extender_urdf = ExplicitURDFObj(dir / "extender.urdf")
+        # A Silver of a different color, which is renamed rather than removed when composed
+        gold_path = tmp_path / "gold_extender.urdf"
+        gold_path.write_text((dir / "extender.urdf").read_text().replace("0.753 0.753 0.753", "0.8 0.6 0.2"))
+        gold_urdf = ExplicitURDFObj(gold_path)
+
+        plan = lazy_sequence(extender_urdf, lazy_sequence(gold_urdf, extender_urdf), gold_urdf)
+        expected = raise_if_compose_error(
+            sequence(extender_urdf, raise_if_compose_error(sequence(gold_urdf, extender_urdf)), gold_urdf)
+        )
+        assert b'<material name="Silver(1)" />' in expected.to_bytes()
+        assert plan.to_bytes() == expected.to_bytes()
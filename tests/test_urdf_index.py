@@ -0,0 +1,92 @@
+import random
+from pathlib import Path
+
+from urdf_compose import ExplicitURDFObj, raise_if_compose_error, sequence
+from urdf_compose.composed_urdf import ComposedURDFObj, first_available
+from urdf_compose.urdf_index import NameAllocator, make_name
+
+
+class TestURDFIndex:
+    def test_index_follows_renames(self) -> None:
+        dir = Path(__file__).parent
+        composed_urdf = ComposedURDFObj.construct(ExplicitURDFObj(dir / "rod.urdf"))
+        composed_urdf.rename_elements({"INPUT-rod": "OUTPUT-rod", "OUTPUT-rod": "INPUT-rod"})
+        index = composed_urdf.index
+        assert index.find("link", "INPUT-rod") is composed_urdf.getroot()[1]
+        assert index.find("link", "OUTPUT-rod") is composed_urdf.getroot()[0]
+        joint = index.find("joint", "joint")
+        assert joint is not None
+        assert joint.find("parent").attrib["link"] == "OUTPUT-rod"  # type: ignore
+        assert index.find(None, "joint") is joint
+        assert index.find("link", "joint") is None
+
+    def test_index_matches_composed_tree(self) -> None:
+        dir = Path(__file__).parent
+        composed_urdf = raise_if_compose_error(
+            sequence(ExplicitURDFObj(dir / "extender.urdf"), ExplicitURDFObj(dir / "extender.urdf"))
+        )
+        names = [el.attrib["name"] for el in composed_urdf.getroot()]
+        assert set(composed_urdf.index.names()) == set(names)
+        for el in composed_urdf.getroot():
+            assert composed_urdf.index.find(el.tag, el.attrib["name"]) is el
+        assert composed_urdf.index.links_with_prefix("OUTPUT") == ["OUTPUT-vgc10_extender_stick"]
+
+    def test_joint_adjacency_follows_connections(self) -> None:
+        dir = Path(__file__).parent
+        composed_urdf = raise_if_compose_error(
+            sequence(ExplicitURDFObj(dir / "rod.urdf"), ExplicitURDFObj(dir / "rod.urdf"))
+        )
+        index = composed_urdf.index
+        assert [el.attrib["name"] for el in index.joints_with_parent("INPUT-rod")] == ["joint"]
+        assert [el.attrib["name"] for el in index.joints_with_parent("CONNECTED:OUTPUT-rod")] == [
+            "GENERATED_CONNECTION"
+        ]
+        assert [el.attrib["name"] for el in index.joints_with_child("CONNECTED:INPUT-rod")] == ["GENERATED_CONNECTION"]
+        assert [el.attrib["name"] for el in index.joints_with_child("OUTPUT-rod")] == ["joint(1)"]
+        assert len(index.joints_with_parent("OUTPUT-rod")) == 0
+        assert len(index.joints_with_child("INPUT-rod")) == 0
+
+    def test_name_allocator_matches_first_available(self) -> None:
+        rng = random.Random(0)
+        allocator = NameAllocator()
+        used_names = set[str]()
+        for _ in range(2000):
+            name = rng.choice(["joint", "link", "joint(1)"])
+            outlawed_new_names = {make_name(name, rng.randrange(4))}
+            expected = first_available(used_names, outlawed_new_names, name)
+            assert allocator.first_available(name, outlawed_new_names) == expected
+            if rng.random() < 0.7:
+                allocator.add(expected)
+                used_names.add(expected)
+            elif used_names:
+                removed = rng.choice(sorted(used_names))
+                allocator.discard(removed)
+                used_names.remove(removed)
+
+    def test_fingerprint_follows_mutations(self) -> None:
+        dir = Path(__file__).parent
+        composed_urdf1 = ComposedURDFObj.construct(ExplicitURDFObj(dir / "rod.urdf"))
+        composed_urdf2 = ComposedURDFObj.construct(ExplicitURDFObj(dir / "rod.urdf"))
+        assert composed_urdf1.same_structure(composed_urdf2)
+        composed_urdf1.rename_elements({"INPUT-rod": "INPUT-other_rod"})
+        assert not composed_urdf1.same_structure(composed_urdf2)
+        assert not composed_urdf1.same_structure(composed_urdf2, use_fingerprint=False)
+        composed_urdf1.rename_elements({"INPUT-other_rod": "INPUT-rod"})
+        assert composed_urdf1.same_structure(composed_urdf2)
+        assert composed_urdf1.same_structure(composed_urdf2, use_fingerprint=False)
+
+    def test_invalidate_fingerprint_after_direct_edits(self) -> None:
+        dir = Path(__file__).parent
+        composed_urdf1 = ComposedURDFObj.construct(ExplicitURDFObj(dir / "rod.urdf"))
+        composed_urdf2 = ComposedURDFObj.construct(ExplicitURDFObj(dir / "rod.urdf"))
+        assert composed_urdf1.same_structure(composed_urdf2)
+        # Not through urdf_compose, so the memoized fingerprint is stale until invalidated
+        composed_urdf1.getroot()[0].attrib["name"] = "edited"
+        assert composed_urdf1.same_structure(composed_urdf2)
+        assert not composed_urdf1.same_structure(composed_urdf2, use_fingerprint=False)
+        composed_urdf1.invalidate_fingerprint()
+        assert not composed_urdf1.same_structure(composed_urdf2)
+        composed_urdf1.getroot()[0].attrib["name"] = composed_urdf2.getroot()[0].attrib["name"]
+        assert not composed_urdf1.same_structure(composed_urdf2)
+        composed_urdf1.invalidate_fingerprint()
+        assert composed_urdf1.same_structure(composed_urdf2)
@@ -0,0 +1,104 @@
+import asyncio
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+import urdf_compose.urdf_obj as urdf_obj
+from urdf_compose import (
+    CheckURDFFailure,
+    ExplicitURDFObj,
+    URDFObj,
+    raise_if_compose_error,
+    sequence,
+    set_check_urdf_mode,
+    write_and_check_many,
+    write_and_check_many_async,
+    write_and_check_urdf,
+)
+from urdf_compose.validate import urdf_problems
+
+
+def _problems(joints: str, links: str = '<link name="a"/><link name="b"/>') -> list[str]:
+    return urdf_problems(ET.fromstring(f'<robot name="r">{links}{joints}</robot>'))
+
+
+def _joint(name: str, parent: str, child: str, attrs: str = 'type="fixed"', body: str = "") -> str:
+    return f'<joint name="{name}" {attrs}><parent link="{parent}"/><child link="{child}"/>{body}</joint>'
+
+
+class TestValidate:
+    def test_valid_urdfs(self) -> None:
+        dir = Path(__file__).parent
+        for name in ["rod.urdf", "hoop.urdf", "board.urdf", "extender.urdf", "expected.urdf"]:
+            assert ExplicitURDFObj(dir / name, check=False).validate() is None, name
+        rod_urdf = ExplicitURDFObj(dir / "rod.urdf", check=False)
+        assert raise_if_compose_error(sequence(rod_urdf, rod_urdf, rod_urdf)).validate() is None
+
+    @pytest.mark.parametrize(
+        "joints, links, problem",
+        [
+            (_joint("j", "a", "b", 'type="hinge"'), None, "invalid type hinge"),
+            (_joint("j", "a", "b", 'type="revolute"'), None, "doesn't specify an effort and velocity limit"),
+            (_joint("j", "a", "c"), None, "child link c, which doesn't exist"),
+            (_joint("j", "a", "b", body='<origin xyz="0 0"/>'), None, 'xyz="0 0" should have 3 values'),
+            (_joint("j", "a", "b", body='<axis xyz="0 x 1"/>'), None, "should be numbers"),
+            (_joint("j", "a", "b") + _joint("j", "a", "b"), None, "joint j is not unique"),
+            ("", None, "Expected a single root link, found ['a', 'b']"),
+            (_joint("j1", "a", "b") + _joint("j2", "b", "c"), '<link name="a"/><link name="b"/><link name="c"/>', None),
+            (
+                _joint("j1", "a", "b") + _joint("j2", "b", "c") + _joint("j3", "c", "b"),
+                '<link name="a"/><link name="b"/><link name="c"/>',
+                "multiple parents",
+            ),
+            (
+                _joint("j1", "b", "c") + _joint("j2", "c", "b"),
+                '<link name="a"/><link name="b"/><link name="c"/>',
+                "Links ['b', 'c'] are in a cycle",
+            ),
+        ],
+    )
+    def test_problems(self, joints: str, links: str | None, problem: str | None) -> None:
+        problems = _problems(joints) if links is None else _problems(joints, links)
+        if problem is None:
+            assert problems == []
+        else:
+            assert any(problem in p for p in problems), problems
+
+    def test_in_process_mode(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        def no_check_urdf(urdf_path: Path) -> str:
+            raise AssertionError("check_urdf shouldn't run in in_process mode")
+
+        monkeypatch.setattr(urdf_obj, "_run_check_urdf", no_check_urdf)
+        monkeypatch.setattr(urdf_obj, "_global_check_urdf_enabled", True)
+        set_check_urdf_mode("in_process")
+        try:
+            dir = Path(__file__).parent
+            rod_urdf = ExplicitURDFObj(dir / "rod.urdf")
+            write_and_check_urdf(rod_urdf, tmp_path / "rod.urdf")
+
+            broken_urdf = URDFObj(
+                ET.ElementTree(ET.fromstring('<robot name="r"><link name="a"/><link name="a"/></robot>'))
+            )
+            with pytest.raises(CheckURDFFailure, match="link a is not unique"):
+                write_and_check_urdf(broken_urdf, tmp_path / "broken.urdf")
+        finally:
+            set_check_urdf_mode("subprocess")
+
+    def test_write_and_check_many(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(urdf_obj, "_global_check_urdf_enabled", True)
+        set_check_urdf_mode("in_process")
+        try:
+            rod_urdf = ExplicitURDFObj(Path(__file__).parent / "rod.urdf")
+            broken_urdf = URDFObj(
+                ET.ElementTree(ET.fromstring('<robot name="r"><link name="a"/><link name="a"/></robot>'))
+            )
+            items = [(broken_urdf if i % 3 == 0 else rod_urdf, tmp_path / "out" / f"{i}.urdf") for i in range(10)]
+
+            results = write_and_check_many(items, max_workers=4)
+            async_results = asyncio.run(write_and_check_many_async(items, max_concurrency=4))
+            for i, (result, async_result) in enumerate(zip(results, async_results, strict=True)):
+                assert (result is not None) == (async_result is not None) == (i % 3 == 0)
+            assert len(list((tmp_path / "out").iterdir())) == 10
+        finally:
+            set_check_urdf_mode("subprocess")
@@ -0,0 +1,73 @@
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from urdf_compose import (
+    ExplicitURDFObj,
+    URDFConn,
+    branch,
+    get_xml_backend,
+    lazy_sequence,
+    raise_if_compose_error,
+    sequence,
+    set_xml_backend,
+    xml_backend,
+)
+
+requires_lxml = pytest.mark.skipif(not xml_backend.lxml_available(), reason="lxml is not installed")
+
+
+@pytest.fixture(autouse=True)
+def restore_xml_backend() -> Iterator[None]:
+    backend = get_xml_backend()
+    yield
+    set_xml_backend(backend)
+
+
+def composed_bytes(backend: xml_backend.XMLBackend) -> list[bytes]:
+    set_xml_backend(backend)
+    dir = Path(__file__).parent
+    board = ExplicitURDFObj(dir / "board.urdf", check=False, use_cache=False)
+    rods = [ExplicitURDFObj(dir / "rod.urdf", check=False, use_cache=False) for _ in range(3)]
+    extenders = [ExplicitURDFObj(dir / "extender.urdf", check=False, use_cache=False) for _ in range(2)]
+    urdfs = [
+        sequence(*rods),
+        sequence(*extenders),
+        branch(board, [(rods[0], URDFConn("board-1")), (sequence(rods[1], rods[2]), URDFConn("board-2"))]),
+        lazy_sequence(*rods),
+    ]
+    return [raise_if_compose_error(urdf).to_bytes() for urdf in urdfs]
+
+
+@requires_lxml
+class TestXMLBackend:
+    def test_backends_write_the_same_bytes(self) -> None:
+        assert composed_bytes("lxml") == composed_bytes("etree")
+
+    def test_tostring_matches_etree(self) -> None:
+        root = ET.fromstring(
+            '<robot name="r"><link name="a" /><material name="b"><color rgba="1 0 0 1" /></material></robot>'
+        )
+        lxml_root = xml_backend.copy_element(root, "lxml")
+        assert xml_backend.is_lxml(lxml_root)
+        assert xml_backend.tostring(lxml_root) == ET.tostring(root, encoding="utf-8")
+        for r in (root, lxml_root):
+            r[0].text = "carriage\rreturn"
+            r[0].tail = "\n  "
+            r[1].set("note", 'tab\tnewline\n<&>"')
+        assert xml_backend.tostring(lxml_root) == ET.tostring(root, encoding="utf-8")
+        for el, lxml_el in zip(root, lxml_root):
+            assert xml_backend.tostring(lxml_el) == ET.tostring(el, encoding="utf-8")
+
+    def test_mixed_backends_compose(self) -> None:
+        dir = Path(__file__).parent
+        set_xml_backend("etree")
+        rod = ExplicitURDFObj(dir / "rod.urdf", check=False, use_cache=False)
+        composed = raise_if_compose_error(sequence(rod, rod))
+        set_xml_backend("lxml")
+        hoop = ExplicitURDFObj(dir / "hoop.urdf", check=False, use_cache=False)
+        mixed = raise_if_compose_error(sequence(composed, hoop))
+        set_xml_backend("etree")
+        assert mixed.to_bytes() == raise_if_compose_error(sequence(composed, hoop)).to_bytes()
@@ -1,9 +1,17 @@
+from urdf_compose.build import OutputResult, build_spec
+from urdf_compose.builder import ComposedURDFBuilder
+from urdf_compose.check_cache import CheckCacheInfo
 from urdf_compose.compose import (
+    ConnectionCheck,
     URDFObjChild,
     URDFObjOrError,
     branch,
+    can_connect,
+    connection_error,
     raise_if_compose_error,
     sequence,
+    write_and_check_many,
+    write_and_check_many_async,
     write_and_check_urdf,
 )
 from urdf_compose.composed_urdf import (
@@ -12,15 +20,41 @@ from urdf_compose.composed_urdf import (
     RepeatedURDFError,
     UnaccountedForURDFError,
     URDFConn,
+    reset_name_table,
 )
+from urdf_compose.composition_cache import CompositionCache, CompositionCacheInfo
+from urdf_compose.configurations import (
+    ConfigurationResult,
+    enumerate_configurations,
+    generate_configurations,
+    sequence_slots,
+)
+from urdf_compose.instrumentation import Instrumentation, instrument
+from urdf_compose.memory import ComponentMemory, MemoryReport, memory_report
+from urdf_compose.parse_cache import (
+    ParseCacheInfo,
+    clear_parse_cache,
+    parse_cache_info,
+    set_parse_cache_maxsize,
+)
+from urdf_compose.plan import CompositionPlan, lazy_branch, lazy_sequence
+from urdf_compose.spec import AssemblySpec, SpecError, load_spec
 from urdf_compose.urdf_compose_error import URDFComposeError
 from urdf_compose.urdf_obj import (
     CheckURDFFailure,
+    CheckURDFMode,
     ExplicitURDFObj,
     URDFObj,
+    check_urdf_cache_info,
+    check_urdf_obj,
+    clear_check_urdf_cache,
+    disable_check_urdf_cache,
+    enable_check_urdf_cache,
     globally_disable_check_urdf,
     globally_enable_check_urdf,
+    set_check_urdf_mode,
 )
+from urdf_compose.xml_backend import XMLBackend, get_xml_backend, set_xml_backend
 
 __version__ = "0.4.1"
 
@@ -32,14 +66,55 @@ __all__ = [
     "branch",
     "sequence",
     "ComposedURDFObj",
+    "ComposedURDFBuilder",
     "ComposedURDFNameMap",
+    "reset_name_table",
     "URDFObjChild",
     "URDFComposeError",
     "RepeatedURDFError",
     "UnaccountedForURDFError",
     "CheckURDFFailure",
     "write_and_check_urdf",
+    "write_and_check_many",
+    "write_and_check_many_async",
     "raise_if_compose_error",
     "globally_disable_check_urdf",
     "globally_enable_check_urdf",
+    "ParseCacheInfo",
+    "parse_cache_info",
+    "clear_parse_cache",
+    "set_parse_cache_maxsize",
+    "CheckCacheInfo",
+    "enable_check_urdf_cache",
+    "disable_check_urdf_cache",
+    "clear_check_urdf_cache",
+    "check_urdf_cache_info",
+    "CheckURDFMode",
+    "set_check_urdf_mode",
+    "check_urdf_obj",
+    "ConfigurationResult",
+    "enumerate_configurations",
+    "generate_configurations",
+    "sequence_slots",
+    "CompositionCache",
+    "CompositionCacheInfo",
+    "AssemblySpec",
+    "SpecError",
+    "load_spec",
+    "OutputResult",
+    "build_spec",
+    "CompositionPlan",
+    "lazy_sequence",
+    "lazy_branch",
+    "XMLBackend",
+    "get_xml_backend",
+    "set_xml_backend",
+    "Instrumentation",
+    "instrument",
+    "ComponentMemory",
+    "MemoryReport",
+    "memory_report",
+    "ConnectionCheck",
+    "can_connect",
+    "connection_error",
 ]
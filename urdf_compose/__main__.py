@@ -0,0 +1,5 @@
+import sys
+
+from urdf_compose.cli import main
+
+sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Incremental builds of assembly specs (see spec.py), which only recompose and recheck
+the outputs whose inputs changed since the last build
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import urdf_compose
+from urdf_compose.compose import write_and_check_urdf
+from urdf_compose.spec import (
+    AssemblySpec,
+    compose_expression,
+    expression_components,
+    load_spec,
+)
+from urdf_compose.urdf_compose_error import URDFComposeError
+from urdf_compose.urdf_obj import CheckURDFSettings, get_check_urdf_settings
+from urdf_compose.workers import init_worker, load_component
+
+MANIFEST_VERSION = 1
+
+
+def default_manifest_path(spec_path: Path) -> Path:
+    return spec_path.with_name(f".{spec_path.name}.manifest.json")
+
+
+@dataclass(frozen=True)
+class OutputResult:
+    output: Path
+    # Whether the output was up to date, and so wasn't rebuilt
+    up_to_date: bool
+    error: str | None
+    seconds: float
+
+
+@dataclass(frozen=True)
+class _OutputTask:
+    output: Path
+    expression: Any
+    components: dict[str, Path]
+
+
+def _file_hash(path: Path) -> str | None:
+    try:
+        return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _inputs_hash(expression: Any, component_hashes: Mapping[str, str | None], settings: CheckURDFSettings) -> str:
+    """
+    A hash of everything an output is built from: its expression, the contents of its
+    components, how it is checked, and the version of urdf_compose
+    """
+    inputs = {
+        "urdf_compose": urdf_compose.__version__,
+        "expression": expression,
+        "components": {name: component_hashes[name] for name in sorted(expression_components(expression))},
+        "check": [settings.enabled, settings.mode],
+    }
+    return hashlib.blake2b(json.dumps(inputs, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def _read_manifest(manifest_path: Path) -> dict[str, dict[str, Any]]:
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    outputs = manifest.get("outputs", {})
+    return outputs if isinstance(outputs, dict) else {}
+
+
+def _manifest_key(output: Path, manifest_path: Path) -> str:
+    # Relative to the manifest, so the manifest stays valid if the whole tree is moved
+    return Path(os.path.relpath(output.resolve(), manifest_path.parent.resolve())).as_posix()
+
+
+def _write_manifest(manifest_path: Path, outputs: Mapping[str, dict[str, Any]]) -> None:
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "outputs": outputs}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def _build_output(task: _OutputTask) -> tuple[str | None, float]:
+    start = time.perf_counter()
+    try:
+        components = {name: load_component(path, check=True) for name, path in task.components.items()}
+        urdf = compose_expression(task.expression, components)
+        if isinstance(urdf, URDFComposeError):
+            error: str | None = f"{type(urdf).__name__}: {urdf}"
+        else:
+            write_and_check_urdf(urdf, task.output)
+            error = None
+    except Exception as e:
+        # Kept as the output's error, so the other outputs are still built
+        error = f"{type(e).__name__}: {e}"
+    return error, time.perf_counter() - start
+
+
+def build_spec(
+    spec: Path | AssemblySpec,
+    manifest_path: Path | None = None,
+    jobs: int | None = None,
+    force: bool = False,
+) -> list[OutputResult]:
+    """
+    Build the outputs of an assembly spec, skipping those that are up to date
+
+    An output is up to date if its expression, the contents of its components and the
+    check_urdf settings are the same as when it was last successfully built, and the output
+    file hasn't changed since. This is tracked in a manifest file, by default next to the spec.
+
+    Outputs are built with up to jobs (default: the number of cpus) processes.
+    Returns the result of every output, rather than raising on the first error.
+    """
+    if not isinstance(spec, AssemblySpec):
+        if manifest_path is None:
+            manifest_path = default_manifest_path(Path(spec))
+        spec = load_spec(Path(spec))
+    elif manifest_path is None:
+        raise ValueError("manifest_path is required when building an already loaded spec")
+
+    settings = get_check_urdf_settings()
+    component_hashes = {name: _file_hash(path) for name, path in spec.components.items()}
+    previous_outputs = {} if force else _read_manifest(manifest_path)
+    outputs = dict[str, dict[str, Any]]()
+    results = dict[Path, OutputResult]()
+    tasks = list[_OutputTask]()
+    for output, expression in spec.outputs.items():
+        inputs_hash = _inputs_hash(expression, component_hashes, settings)
+        key = _manifest_key(output, manifest_path)
+        previous = previous_outputs.get(key, {})
+        if (
+            previous.get("inputs") == inputs_hash
+            and previous.get("error") is None
+            and previous.get("output") == _file_hash(output)
+        ):
+            outputs[key] = previous
+            results[output] = OutputResult(output, True, None, 0)
+        else:
+            outputs[key] = {"inputs": inputs_hash}
+            names = expression_components(expression)
+            tasks.append(_OutputTask(output, expression, {name: spec.components[name] for name in names}))
+
+    if len(tasks) > 0:
+        with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(settings,)) as executor:
+            for task, (error, seconds) in zip(tasks, executor.map(_build_output, tasks), strict=True):
+                results[task.output] = OutputResult(task.output, False, error, seconds)
+                outputs[_manifest_key(task.output, manifest_path)].update(
+                    error=error, output=None if error is not None else _file_hash(task.output), seconds=seconds
+                )
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_manifest(manifest_path, outputs)
+    return [results[output] for output in spec.outputs]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing_extensions import Self
+
+from urdf_compose.composed_urdf import ComposedURDFNameMap, ComposedURDFObj, URDFConn
+from urdf_compose.connect import absorb_in_place, prepend_in_place
+from urdf_compose.resolve_connections import URDFDefConn, resolve_conn
+from urdf_compose.urdf_compose_error import URDFComposeError
+from urdf_compose.urdf_obj import URDFObj
+
+# A urdf attached to the base, followed by the urdfs appended after it, with the connection
+#   of each to the urdf before it (which is already resolved if it was attached with one)
+_Chain = list[tuple[URDFObj | URDFComposeError, URDFConn | URDFDefConn]]
+
+
+def _resolve_conn(
+    base_urdf: URDFObj, extender_urdf: URDFObj, conn: URDFConn | URDFDefConn
+) -> URDFDefConn | URDFComposeError:
+    return conn if isinstance(conn, URDFDefConn) else resolve_conn(base_urdf, extender_urdf, conn)
+
+
+def _compose_chain(chain: _Chain) -> ComposedURDFObj | URDFComposeError:
+    """
+    Compose the urdfs of a chain (but not its connection to the base), as `sequence` of them would,
+    with each urdf a component of its own in the name map
+    """
+    for urdf, _ in chain:
+        if isinstance(urdf, URDFComposeError):
+            return urdf
+    urdfs = [ComposedURDFObj.wrap(urdf) for urdf, _ in chain if not isinstance(urdf, URDFComposeError)]
+
+    # Connected from the end, with each urdf prepended to the ones after it, so that every
+    #   name is handed out as it is when nesting sequences, ex: sequence(a, sequence(b, c))
+    composed_urdf = ComposedURDFObj.construct(urdfs[-1])
+    for i in range(len(chain) - 2, -1, -1):
+        urdf, (_, conn) = chain[i][0], chain[i + 1]
+        assert not isinstance(urdf, URDFComposeError)
+        def_conn = _resolve_conn(urdf, composed_urdf, conn)
+        if isinstance(def_conn, URDFComposeError):
+            return def_conn
+        connection_issue = prepend_in_place(ComposedURDFObj.construct(urdfs[i]), composed_urdf, def_conn)
+        if connection_issue is not None:
+            return connection_issue
+
+    # Each urdf was added to the name map after the ones following it
+    name_map = ComposedURDFNameMap()
+    name_map._extend(composed_urdf.name_map, reversed(range(len(urdfs))))
+    composed_urdf.name_map = name_map
+    return composed_urdf
+
+
+class ComposedURDFBuilder:
+    """
+    Builds up a composed urdf from a base urdf, urdfs attached to it, and urdfs appended after them
+
+    ```python
+    composed_urdf = ComposedURDFBuilder(board).attach(rod, URDFConn("board-1")).append(hoop).build()
+    ```
+
+    builds the same urdf, with the same names, as
+    `branch(board, [(sequence(rod, hoop), URDFConn("board-1"))])`. Unlike nesting `sequence`
+    and `branch`, which copy every composed urdf they connect, each urdf is only copied once,
+    so building an assembly of N urdfs is linear rather than quadratic in N.
+
+    Urdfs are only recorded as they are added, and are composed by `build`. Like `branch` and
+    `sequence`, errors are not raised: `build` returns the first error, in the order they
+    would.
+    """
+
+    __slots__ = ("_base", "_chains")
+
+    def __init__(self, base: URDFObj | URDFComposeError) -> None:
+        self._base = base
+        self._chains = list[_Chain]()
+
+    def attach(self, child: URDFObj | URDFComposeError, conn: URDFConn | URDFDefConn | None = None) -> Self:
+        """
+        Connect child to an output of the base urdf, the same way `branch` connects its children
+
+        If conn is not given, the default output and input links are used. It can also be an
+        already resolved connection, naming the links of the base urdf and child themselves
+        """
+        self._chains.append([(child, URDFConn() if conn is None else conn)])
+        return self
+
+    def append(self, child: URDFObj | URDFComposeError, conn: URDFConn | None = None) -> Self:
+        """
+        Connect child to an output of the most recently added urdf (or of the base urdf, if none
+        have been added), the same way `sequence` connects each urdf to the previous one
+
+        If conn is not given, the default output and input links are used
+        """
+        if len(self._chains) == 0:
+            return self.attach(child, conn)
+        self._chains[-1].append((child, URDFConn() if conn is None else conn))
+        return self
+
+    def copy(self) -> ComposedURDFBuilder:
+        """
+        A builder with the urdfs added to this one so far, so the two can be continued separately
+        """
+        builder = ComposedURDFBuilder(self._base)
+        builder._chains = [list(chain) for chain in self._chains]
+        return builder
+
+    def build(self) -> ComposedURDFObj | URDFComposeError:
+        """
+        Compose the urdf, or get the first error encountered while composing it
+        """
+        return self._build(None, 0)
+
+    def build_from(self, built: ComposedURDFObj, num_chains: int) -> ComposedURDFObj | URDFComposeError:
+        """
+        Like build, given what build returned when only the urdfs up to the num_chains-th
+        attached one (and those appended after it) had been added, so only the urdfs added
+        since then are composed, onto a copy of built
+        """
+        return self._build(built, num_chains)
+
+    def _build(self, built: ComposedURDFObj | None, num_built: int) -> ComposedURDFObj | URDFComposeError:
+        if isinstance(self._base, URDFComposeError):
+            return self._base
+        chains = self._chains[num_built:]
+        composed_chains = list[ComposedURDFObj]()
+        for chain in chains:
+            composed_chain = _compose_chain(chain)
+            if isinstance(composed_chain, URDFComposeError):
+                return composed_chain
+            composed_chains.append(composed_chain)
+
+        # Every chain is connected to the base as it is before any of them are connected
+        def_conns = []
+        for chain, composed_chain in zip(chains, composed_chains):
+            def_conn = _resolve_conn(self._base, composed_chain, chain[0][1])
+            if isinstance(def_conn, URDFComposeError):
+                return def_conn
+            def_conns.append(def_conn)
+
+        composed_urdf = ComposedURDFObj.construct(self._base) if built is None else built.copy()
+        for composed_chain, def_conn in zip(composed_chains, def_conns):
+            connection_issue = absorb_in_place(composed_urdf, composed_chain, def_conn)
+            if connection_issue is not None:
+                return connection_issue
+        return composed_urdf
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+
+class CheckCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_entries: int
+    currsize: int
+
+
+def default_check_cache_dir() -> Path:
+    """
+    $XDG_CACHE_HOME/urdf_compose/check_urdf, or ~/.cache/urdf_compose/check_urdf
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    return (Path(cache_home) if cache_home else Path.home() / ".cache") / "urdf_compose" / "check_urdf"
+
+
+def check_urdf_version() -> str | None:
+    """
+    Identifies the installed check_urdf, so results are not reused after it changes
+    None if check_urdf can't be found
+    """
+    tool_path = shutil.which("check_urdf")
+    if tool_path is None:
+        return None
+    resolved_tool_path = Path(tool_path).resolve()
+    stat = os.stat(resolved_tool_path)
+    return f"{resolved_tool_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class CheckURDFCache:
+    """
+    An on disk store of check_urdf results, keyed by a hash of the checked file's contents
+    and the check_urdf version, so that it can be shared across runs and processes
+
+    Each result is a file in directory: empty if the check passed, or the check_urdf
+    error output if it failed. When there are more than max_entries results, the least
+    recently used ones are evicted, down to nine tenths of max_entries, so the directory is
+    only listed again after that many more results are added.
+    """
+
+    def __init__(self, directory: Path, max_entries: int) -> None:
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        # About how many results are in directory (other processes may add or evict some), so
+        #   it is only listed when there may be too many. None until it is first listed
+        self._num_entries: int | None = None
+
+    @staticmethod
+    def key(urdf_path: Path, version: str) -> str:
+        digest = hashlib.blake2b(version.encode(), digest_size=20)
+        digest.update(b"\0")
+        digest.update(Path(urdf_path).read_bytes())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.result"
+
+    def get(self, key: str) -> str | None:
+        """
+        The cached error output for key ("" if the check passed), or None if it isn't cached
+        """
+        entry_path = self._entry_path(key)
+        try:
+            result = entry_path.read_text(encoding="utf-8")
+            # Mark as recently used
+            os.utime(entry_path)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return result
+
+    def put(self, key: str, result: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so other processes never see a partially written result
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(result)
+        os.replace(tmp_path, self._entry_path(key))
+        if self._num_entries is None:
+            self._num_entries = len(self._entries())
+        else:
+            self._num_entries += 1
+        if self._num_entries > self.max_entries:
+            self.evict()
+
+    def _entries(self) -> list[os.DirEntry[str]]:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".result")]
+        except FileNotFoundError:
+            return []
+
+    def evict(self) -> None:
+        """
+        If there are more than max_entries results, remove the least recently used ones until
+        there are nine tenths of max_entries
+        """
+        entries = self._entries()
+        self._num_entries = len(entries)
+        if len(entries) <= self.max_entries:
+            return
+
+        def last_used(entry: os.DirEntry[str]) -> float:
+            try:
+                return entry.stat().st_mtime
+            except FileNotFoundError:
+                return 0
+
+        entries.sort(key=last_used)
+        num_kept = self.max_entries - self.max_entries // 10
+        for entry in entries[: len(entries) - num_kept]:
+            # Another process may have evicted it already
+            Path(entry.path).unlink(missing_ok=True)
+        self._num_entries = num_kept
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            Path(entry.path).unlink(missing_ok=True)
+        self._num_entries = 0
+        self._hits = 0
+        self._misses = 0
+
+    def info(self) -> CheckCacheInfo:
+        return CheckCacheInfo(self._hits, self._misses, self.max_entries, len(self._entries()))
@@ -0,0 +1,62 @@
+import argparse
+import sys
+from pathlib import Path
+
+from urdf_compose.build import build_spec, default_manifest_path
+from urdf_compose.spec import SpecError
+from urdf_compose.urdf_obj import (
+    enable_check_urdf_cache,
+    globally_disable_check_urdf,
+    set_check_urdf_mode,
+)
+
+
+def _build(args: argparse.Namespace) -> int:
+    if args.no_check:
+        globally_disable_check_urdf()
+    set_check_urdf_mode(args.check_mode)
+    if args.check_cache:
+        enable_check_urdf_cache()
+
+    try:
+        results = build_spec(args.spec, args.manifest or default_manifest_path(args.spec), args.jobs, args.force)
+    except SpecError as e:
+        sys.stderr.write(f"Invalid spec: {e}\n")
+        return 2
+
+    num_failed = 0
+    for result in results:
+        if result.error is not None:
+            num_failed += 1
+            sys.stderr.write(f"FAILED {result.output}\n{result.error}\n")
+        elif not result.up_to_date:
+            sys.stdout.write(f"built {result.output} ({result.seconds:.2f}s)\n")
+    num_up_to_date = sum(result.up_to_date for result in results)
+    sys.stdout.write(
+        f"{len(results) - num_up_to_date - num_failed} built, {num_up_to_date} up to date, {num_failed} failed\n"
+    )
+    return 1 if num_failed > 0 else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="urdf-compose", description="Compose urdfs")
+    subparsers = parser.add_subparsers(required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Build the outputs of a JSON or TOML assembly spec whose inputs changed"
+    )
+    build_parser.add_argument("spec", type=Path)
+    build_parser.add_argument("-j", "--jobs", type=int, default=None, help="Default: the number of cpus")
+    build_parser.add_argument("--manifest", type=Path, default=None, help="Default: .<spec>.manifest.json")
+    build_parser.add_argument("--force", action="store_true", help="Rebuild every output")
+    build_parser.add_argument("--no-check", action="store_true", help="Don't check the urdfs")
+    build_parser.add_argument("--check-mode", choices=["subprocess", "in_process"], default="subprocess")
+    build_parser.add_argument("--check-cache", action="store_true", help="Cache check_urdf results on disk")
+    build_parser.set_defaults(command=_build)
+
+    args = parser.parse_args(argv)
+    return int(args.command(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,28 @@
+import asyncio
+import os
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import TypeAlias, TypeVar
+from typing import Literal, TypeAlias, TypeVar
 
+from urdf_compose.builder import ComposedURDFBuilder
 from urdf_compose.composed_urdf import ComposedURDFObj, URDFConn
-from urdf_compose.connect import connect
-from urdf_compose.resolve_connections import URDFDefConn, resolve_conn
+from urdf_compose.connect import check_for_connection_issue, connection_issue
+from urdf_compose.instrumentation import phase
+from urdf_compose.resolve_connections import (
+    ConnectionIssue,
+    URDFDefConn,
+    resolve_conn,
+    resolve_conn_issue,
+)
 from urdf_compose.urdf_compose_error import URDFComposeError
-from urdf_compose.urdf_obj import CheckURDFFailure, URDFObj, check_urdf  # noqa
+from urdf_compose.urdf_obj import (  # noqa
+    CheckURDFFailure,
+    URDFObj,
+    check_urdf,
+    check_urdf_obj,
+    get_check_urdf_mode,
+)
 
 
 def general_urdf_append(
@@ -14,20 +30,17 @@ def general_urdf_append(
     children: list[tuple[URDFObj, URDFDefConn]],
     use_name_map: bool,
 ) -> ComposedURDFObj | URDFComposeError:
-    prev_name_map = None
-    new_urdf = ComposedURDFObj.construct(base_urdf)
-    for extender_urdf, conn in children:
-        if prev_name_map is not None:
-            conn = URDFDefConn(
-                prev_name_map[conn.base_link] if use_name_map else conn.base_link,
-                conn.extender_link,
-            )
+    """
+    Connects each child to base_urdf with its resolved connection
 
-        connection_result = connect(new_urdf, extender_urdf, conn)
-        if isinstance(connection_result, URDFComposeError):
-            return connection_result
-        new_urdf = connection_result
-    return new_urdf
+    Kept for compatibility, as ComposedURDFBuilder does the same: like branch, each child is a
+    component of its own in the name map. use_name_map has no effect, as connections are
+    always to base_urdf
+    """
+    builder = ComposedURDFBuilder(base_urdf)
+    for extender_urdf, conn in children:
+        builder.attach(extender_urdf, conn)
+    return builder.build()
 
 
 URDFObjOrError = URDFObj | URDFComposeError
@@ -70,34 +83,49 @@ def branch(urdf: URDFObjOrError, children: Iterable[URDFObjChild]) -> ComposedUR
     Returns any errors encountered during composition, or if any of the inputs
     have an error instead of a urdf object.
     """
-    fixed_children = [fix_urdf_obj_child(c) for c in children]
-    real_children = []
-    if isinstance(urdf, URDFComposeError):
-        return urdf
-    for fixed_child in fixed_children:
-        if isinstance(fixed_child[0], URDFComposeError):
-            return fixed_child[0]
-        # We do a branch here to create a unique composed urdf obj key for each child
-        # This stops name collisions if a user inputs two of the same urdfs to branch
-        real_children.append((wrap_urdf_as_composed(fixed_child[0]), fixed_child[1]))
-
-    children_urdfs = list[tuple[URDFObj, URDFDefConn]]()
-    for obj, conn in real_children:
-        if not isinstance(obj, URDFObj):
-            return obj
-        def_conn = resolve_conn(
-            urdf,
-            obj,
-            conn,
-        )
-        if isinstance(def_conn, URDFComposeError):
-            return def_conn
-        children_urdfs.append((obj, def_conn))
-    return general_urdf_append(urdf, children_urdfs, use_name_map=False)
+    # Each child is wrapped in a composed urdf of its own, so the same urdf can be given twice
+    builder = ComposedURDFBuilder(urdf)
+    for child in children:
+        builder.attach(*fix_urdf_obj_child(child))
+    return builder.build()
+
+
+ConnectionCheck = Literal["ok", ConnectionIssue]
+
+
+@phase("can_connect")
+def can_connect(base: URDFObj, extender: URDFObj, conn: URDFConn | None = None) -> ConnectionCheck:
+    """
+    Whether `branch(base, [(extender, conn)])` would connect extender to base: "ok" if it would,
+    and otherwise what would stop it
+
+    Only the indexes of the urdfs are read: nothing is copied, and no error is built. Use
+    `connection_error` to get the error `branch` would return.
+    """
+    resolved = resolve_conn_issue(base, extender, URDFConn() if conn is None else conn)
+    if not isinstance(resolved, URDFDefConn):
+        return resolved
+    issue = connection_issue(base, extender, resolved)
+    return "ok" if issue is None else issue
+
+
+def connection_error(base: URDFObj, extender: URDFObj, conn: URDFConn | None = None) -> URDFComposeError | None:
+    """
+    The error that stops extender connecting to base (see can_connect), if any, with its details
+    """
+    def_conn = resolve_conn(base, extender, URDFConn() if conn is None else conn)
+    if isinstance(def_conn, URDFComposeError):
+        return def_conn
+    issue = check_for_connection_issue(base, extender, def_conn)
+    if issue is None:
+        return None
+    msg = f"Base URDF: {base}, Extension URDF: {extender}, Connection: {def_conn}"
+    return URDFComposeError(f"[{msg}] {issue}", base, extender)
 
 
 def wrap_urdf_as_composed(urdf: URDFObj) -> ComposedURDFObj:
-    return raise_if_compose_error(branch(urdf, []), None)
+    # A copy, unlike ComposedURDFObj.wrap, so it can be changed without changing urdf
+    return ComposedURDFObj.construct(urdf)
 
 
 def sequence(base: URDFObjOrError, *children: URDFObjChild) -> ComposedURDFObj | URDFComposeError:
@@ -107,20 +135,62 @@ def sequence(base: URDFObjOrError, *children: URDFObjChild) -> ComposedURDFObj |
     Returns any errors encountered during composition, or if any of the inputs
     have an error instead of a urdf object.
     """
-    if len(children) == 0:
-        return wrap_urdf_as_composed(base) if isinstance(base, URDFObj) else base
-    else:
-        child0_urdf, child0_conn = fix_urdf_obj_child(children[0])
-        return branch(base, [(sequence(child0_urdf, *children[1:]), child0_conn)])
+    # Built like sequence(base, sequence(children[0], ...)), without copying the nested urdfs
+    builder = ComposedURDFBuilder(base)
+    for child in children:
+        builder.append(*fix_urdf_obj_child(child))
+    return builder.build()
 
 
-def write_and_check_urdf(urdf: URDFObj, dest: Path) -> None:
+def write_and_check_urdf(urdf: URDFObj, dest: Path, final_check_urdf: bool = False) -> None:
     """
     1. write the urdf to given destination
-    2. check if the urdf is valid
+    2. check if the urdf is valid, according to the check urdf mode (see set_check_urdf_mode)
 
-    Raises a CheckURDFFailure if check urdf fails
+    In "in_process" mode, final_check_urdf also runs check_urdf on the written file
+
+    Raises a CheckURDFFailure if the check fails
     """
     urdf.write_xml(dest)
-    if (error := check_urdf(dest)) is not None:
+    if (error := check_urdf_obj(urdf, dest)) is not None:
+        raise error
+    if final_check_urdf and get_check_urdf_mode() == "in_process" and (error := check_urdf(dest)) is not None:
         raise error
+
+
+def _write_and_check_result(urdf: URDFObj, dest: Path, final_check_urdf: bool) -> CheckURDFFailure | None:
+    try:
+        write_and_check_urdf(urdf, dest, final_check_urdf)
+    except CheckURDFFailure as e:
+        return e
+    return None
+
+
+def write_and_check_many(
+    items: Iterable[tuple[URDFObj, Path]], max_workers: int | None = None, final_check_urdf: bool = False
+) -> list[CheckURDFFailure | None]:
+    """
+    write_and_check_urdf on each (urdf, destination) pair, with up to max_workers
+    (default: the number of cpus) writes and check_urdf processes running at once
+
+    Rather than raising, returns the CheckURDFFailure (or None) of each item, in order
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_write_and_check_result, urdf, dest, final_check_urdf) for urdf, dest in items]
+        return [future.result() for future in futures]
+
+
+async def write_and_check_many_async(
+    items: Iterable[tuple[URDFObj, Path]], max_concurrency: int | None = None, final_check_urdf: bool = False
+) -> list[CheckURDFFailure | None]:
+    """
+    Like write_and_check_many, but awaitable: each item is written and checked in a thread,
+    with up to max_concurrency (default: the number of cpus) at once
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or os.cpu_count() or 1)
+
+    async def write_and_check(urdf: URDFObj, dest: Path) -> CheckURDFFailure | None:
+        async with semaphore:
+            return await asyncio.to_thread(_write_and_check_result, urdf, dest, final_check_urdf)
+
+    return await asyncio.gather(*(write_and_check(urdf, dest) for urdf, dest in items))
@@ -1,22 +1,21 @@
 from __future__ import annotations
 
 import copy
+import itertools
+import threading
 import xml.etree.ElementTree as ET
+from array import array
+from collections.abc import Collection, Container, Iterable, Iterator
 from dataclasses import dataclass
 
 from typing_extensions import Self
 
-import urdf_compose.xml_utils as xml
+from urdf_compose import instrumentation, xml_backend
+from urdf_compose.instrumentation import phase
 from urdf_compose.urdf_compose_error import InteranlURDFComposeError
+from urdf_compose.urdf_index import URDFIndex, make_name
 from urdf_compose.urdf_obj import URDFObj
-from urdf_compose.utils import (
-    NAME_KEY,
-    all_names,
-    find_element_named,
-    get_name,
-    has_name,
-    set_name,
-)
+from urdf_compose.utils import all_names, find_element_named, get_name
 
 
 class UnaccountedForURDFError(RuntimeError):
@@ -34,68 +33,282 @@ class RepeatedURDFError(RuntimeError):
 NameMapLookup = dict[URDFObj, dict[str, str]]
 
 
+class _StringTable:
+    """
+    Interned strings, by id. Append only, and shared by the name maps made while it is the
+    current table (see reset_name_table), so name maps can store and compare names as ints
+    """
+
+    def __init__(self) -> None:
+        self.strings = list[str]()
+        self.ids = dict[str, int]()
+        self._lock = threading.Lock()
+
+    def intern(self, string: str) -> int:
+        string_id = self.ids.get(string)
+        if string_id is None:
+            with self._lock:
+                string_id = self.ids.get(string)
+                if string_id is None:
+                    self.strings.append(string)
+                    string_id = self.ids[string] = len(self.strings) - 1
+        return string_id
+
+    def ids_of(self, table: _StringTable, string_ids: Iterable[int]) -> Iterable[int]:
+        # The ids in this table of the strings with string_ids in table
+        if table is self:
+            return string_ids
+        strings = table.strings
+        return [self.intern(strings[string_id]) for string_id in string_ids]
+
+    def offsets_of(self, table: _StringTable, offsets: dict[int, int]) -> dict[int, int]:
+        # Name map offsets (see ComposedURDFNameMap._component_offsets) keyed by ids in table,
+        #   keyed by ids in this table instead
+        if table is self:
+            return offsets
+        return dict(zip(self.ids_of(table, offsets), offsets.values()))
+
+
+_name_table = _StringTable()
+
+
+def reset_name_table() -> None:
+    """
+    Intern the names of the name maps made from now on in a new table
+
+    Name maps keep names as ids into the table that was current when they were made (copies
+    and collapsed name maps keep the table of the name map they are made from), and a table
+    only grows. Resetting it, ex: after clearing a CompositionCache, lets the old table be
+    freed along with the last name map using it. Name maps of different tables can still be
+    composed together, their names are then looked up in each other's tables.
+    """
+    global _name_table
+    _name_table = _StringTable()
+
+
+# An occurrence of a urdf in a name map: the (name map, component id) of each composed
+#   component it is nested in, from the outermost, followed by its own
+_Occurrence = tuple[tuple["ComposedURDFNameMap", int], ...]
+
+
+# The containers of a name map that are shared by its copies (see ComposedURDFNameMap._own),
+#   besides its new name index, which are all changed when components are added
+_STRUCTURE_CONTAINERS = (
+    "_components",
+    "_component_ids",
+    "_component_offsets",
+    "_component_starts",
+    "_entry_components",
+    "_entry_og_names",
+    "_entry_names",
+    "_component_maps",
+)
+_CONTAINERS = _STRUCTURE_CONTAINERS + ("_name_entries",)
+
+
 class ComposedURDFNameMap:
     """
     An object to lookup the new names of links after composition occurs
+
+    Each name of each component urdf has an entry in parallel arrays: the id of the component,
+    and the (interned) name in the component (its original name) and in the composed urdf
+    (its new name). The entries of a component are contiguous, and the offset of each original
+    name's entry is shared by every name map with the component, so copying a name map copies
+    the arrays and the index of new names, rather than a dict per component.
+
+    A composed component keeps (a copy of) its name map, which is all of its provenance: what it
+    is composed of, at any depth, and with which names. Nothing is copied out of it, so adding a
+    composed component is O(1) however deep it is. Collapsing selects occurrences by walking
+    these name maps, and only follows the names of the occurrences it selects up to this map,
+    rather than collapsing and transforming the name map of every composed component.
+
+    Copies share these containers until one of them changes a container, which it copies first,
+    so a copy only allocates the containers it changes.
     """
 
+    __slots__ = _CONTAINERS + ("_table", "_shared")
+
     def __init__(
         self,
-        name_map_lookup: NameMapLookup,
-        name_to_urdf_and_og_name: dict[str, tuple[URDFObj, str]],
+        name_map_lookup: NameMapLookup | None = None,
+        name_to_urdf_and_og_name: dict[str, tuple[URDFObj, str]] | None = None,
     ) -> None:
-        self.name_map_lookup = name_map_lookup
-        # Name map lookup: goes from a urdf object, to a name map, #
-        # where the name map maps original name to new name
-        self.name_to_urdf_and_og_name = name_to_urdf_and_og_name
-        # Maps name in composed urdf to the original urdf and name it comes from
-        # Values are a list b/c materials can map to multiple sources
+        # The table every name id of this map is in
+        self._table = _name_table
+        self._components = list[URDFObj]()
+        self._component_ids = dict[URDFObj, int]()
+        # Per component: original name id -> offset of its entry from the component's first entry
+        #   These are never changed, so they are shared rather than copied
+        self._component_offsets = list[dict[int, int]]()
+        self._component_starts = array("q")
+        self._entry_components = array("q")
+        self._entry_og_names = array("q")
+        self._entry_names = array("q")
+        # New name id -> entry, for the names that are in the composed urdf
+        #   (an element can be removed from it, but its name still looked up, see _remove)
+        self._name_entries = dict[int, int]()
+        # Per component: the name map of the component if it is composed, as it was when added
+        self._component_maps = list[ComposedURDFNameMap | None]()
+        # The containers shared with a copy of this map
+        self._shared = set[str]()
+
+        for urdf, name_map in (name_map_lookup or {}).items():
+            self._add_named_component(urdf, name_map.items())
+        for name, (urdf, og_name) in (name_to_urdf_and_og_name or {}).items():
+            if (entry := self._entry(urdf, og_name)) is not None:
+                self._name_entries[self._table.intern(name)] = entry
+
+    @property
+    def name_map_lookup(self) -> NameMapLookup:
+        """
+        Goes from a urdf object, to a name map, where the name map maps original name to new name
+        (built on access, so changing it doesn't change this name map)
+        """
+        strings = self._table.strings
+        return {
+            urdf: {
+                strings[og_name_id]: strings[self._entry_names[self._component_starts[component_id] + offset]]
+                for og_name_id, offset in self._component_offsets[component_id].items()
+            }
+            for component_id, urdf in enumerate(self._components)
+        }
+
+    @property
+    def name_to_urdf_and_og_name(self) -> dict[str, tuple[URDFObj, str]]:
+        """
+        Maps name in composed urdf to the original urdf and name it comes from
+        (built on access, so changing it doesn't change this name map)
+        """
+        strings = self._table.strings
+        return {
+            strings[name_id]: (self._components[self._entry_components[entry]], strings[self._entry_og_names[entry]])
+            for name_id, entry in self._name_entries.items()
+        }
+
+    def __reduce__(self) -> tuple[type[ComposedURDFNameMap], tuple[NameMapLookup, dict[str, tuple[URDFObj, str]]]]:
+        # String ids are only meaningful in this process, so pickle the names themselves
+        return ComposedURDFNameMap, (self.name_map_lookup, self.name_to_urdf_and_og_name)
+
+    def _add_named_component(self, urdf: URDFObj, og_and_new_names: Iterable[tuple[str, str]]) -> int:
+        offsets = dict[int, int]()
+        name_ids = list[int]()
+        for og_name, name in og_and_new_names:
+            offsets[self._table.intern(og_name)] = len(offsets)
+            name_ids.append(self._table.intern(name))
+        return self._add_component(urdf, offsets, name_ids)
+
+    def _add_component(self, urdf: URDFObj, offsets: dict[int, int], name_ids: Iterable[int]) -> int:
+        # name_ids are the new names of the original names in offsets, in order (both in this
+        #   map's table)
+        self._own(*_STRUCTURE_CONTAINERS)
+        component_id = len(self._components)
+        start = len(self._entry_names)
+        self._entry_og_names.extend(offsets)
+        self._entry_names.extend(name_ids)
+        self._entry_components.extend(itertools.repeat(component_id, len(offsets)))
+        self._components.append(urdf)
+        self._component_ids[urdf] = component_id
+        self._component_offsets.append(offsets)
+        self._component_starts.append(start)
+        self._component_maps.append(urdf.name_map.copy() if isinstance(urdf, ComposedURDFObj) else None)
+        return component_id
+
+    def _extend(self, other_map: ComposedURDFNameMap, component_ids: Iterable[int] | None = None) -> None:
+        # Add the components of other_map (by default, all of them) to this map, with their names
+        self._own(*_CONTAINERS)
+        table, other_table = self._table, other_map._table
+        new_starts = dict[int, int]()
+        for component_id in range(len(other_map._components)) if component_ids is None else component_ids:
+            new_component_id = len(self._components)
+            start = other_map._component_starts[component_id]
+            end = start + len(other_map._component_offsets[component_id])
+            new_starts[component_id] = new_start = len(self._entry_names)
+            self._entry_components.extend(itertools.repeat(new_component_id, end - start))
+            self._entry_og_names.extend(table.ids_of(other_table, other_map._entry_og_names[start:end]))
+            self._entry_names.extend(table.ids_of(other_table, other_map._entry_names[start:end]))
+            self._components.append(other_map._components[component_id])
+            self._component_ids[other_map._components[component_id]] = new_component_id
+            self._component_offsets.append(table.offsets_of(other_table, other_map._component_offsets[component_id]))
+            self._component_starts.append(new_start)
+            self._component_maps.append(other_map._component_maps[component_id])
+
+        for name_id, entry in other_map._name_entries.items():
+            component_id = other_map._entry_components[entry]
+            if component_id in new_starts:
+                if other_table is not table:
+                    name_id = table.intern(other_table.strings[name_id])
+                self._name_entries[name_id] = (
+                    new_starts[component_id] + entry - other_map._component_starts[component_id]
+                )
+
+    def _entry(self, urdf: URDFObj, og_name: str) -> int | None:
+        component_id = self._component_ids.get(urdf)
+        og_name_id = self._table.ids.get(og_name)
+        if component_id is None or og_name_id is None:
+            return None
+        offset = self._component_offsets[component_id].get(og_name_id)
+        return None if offset is None else self._component_starts[component_id] + offset
 
     def copy(self) -> ComposedURDFNameMap:
-        new_name_map_lookup = {urdf_obj: copy.deepcopy(map) for urdf_obj, map in self.name_map_lookup.items()}
-        new_name_to_urdf_and_og_name = copy.copy(self.name_to_urdf_and_og_name)
-        return ComposedURDFNameMap(new_name_map_lookup, new_name_to_urdf_and_og_name)
+        """
+        A copy of this name map, which shares its containers with this one until either changes
+        them (see _own), so copying is O(1)
+        """
+        new_map = ComposedURDFNameMap.__new__(ComposedURDFNameMap)
+        for container in _CONTAINERS:
+            setattr(new_map, container, getattr(self, container))
+        new_map._table = self._table
+        new_map._shared = set(_CONTAINERS)
+        self._shared = set(_CONTAINERS)
+        return new_map
+
+    def _own(self, *containers: str) -> None:
+        # Copy the given containers if they are shared with a copy of this map, before changing them
+        for container in containers:
+            if container in self._shared:
+                setattr(self, container, copy.copy(getattr(self, container)))
+                self._shared.remove(container)
 
     @staticmethod
     def construct(explicit_urdf: URDFObj) -> ComposedURDFNameMap:
-        names = all_names(explicit_urdf)
-        base_name_map = {name: name for name in names}
-        name_map_lookup = {explicit_urdf: base_name_map}
-        name_to_urdf_and_og_name = {name: (explicit_urdf, name) for name in names}
-        return ComposedURDFNameMap(
-            name_map_lookup=name_map_lookup,
-            name_to_urdf_and_og_name=name_to_urdf_and_og_name,
-        )
+        name_map = ComposedURDFNameMap()
+        name_map._add_named_component(explicit_urdf, ((name, name) for name in all_names(explicit_urdf)))
+        name_map._name_entries = {name_id: entry for entry, name_id in enumerate(name_map._entry_names)}
+        return name_map
 
     def _incorporate(self, other_map: Self) -> None:
-        overlapping_names = set(self.name_to_urdf_and_og_name.keys()).intersection(
-            other_map.name_to_urdf_and_og_name.keys()
-        )
+        # Only iterate over the incoming map, which is usually much smaller
+        name_ids = self._table.ids_of(other_map._table, other_map._name_entries)
+        overlapping_names = [self._table.strings[name_id] for name_id in name_ids if name_id in self._name_entries]
         # The below assertion should not be able to be fired b/c it implies that
         #   a composition happened with name overlaps
         assert (
             len(overlapping_names) == 0
         ), f"Got invalid overlap in ComposedURDFNameMap.incorporate: {overlapping_names = }"
-        overlapping_explicit_urdfs = set(self.name_map_lookup.keys()).intersection(other_map.name_map_lookup.keys())
+        overlapping_explicit_urdfs = [urdf for urdf in other_map._components if urdf in self._component_ids]
         # This assertion CAN FIRE--need to fix
         assert (
             len(overlapping_explicit_urdfs) == 0
         ), f"Got invalid overlap in ComposedURDFNameMap.incorporate: {overlapping_explicit_urdfs = }"
 
-        self.name_map_lookup.update(other_map.name_map_lookup)
-        self.name_to_urdf_and_og_name.update(other_map.name_to_urdf_and_og_name)
+        self._extend(other_map)
 
     def _rename(self, name: str, new_name: str) -> None:
-        explicit_urdf, og_name = self.name_to_urdf_and_og_name[name]
-        self.name_map_lookup[explicit_urdf][og_name] = new_name
-        self.name_to_urdf_and_og_name[new_name] = (explicit_urdf, og_name)
-        del self.name_to_urdf_and_og_name[name]
+        # Names without an entry aren't from any component, ex: the joints generated to
+        #   connect the urdfs of a sequence
+        if name == new_name or self._table.ids.get(name, -1) not in self._name_entries:
+            return
+        self._own("_entry_names", "_name_entries")
+        entry = self._name_entries.pop(self._table.ids[name])
+        new_name_id = self._table.intern(new_name)
+        self._entry_names[entry] = new_name_id
+        self._name_entries[new_name_id] = entry
 
     def _remove(self, name: str) -> None:
-        explicit_urdf, og_name = self.name_to_urdf_and_og_name[name]
-        del self.name_to_urdf_and_og_name[name]
-        name_map = self.name_map_lookup[explicit_urdf]
-        del name_map[og_name]
+        # The element with this name was removed b/c an equal one with the same name is already
+        #   in the composed urdf, so keep looking the original name up as that name
+        self._own("_name_entries")
+        del self._name_entries[self._table.ids[name]]
 
     def lookup(self, urdf: URDFObj, name: str) -> str | None:
         """
@@ -103,76 +316,142 @@ class ComposedURDFNameMap:
           has the name "name" in "urdf"
         Returns None if it doesn't exist
         """
-
-        if find_element_named(urdf, element=None, name=name) is None:
+        component_id = self._component_ids.get(urdf)
+        if component_id is None:
+            return self._lookup_missing_component(urdf, (name,))[0]
+        # Every name of a component has an entry, so a name without one isn't in it
+        offset = self._component_offsets[component_id].get(self._table.ids.get(name, -1))
+        if offset is None:
             return None
-        else:
-            return self.name_map_lookup[urdf][name]
+        return self._table.strings[self._entry_names[self._component_starts[component_id] + offset]]
 
-    def _transform(self, transform_name_map: dict[str, str]) -> ComposedURDFNameMap:
-        # Update all the new names with the transform_name_map
+    def lookup_many(self, urdf: URDFObj, names: Iterable[str]) -> list[str | None]:
+        """
+        Like lookup, for each of names
+        """
+        component_id = self._component_ids.get(urdf)
+        if component_id is None:
+            return self._lookup_missing_component(urdf, list(names))
+        start = self._component_starts[component_id]
+        offsets = self._component_offsets[component_id]
+        string_ids = self._table.ids
+        strings = self._table.strings
+        entry_names = self._entry_names
+        new_names = list[str | None]()
+        for name in names:
+            offset = offsets.get(string_ids.get(name, -1))
+            new_names.append(None if offset is None else strings[entry_names[start + offset]])
+        return new_names
 
-        def lookup_name(name: str) -> str:
-            # Note: we have to do this defaulting b/c we erase materials
-            # There is certainly a better way to do it which I will get around to
-            #   at some point
-            return transform_name_map[name] if name in transform_name_map else name
+    @staticmethod
+    def _lookup_missing_component(urdf: URDFObj, names: Collection[str]) -> list[str | None]:
+        # urdf isn't a component, so none of names can be looked up
+        for name in names:
+            if find_element_named(urdf, element=None, name=name) is not None:
+                raise KeyError(urdf)
+        return [None] * len(names)
+
+    def items(self) -> Iterator[tuple[URDFObj, str, str]]:
+        """
+        Every (component urdf, name in the component, name in the composed urdf)
+        """
+        strings = self._table.strings
+        for component_id, urdf in enumerate(self._components):
+            start = self._component_starts[component_id]
+            end = start + len(self._component_offsets[component_id])
+            for og_name_id, name_id in zip(self._entry_og_names[start:end], self._entry_names[start:end]):
+                yield urdf, strings[og_name_id], strings[name_id]
 
-        new_name_map_lookup = {
-            urdf: {og_name: lookup_name(new_name) for og_name, new_name in name_map.items()}
-            for urdf, name_map in self.name_map_lookup.items()
-        }
-        new_name_to_urdf_and_og_name = {
-            lookup_name(new_name): value for new_name, value in self.name_to_urdf_and_og_name.items()
-        }
-        return ComposedURDFNameMap(
-            name_map_lookup=new_name_map_lookup,
-            name_to_urdf_and_og_name=new_name_to_urdf_and_og_name,
-        )
+    @staticmethod
+    def _occurrence_urdf(occurrence: _Occurrence) -> URDFObj:
+        name_map, component_id = occurrence[-1]
+        return name_map._components[component_id]
 
-    def _collapse(
-        self, primitive_urdfs: set[URDFObj], assert_no_others: bool
-    ) -> ComposedURDFNameMap | UnaccountedForURDFError | RepeatedURDFError:
-        # primitive_urdfs will be the keys of the dictionary onice collapsed
-        compose_obj_to_collaped_name_maps = dict[ComposedURDFObj, ComposedURDFNameMap]()
-
-        new_name_map_lookup = dict[URDFObj, dict[str, str]]()
-        for explict_urdf, base_name_map in self.name_map_lookup.items():
-            if explict_urdf in primitive_urdfs:
-                # If we are looking for this explicit urdf, add it to the new name map lookup
-                if explict_urdf in new_name_map_lookup:
+    def _select(
+        self,
+        nested_in: _Occurrence,
+        primitive_urdfs: set[URDFObj],
+        assert_no_others: bool,
+    ) -> list[_Occurrence] | UnaccountedForURDFError | RepeatedURDFError:
+        # The occurrences of primitive_urdfs among the components of this map (which is nested
+        #   in nested_in), or the occurrences nested in them
+        selected = list[_Occurrence]()
+        selected_urdfs = set[URDFObj]()
+        for component_id, urdf in enumerate(self._components):
+            occurrence = nested_in + ((self, component_id),)
+            if urdf in primitive_urdfs:
+                if urdf in selected_urdfs:
                     # If we've already seen it, return RepeatedURDFError
-                    return RepeatedURDFError(explict_urdf)
-                new_name_map_lookup[explict_urdf] = base_name_map.copy()
-            elif isinstance(explict_urdf, ComposedURDFObj):
-                # Collapse given composed urdf with same primitive urdfs
-                collapse_result = explict_urdf.name_map._collapse(primitive_urdfs, assert_no_others)
-                if not isinstance(collapse_result, ComposedURDFNameMap):
-                    # Collapse failed
-                    return collapse_result
-
-                overlapping_explicit_urdfs = set(new_name_map_lookup.keys()).intersection(
-                    collapse_result.name_map_lookup.keys()
-                )
-                if len(overlapping_explicit_urdfs) != 0:
-                    return RepeatedURDFError(list(overlapping_explicit_urdfs)[0])
-                new_result = collapse_result._transform(base_name_map)
-
-                compose_obj_to_collaped_name_maps[explict_urdf] = new_result
-
-                new_name_map_lookup.update(new_result.name_map_lookup)
+                    return RepeatedURDFError(urdf)
+                selected_urdfs.add(urdf)
+                selected.append(occurrence)
+            elif (component_map := self._component_maps[component_id]) is not None:
+                # Look in what the composed urdf is composed of, like collapsing its name map would
+                nested_selected = component_map._select(occurrence, primitive_urdfs, assert_no_others)
+                if not isinstance(nested_selected, list):
+                    return nested_selected
+                for nested_occurrence in nested_selected:
+                    if (nested_urdf := self._occurrence_urdf(nested_occurrence)) in selected_urdfs:
+                        return RepeatedURDFError(nested_urdf)
+                    selected_urdfs.add(nested_urdf)
+                selected.extend(nested_selected)
             elif assert_no_others:
-                return UnaccountedForURDFError(explict_urdf)
-
-        new_name_to_urdf_and_og_name = dict[str, tuple[URDFObj, str]]()
-        for name, (urdf, og_name) in self.name_to_urdf_and_og_name.items():
-            if urdf not in compose_obj_to_collaped_name_maps:
-                new_name_to_urdf_and_og_name[name] = (urdf, og_name)
-            else:
-                assert isinstance(urdf, ComposedURDFObj), f"Internal urdf_compose_error. Debugging info: {urdf = }"
-                new_name_to_urdf_and_og_name.update(compose_obj_to_collaped_name_maps[urdf].name_to_urdf_and_og_name)
+                return UnaccountedForURDFError(urdf)
+        return selected
 
-        return ComposedURDFNameMap(new_name_map_lookup, new_name_to_urdf_and_og_name)
+    @staticmethod
+    def _occurrence_names(occurrence: _Occurrence) -> tuple[list[int], list[bool]]:
+        # The names of a nested occurrence in the outermost map (in its table), in the order of
+        #   its offsets, and whether each is in the composed urdf, which it is if it is in the urdf
+        #   the occurrence is a component of, and the entry it is looked up as in each map it is
+        #   nested in is too
+        name_map, component_id = occurrence[-1]
+        start = name_map._component_starts[component_id]
+        name_ids = name_map._entry_names[start : start + len(name_map._component_offsets[component_id])].tolist()
+        live = [name_map._name_entries.get(name_id) == start + i for i, name_id in enumerate(name_ids)]
+        table = name_map._table
+        for name_map, component_id in reversed(occurrence[:-1]):
+            if name_map._table is not table:
+                name_ids = list(name_map._table.ids_of(table, name_ids))
+                table = name_map._table
+            start = name_map._component_starts[component_id]
+            offsets = name_map._component_offsets[component_id]
+            entry_names = name_map._entry_names
+            name_entries = name_map._name_entries
+            for i, name_id in enumerate(name_ids):
+                # (a name without an entry keeps its name, but isn't in the composed urdf)
+                offset = offsets.get(name_id)
+                if offset is None:
+                    live[i] = False
+                else:
+                    name_ids[i] = entry_names[start + offset]
+                    live[i] = live[i] and name_entries.get(name_ids[i]) == start + offset
+        return name_ids, live
+
+    @phase("collapse")
+    def _collapse(
+        self, primitive_urdfs: set[URDFObj], assert_no_others: bool
+    ) -> ComposedURDFNameMap | UnaccountedForURDFError | RepeatedURDFError:
+        # primitive_urdfs will be the components of the name map once collapsed
+        selected = self._select((), primitive_urdfs, assert_no_others)
+        if not isinstance(selected, list):
+            return selected
+
+        new_map = ComposedURDFNameMap()
+        new_map._table = self._table
+        new_map._extend(self, [occurrence[0][1] for occurrence in selected if len(occurrence) == 1])
+        for occurrence in selected:
+            if len(occurrence) == 1:
+                continue
+            name_ids, live = self._occurrence_names(occurrence)
+            name_map, component_id = occurrence[-1]
+            offsets = self._table.offsets_of(name_map._table, name_map._component_offsets[component_id])
+            new_component_id = new_map._add_component(name_map._components[component_id], offsets, name_ids)
+            start = new_map._component_starts[new_component_id]
+            for offset, name_id in enumerate(name_ids):
+                if live[offset]:
+                    new_map._name_entries[name_id] = start + offset
+        return new_map
 
     def collapse_safe(self, primitive_urdfs: set[URDFObj]) -> ComposedURDFNameMap | RepeatedURDFError:
         """
@@ -217,71 +496,130 @@ class ComposedURDFObj(URDFObj):
     A urdf object created through composition
     """
 
-    def __init__(self, tree: ET.ElementTree, name_map: ComposedURDFNameMap):
-        super().__init__(tree)
+    __slots__ = ("name_map",)
+
+    def __init__(self, tree: ET.ElementTree, name_map: ComposedURDFNameMap, index: URDFIndex | None = None):
+        super().__init__(tree, index)
         self.name_map = name_map
 
     @staticmethod
     def construct(explicit_urdf: URDFObj) -> ComposedURDFObj:
-        tree = copy.deepcopy(explicit_urdf.tree)
+        tree = xml_backend.copy_tree(explicit_urdf.tree)
         name_map = ComposedURDFNameMap.construct(explicit_urdf)
         return ComposedURDFObj(tree, name_map)
 
-    def rename_elements(self, name_map: dict[str, str]) -> None:
-        name_dict = frozenset([NAME_KEY, "link"])
+    @staticmethod
+    def wrap(urdf: URDFObj) -> ComposedURDFObj:
+        """
+        A composed urdf of just urdf, with a key of its own in name maps
+
+        It shares urdf's tree and index rather than copying them, so it must be treated as
+        read only (connecting it copies it, like any other urdf)
+        """
+        return ComposedURDFObj(urdf.tree, ComposedURDFNameMap.construct(urdf), urdf.index)
 
+    @phase("rename_elements")
+    def rename_elements(self, name_map: dict[str, str]) -> None:
+        instrumentation.count("renamed_elements", len(name_map))
         for name, new_name in name_map.items():
             self.name_map._rename(name, new_name)
 
-        def rename_element(el: ET.Element) -> None:
-            if has_name(el, name_dict) and (name := get_name(el, name_dict)) in name_map:
-                new_name = name_map[name]
-                set_name(el, new_name, name_dict)
-
-            for el_ in el:
-                rename_element(el_)
+        self.index.rename(name_map)
 
-        rename_element(self.getroot())
+    @phase("outlaw_duplicates_with")
+    def outlaw_duplicates_with(self, base_urdf: URDFObj) -> dict[str, str]:
+        """
+        Rename the top level elements of this urdf whose names base_urdf already has (or that
+        this urdf has more than once), returning the renames
 
-    def outlaw_duplicates_with(self, base_urdf: URDFObj) -> None:
-        outlawed_names = all_names(base_urdf)
-        outlawed_new_names = all_names(self)
+        Only those names are looked at, rather than every element, so this is linear in the
+        number of names of the smaller of the two urdfs
+        """
+        outlawed_names = base_urdf.index.names()
+        outlawed_new_names = self.index.names()
+        smaller, larger = sorted((outlawed_names, outlawed_new_names), key=len)
+        # Any other name is available, and so keeps its name
+        clashing_names = {name for name in smaller if name in larger} | outlawed_new_names.duplicates()
+        assigned_names = set[str]()
         name_map = dict()
         # set up name map, and change names of top levels
-        for i in self.getroot():
-            if name := get_name(i):
-                name_map[name] = first_available(outlawed_names, outlawed_new_names, name)
-                outlawed_names.add(name_map[name])
+        for name in clashing_names:
+            if not name:
+                continue
+            # Once per element with the name, like renaming each element in turn
+            for _ in range(outlawed_new_names[name]):
+                name_map[name] = outlawed_names.first_available(name, outlawed_new_names, assigned_names)
+                assigned_names.add(name_map[name])
 
         self.rename_elements(name_map)
+        return name_map
 
+    @phase("remove_duplicate_materials")
     def remove_duplicate_materials(self, base_urdf: URDFObj) -> None:
-        for el in base_urdf.getroot().findall("material"):
-            for extend_el in self.getroot().findall("material"):
-                if xml.el_equal(el, extend_el):
-                    self.getroot().remove(extend_el)
-                    name = get_name(extend_el)
-                    if name is not None:
-                        self.name_map._remove(name)
+        """
+        Remove the materials of this urdf that base_urdf, or this urdf itself, already has
+
+        Materials are looked up by their structural hash, so this is linear in the number of
+        materials in the smaller of the two urdfs: if base_urdf has no more, only the materials of
+        this urdf that are equal to one of them, or may be equal to one another, are looked at
+        """
+        if base_urdf.index.num_material_hashes() <= self.index.num_material_hashes():
+            # (if this urdf has several materials equal to one of base_urdf's, they share a hash)
+            candidates = {
+                el: None
+                for material in base_urdf.index.materials()
+                if (el := self.index.find_equal_material(material)) is not None
+            }
+            candidates.update(dict.fromkeys(self.index.materials_with_shared_hashes()))
+            materials = list(candidates)
+        else:
+            materials = self.getroot().findall("material")
+        for extend_el in materials:
+            if base_urdf.index.find_equal_material(extend_el) is not None:
+                instrumentation.count("removed_materials")
+                self.getroot().remove(extend_el)
+                self.index.remove(extend_el)
+                name = get_name(extend_el)
+                if name is not None:
+                    self.name_map._remove(name)
+            elif (equal_el := self.index.find_equal_material(extend_el)) is not extend_el and equal_el is not None:
+                # An earlier material of this urdf is equal to it, which also accounts for its name
+                instrumentation.count("removed_materials")
+                self.getroot().remove(extend_el)
+                self.index.remove(extend_el)
 
     def copy(self) -> ComposedURDFObj:
-        return ComposedURDFObj(copy.deepcopy(self.tree), self.name_map.copy())
+        return ComposedURDFObj(xml_backend.copy_tree(self.tree), self.name_map.copy())
 
     def concatenate(self, obj: Self) -> None:
-        obj_copy = obj.copy()
-        obj_copy.outlaw_duplicates_with(self)
-        self.name_map._incorporate(obj_copy.name_map)
-        for el in obj_copy.getroot():
+        self._absorb(obj.copy())
+
+    def _absorb(self, obj: ComposedURDFObj) -> dict[str, str]:
+        # Like concatenate, but takes ownership of obj's elements rather than copying them,
+        #   so obj should not be used afterwards. Returns how obj's elements were renamed
+        renames = obj.outlaw_duplicates_with(self)
+        self.name_map._incorporate(obj.name_map)
+        # (appending an lxml element moves it out of obj, so obj's elements are listed first)
+        els = list(obj.getroot())
+        backend = xml_backend.element_backend(self.getroot())
+        if xml_backend.element_backend(obj.getroot()) != backend:
+            # The xml backend was changed between constructing self and obj
+            els = [xml_backend.copy_element(el, backend) for el in els]
+        for el in els:
             self.getroot().append(el)
+            self.index.add(el)
+        return renames
 
+    def insert_element(self, position: int, el: ET.Element) -> None:
+        """
+        Insert a new top level element into this urdf
+        """
+        self.getroot().insert(position, el)
+        self.index.add(el)
 
-def first_available(outlawed_names: set[str], outlawed_new_names: set[str], name: str) -> str:
-    def make_name(name: str, to_add: int) -> str:
-        if to_add == 0:
-            return name
-        else:
-            return name + "(" + str(to_add) + ")"
 
+def first_available(outlawed_names: Container[str], outlawed_new_names: Container[str], name: str) -> str:
+    # Note: urdfs keep a NameAllocator with their names, which is much faster for repeated use
     to_add = 0
     while make_name(name, to_add) in outlawed_names or (to_add > 0 and make_name(name, to_add) in outlawed_new_names):
         to_add += 1
@@ -289,10 +627,10 @@ def first_available(outlawed_names: set[str], outlawed_new_names: set[str], name
 
 
 def first_available_from_urdf(urdf: URDFObj, name: str) -> str:
-    return first_available(all_names(urdf), set(), name)
+    return urdf.index.names().first_available(name)
 
 
-@dataclass
+@dataclass(slots=True)
 class URDFConn:
     """
     An explicit urdf connection
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from typing import Literal, NamedTuple
+
+from urdf_compose.builder import ComposedURDFBuilder
+from urdf_compose.compose import URDFObjChild, URDFObjOrError, fix_urdf_obj_child
+from urdf_compose.composed_urdf import ComposedURDFObj, URDFConn
+from urdf_compose.urdf_compose_error import URDFComposeError
+from urdf_compose.urdf_obj import URDFObj
+
+
+class CompositionCacheInfo(NamedTuple):
+    # Connections reused from an earlier composition, and connections actually made
+    reused_connections: int
+    made_connections: int
+    maxsize: int
+    currsize: int
+
+
+# How a urdf was added to a composition: ComposedURDFBuilder.attach or append
+_StepKind = Literal["attach", "append"]
+_Step = tuple[_StepKind, URDFObj, URDFConn]
+
+
+class CompositionCache:
+    """
+    Memoizes `sequence` and `branch`, so compositions sharing a subassembly only compose
+    it once:
+
+    ```python
+    cache = CompositionCache()
+    for gripper in grippers:
+        composed_urdf = cache.sequence(base, cache.sequence(arm, wrist), gripper)  # arm + wrist is reused
+    ```
+
+    A branch reuses the composition of its first children, if composed before, and only
+    connects the rest. A sequence names its components from its end, like nested sequences
+    do (see ComposedURDFBuilder), so only whole sequences are reused.
+
+    Up to maxsize compositions are kept, dropping the least recently used.
+
+    By default, components are keyed by identity, as the name map of a composed urdf is.
+    With by_content, components with the same structure (see URDFObj.fingerprint) share
+    cache entries, so the name map of a reused composition refers to whichever of those
+    components was first composed.
+
+    The returned composed urdfs are shared with the cache, and must be treated as read
+    only--composing them further copies them, or use ComposedURDFObj.copy.
+    """
+
+    def __init__(self, by_content: bool = False, maxsize: int = 128) -> None:
+        self.by_content = by_content
+        self._maxsize = maxsize
+        # (base, *steps) keys -> the composition of the base and steps
+        self._results = OrderedDict[tuple[Hashable, ...], ComposedURDFObj | URDFComposeError]()
+        self._reused_connections = 0
+        self._made_connections = 0
+
+    def _urdf_key(self, urdf: URDFObj) -> Hashable:
+        return urdf.fingerprint() if self.by_content else urdf
+
+    def _step_key(self, step: _Step) -> Hashable:
+        kind, child, conn = step
+        return kind, self._urdf_key(child), conn.base_link, conn.extender_link
+
+    def _compose(
+        self, base: URDFObjOrError, steps: list[tuple[_StepKind, URDFObjChild]]
+    ) -> ComposedURDFObj | URDFComposeError:
+        if isinstance(base, URDFComposeError):
+            return base
+        fixed_steps = list[_Step]()
+        for kind, child in steps:
+            child_urdf, conn = fix_urdf_obj_child(child)
+            if isinstance(child_urdf, URDFComposeError):
+                return child_urdf
+            fixed_steps.append((kind, child_urdf, conn))
+
+        key = (self._urdf_key(base),) + tuple(self._step_key(step) for step in fixed_steps)
+        result = self._get(key)
+        if result is not None:
+            self._reused_connections += len(fixed_steps)
+            return result
+        builder = ComposedURDFBuilder(base)
+        for kind, child_urdf, conn in fixed_steps:
+            if kind == "attach":
+                builder.attach(child_urdf, conn)
+            else:
+                builder.append(child_urdf, conn)
+
+        # The children attached first are connected the same way whatever follows them
+        num_reused = 0
+        if all(kind == "attach" for kind, _, _ in fixed_steps):
+            for num_steps in range(len(fixed_steps) - 1, 0, -1):
+                prefix = self._get(key[: num_steps + 1])
+                if isinstance(prefix, ComposedURDFObj):
+                    num_reused = num_steps
+                    result = builder.build_from(prefix, num_steps)
+                    break
+        if result is None:
+            result = builder.build()
+        self._reused_connections += num_reused
+        self._made_connections += len(fixed_steps) - num_reused
+        self._put(key, result)
+        return result
+
+    def _get(self, key: tuple[Hashable, ...]) -> ComposedURDFObj | URDFComposeError | None:
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def _put(self, key: tuple[Hashable, ...], result: ComposedURDFObj | URDFComposeError) -> None:
+        if self._maxsize > 0:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self._maxsize:
+                self._results.popitem(last=False)
+
+    def sequence(self, base: URDFObjOrError, *children: URDFObjChild) -> ComposedURDFObj | URDFComposeError:
+        """
+        Like `sequence`, but reusing the composition of the same urdfs and connections, if composed before
+        """
+        return self._compose(base, [("append", child) for child in children])
+
+    def branch(self, urdf: URDFObjOrError, children: Iterable[URDFObjChild]) -> ComposedURDFObj | URDFComposeError:
+        """
+        Like `branch`, but reusing the composition of the same urdfs and connections, if composed before
+        """
+        return self._compose(urdf, [("attach", child) for child in children])
+
+    def info(self) -> CompositionCacheInfo:
+        return CompositionCacheInfo(self._reused_connections, self._made_connections, self._maxsize, len(self._results))
+
+    def clear(self) -> None:
+        self._results.clear()
+        self._reused_connections = 0
+        self._made_connections = 0
@@ -0,0 +1,151 @@
+import itertools
+import os
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeAlias
+
+from urdf_compose.compose import (
+    URDFObjChild,
+    URDFObjOrError,
+    sequence,
+    write_and_check_urdf,
+)
+from urdf_compose.composed_urdf import URDFConn
+from urdf_compose.urdf_compose_error import URDFComposeError
+from urdf_compose.urdf_obj import URDFObj, get_check_urdf_settings
+from urdf_compose.workers import init_worker, load_component
+
+ComponentChoice: TypeAlias = Path | tuple[Path, URDFConn]
+"""
+The urdf file of a component, optionally with the URDFConn connecting it to the previous slot
+(which is ignored for the first slot)
+"""
+
+Configuration: TypeAlias = dict[str, str]
+"""
+The name of the choice made for each slot
+"""
+
+ComposeConfiguration: TypeAlias = Callable[[Mapping[str, URDFObjChild]], URDFObjOrError]
+"""
+Composes the components chosen for each slot (with their URDFConns), keyed by slot name
+Runs in worker processes, so it must be picklable (ex: a module level function)
+"""
+
+
+def sequence_slots(components: Mapping[str, URDFObjChild]) -> URDFObjOrError:
+    """
+    Connect each slot's component to the previous slot's, in slot order
+    """
+    base, *children = components.values()
+    return sequence(base[0] if isinstance(base, tuple) else base, *children)
+
+
+@dataclass(frozen=True)
+class ConfigurationResult:
+    configuration: Configuration
+    dest: Path
+    # f"{type(error).__name__}: {error}" of the compose error or check failure, if any
+    error: str | None
+    load_seconds: float
+    compose_seconds: float
+    write_seconds: float
+
+
+@dataclass(frozen=True)
+class _ConfigurationTask:
+    configuration: Configuration
+    components: dict[str, tuple[Path, URDFConn]]
+    dest: Path
+    compose: ComposeConfiguration
+    check: bool
+
+
+def _build_configuration(task: _ConfigurationTask) -> ConfigurationResult:
+    start = time.perf_counter()
+    load_end = compose_end = None
+    error: str | None = None
+    try:
+        components = dict[str, URDFObjChild]()
+        for slot, (path, conn) in task.components.items():
+            components[slot] = (load_component(path, task.check), conn)
+        load_end = time.perf_counter()
+        urdf: URDFObj | URDFComposeError = task.compose(components)
+        compose_end = time.perf_counter()
+        if isinstance(urdf, URDFComposeError):
+            error = f"{type(urdf).__name__}: {urdf}"
+        elif task.check:
+            write_and_check_urdf(urdf, task.dest)
+        else:
+            urdf.write_xml(task.dest)
+    except Exception as e:
+        # Including errors raised by compose, which are the configuration's rather than the pool's
+        error = f"{type(e).__name__}: {e}"
+    end = time.perf_counter()
+    load_end = end if load_end is None else load_end
+    compose_end = end if compose_end is None else compose_end
+    return ConfigurationResult(
+        task.configuration, task.dest, error, load_end - start, compose_end - load_end, end - compose_end
+    )
+
+
+def _fix_component_choice(choice: ComponentChoice) -> tuple[Path, URDFConn]:
+    path, conn = choice if isinstance(choice, tuple) else (choice, URDFConn())
+    return Path(path).resolve(), conn
+
+
+def enumerate_configurations(
+    slots: Mapping[str, Mapping[str, ComponentChoice]],
+    constraint: Callable[[Configuration], bool] | None = None,
+) -> list[Configuration]:
+    """
+    Every combination of one choice per slot (the cartesian product), in order,
+    that satisfies constraint
+    """
+    configurations = [
+        dict(zip(slots, choice_names, strict=True)) for choice_names in itertools.product(*slots.values())
+    ]
+    return [c for c in configurations if constraint is None or constraint(c)]
+
+
+def generate_configurations(
+    slots: Mapping[str, Mapping[str, ComponentChoice]],
+    dest_dir: Path,
+    compose: ComposeConfiguration = sequence_slots,
+    constraint: Callable[[Configuration], bool] | None = None,
+    max_workers: int | None = None,
+    check: bool = True,
+) -> list[ConfigurationResult]:
+    """
+    Compose and write every configuration of the given slots across a process pool
+
+    slots maps each slot name (ex: "arm") to its choices (ex: {"ur5": ARM_PATH, ...}), in the
+    order the slots are composed. Each configuration satisfying constraint (see
+    enumerate_configurations) is composed with compose, then written to
+    dest_dir / "{choice1}-{choice2}-....urdf" and, if check, checked.
+
+    Each worker process loads a component once, however many configurations use it.
+    Returns the result of every configuration, in order, with its error (if composing or
+    checking it failed) and timings, rather than stopping at the first error.
+    """
+    fixed_slots = {
+        slot: {name: _fix_component_choice(c) for name, c in choices.items()} for slot, choices in slots.items()
+    }
+    tasks = [
+        _ConfigurationTask(
+            configuration,
+            {slot: fixed_slots[slot][choice] for slot, choice in configuration.items()},
+            Path(dest_dir) / ("-".join(configuration.values()) + ".urdf"),
+            compose,
+            check,
+        )
+        for configuration in enumerate_configurations(slots, constraint)
+    ]
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers, initializer=init_worker, initargs=(get_check_urdf_settings(),)) as executor:
+        # A few chunks per worker, to balance load without a round trip per configuration
+        chunksize = max(1, len(tasks) // (4 * max_workers))
+        return list(executor.map(_build_configuration, tasks, chunksize=chunksize))
@@ -1,45 +1,65 @@
 import xml.etree.ElementTree as ET
 
+from urdf_compose import xml_backend
 from urdf_compose.composed_urdf import ComposedURDFObj, first_available_from_urdf
-from urdf_compose.resolve_connections import URDFDefConn
-from urdf_compose.urdf_compose_error import InteranlURDFComposeError, URDFComposeError
+from urdf_compose.instrumentation import phase
+from urdf_compose.resolve_connections import ConnectionIssue, URDFDefConn
+from urdf_compose.urdf_compose_error import URDFComposeError
 from urdf_compose.urdf_obj import URDFObj
 from urdf_compose.utils import find_element_named
 
 
-def check_for_connection_issue(
-    base_urdf: ComposedURDFObj,
+def connection_issue(
+    base_urdf: URDFObj,
     extender_urdf: URDFObj,
     conn: URDFDefConn,
-) -> str | None:
+) -> ConnectionIssue | None:
+    """
+    Like check_for_connection_issue, but only says what the issue is, rather than describing it
+    """
     # verify that link and joint exist
     base_link = find_element_named(base_urdf, "link", conn.base_link)
     if base_link is None:
+        return "no_base_link"
+    if len(base_link) > 0:
+        return "non_empty_base_link"
+    if find_element_named(extender_urdf, "link", conn.extender_link) is None:
+        return "no_extender_link"
+    if base_urdf.index.joints_with_parent(conn.base_link):
+        return "base_link_connected"
+    if extender_urdf.index.joints_with_child(conn.extender_link):
+        return "extender_link_connected"
+    return None
+
+
+@phase("check_for_connection_issue")
+def check_for_connection_issue(
+    base_urdf: URDFObj,
+    extender_urdf: URDFObj,
+    conn: URDFDefConn,
+) -> str | None:
+    issue = connection_issue(base_urdf, extender_urdf, conn)
+    if issue is None:
+        return None
+    if issue == "no_base_link":
         return (
             f"Unknown base link {conn.base_link}. Have {[el.attrib['name'] for el in base_urdf.tree.findall('link')]}"
         )
-    if len(base_link) > 0:
+    if issue == "non_empty_base_link":
         return f"Found non-empty output link {conn.base_link}"
-    # base_urdf.getroot().remove(base_link)
-    if find_element_named(extender_urdf, "link", conn.extender_link) is None:
+    if issue == "no_extender_link":
         return f"Extender link name unknown: {conn.extender_link}"
-
-    for el in base_urdf.getroot().findall("joint"):
-        parent_el = el.find("parent")
-        if parent_el is not None and parent_el.attrib["link"] == conn.base_link:
-            name = el.attrib["name"]
-            return f"Attempted to connect to output link {conn.base_link}, but it already connected to joint {name}"
-
-    for el in extender_urdf.getroot().findall("joint"):
-        child_el = el.find("child")
-        if child_el is not None and child_el.attrib["link"] == conn.extender_link:
-            name = el.attrib["name"]
-            return f"Attempted to connect to input link {conn.extender_link}, but it already connected to joint {name}"
-    return None
+    if issue == "base_link_connected":
+        name = base_urdf.index.joints_with_parent(conn.base_link)[0].attrib["name"]
+        return f"Attempted to connect to output link {conn.base_link}, but it already connected to joint {name}"
+    name = extender_urdf.index.joints_with_child(conn.extender_link)[0].attrib["name"]
+    return f"Attempted to connect to input link {conn.extender_link}, but it already connected to joint {name}"
 
 
-def get_dummy_joint(name: str, base_link: str, extender_link: str) -> ET.Element:
-    return ET.fromstring(
+def get_dummy_joint(
+    name: str, base_link: str, extender_link: str, backend: xml_backend.XMLBackend | None = None
+) -> ET.Element:
+    return xml_backend.fromstring(
         f"""
 <joint name="{name}" type="fixed">
     <origin xyz="0 0 0" rpy="0 0 0" />
@@ -47,7 +67,8 @@ def get_dummy_joint(name: str, base_link: str, extender_link: str) -> ET.Element
     <child link="{extender_link}" />
     <axis xyz="0 0 0" />
 </joint>
-"""
+""",
+        backend,
     )
 
 
@@ -56,9 +77,20 @@ def connect(
     extender_urdf_: URDFObj,
     conn: URDFDefConn,
 ) -> ComposedURDFObj | URDFComposeError:
-    extender_urdf = ComposedURDFObj.construct(extender_urdf_)
     base_urdf = base_urdf.copy()
+    connection_issue = connect_in_place(base_urdf, extender_urdf_, conn)
+    if connection_issue is not None:
+        return connection_issue
+    return base_urdf
+
 
+def _prepare_connection(
+    base_urdf: ComposedURDFObj,
+    extender_urdf: ComposedURDFObj,
+    conn: URDFDefConn,
+) -> tuple[str, str] | URDFComposeError:
+    # Check the connection, remove extender_urdf's duplicate materials, and rename the links
+    #   being connected, returning their new names (in base_urdf and extender_urdf)
     connection_issue = check_for_connection_issue(base_urdf, extender_urdf, conn)
     if connection_issue is not None:
         msg = f"Base URDF: {base_urdf}, Extension URDF: {extender_urdf}, Connection: {conn}"
@@ -67,21 +99,104 @@ def connect(
     extender_urdf.remove_duplicate_materials(base_urdf)
     new_base_link_name = f"CONNECTED:{conn.base_link}"
     new_extender_link_name = first_available_from_urdf(extender_urdf, f"CONNECTED:{conn.extender_link}")
-    connection_joint_name = "GENERATED_CONNECTION"
 
     real_new_base_link_name = first_available_from_urdf(base_urdf, new_base_link_name)
 
     extender_urdf.rename_elements({conn.extender_link: new_extender_link_name})
     base_urdf.rename_elements({conn.base_link: real_new_base_link_name})
-    base_urdf.concatenate(extender_urdf)  # TODO Back propigate changes into extender map.
+    return real_new_base_link_name, new_extender_link_name
+
+
+def connect_in_place(
+    base_urdf: ComposedURDFObj,
+    extender_urdf_: URDFObj,
+    conn: URDFDefConn,
+) -> URDFComposeError | None:
+    """
+    Like connect, but mutates base_urdf rather than copying it
+
+    If an error is returned, base_urdf is left unchanged
+    """
+    return absorb_in_place(base_urdf, ComposedURDFObj.construct(extender_urdf_), conn)
+
+
+@phase("connect")
+def absorb_in_place(
+    base_urdf: ComposedURDFObj,
+    extender_urdf: ComposedURDFObj,
+    conn: URDFDefConn,
+) -> URDFComposeError | None:
+    """
+    Like connect_in_place, but takes ownership of extender_urdf's elements rather than copying
+    them, so extender_urdf should not be used afterwards
+    """
+    links = _prepare_connection(base_urdf, extender_urdf, conn)
+    if isinstance(links, URDFComposeError):
+        return links
+    real_new_base_link_name, new_extender_link_name = links
+    connection_joint_name = "GENERATED_CONNECTION"
+
+    num_extender_elements = len(extender_urdf.getroot())
+    renames = base_urdf._absorb(extender_urdf)  # TODO Back propigate changes into extender map.
 
     real_connection_joint_name = first_available_from_urdf(base_urdf, connection_joint_name)
-    real_extender_link_name = base_urdf.name_map.lookup(extender_urdf_, conn.extender_link)
-    if real_extender_link_name is None:
-        raise InteranlURDFComposeError(
-            f"Could not find {conn.extender_link = } in extneder urdf, even though check_for_connection_issue passed"
-        )
-    new_joint = get_dummy_joint(real_connection_joint_name, real_new_base_link_name, real_extender_link_name)
-    base_urdf.getroot().insert(-1 * len(extender_urdf.getroot()), new_joint)
+    new_joint = get_dummy_joint(
+        real_connection_joint_name,
+        real_new_base_link_name,
+        renames.get(new_extender_link_name, new_extender_link_name),
+        xml_backend.element_backend(base_urdf.getroot()),
+    )
+    base_urdf.insert_element(-1 * num_extender_elements, new_joint)
 
-    return base_urdf
+    return None
+
+
+@phase("connect")
+def prepend_in_place(
+    base_urdf: ComposedURDFObj,
+    extender_urdf: ComposedURDFObj,
+    conn: URDFDefConn,
+) -> URDFComposeError | None:
+    """
+    Like absorb_in_place, but moves base_urdf's elements to the start of extender_urdf rather
+    than the other way around, so base_urdf should not be used afterwards
+
+    extender_urdf ends up with the same xml and names that base_urdf would, but base_urdf's
+    components are added to its name map after its own components rather than before them.
+    This lets a long chain of urdfs be connected from its end, the way nested sequences
+    connect them, without moving the whole chain on every connection.
+
+    If an error is returned, extender_urdf is left unchanged
+    """
+    links = _prepare_connection(base_urdf, extender_urdf, conn)
+    if isinstance(links, URDFComposeError):
+        return links
+    real_new_base_link_name, new_extender_link_name = links
+    connection_joint_name = "GENERATED_CONNECTION"
+
+    renames = extender_urdf.outlaw_duplicates_with(base_urdf)
+    extender_urdf.name_map._incorporate(base_urdf.name_map)
+    base_root = base_urdf.getroot()
+    root = extender_urdf.getroot()
+    els = list(base_root)
+    backend = xml_backend.element_backend(root)
+    if xml_backend.element_backend(base_root) != backend:
+        # The xml backend was changed between constructing base_urdf and extender_urdf
+        els = [xml_backend.copy_element(el, backend) for el in els]
+    for position, el in enumerate(els):
+        root.insert(position, el)
+        extender_urdf.index.add(el)
+    root.attrib.clear()
+    root.attrib.update(base_root.attrib)
+    root.text = base_root.text
+
+    real_connection_joint_name = first_available_from_urdf(extender_urdf, connection_joint_name)
+    new_joint = get_dummy_joint(
+        real_connection_joint_name,
+        real_new_base_link_name,
+        renames.get(new_extender_link_name, new_extender_link_name),
+        backend,
+    )
+    extender_urdf.insert_element(len(els), new_joint)
+
+    return None
@@ -0,0 +1,148 @@
+"""
+Opt-in timing of the phases of composition, and counts of what they did
+
+Nothing is recorded unless inside `with instrument()`, and when nothing is being recorded
+the instrumented functions only check a global before running as usual.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    # Including the time spent in other phases called by this one
+    seconds: float = 0.0
+
+
+class Instrumentation:
+    """
+    The wall time and number of calls of each phase, and counters, recorded while it was active
+
+    If trace is set, every call is also kept, to be exported as a Chrome trace (see chrome_trace)
+    """
+
+    def __init__(self, trace: bool = False) -> None:
+        self.phases = dict[str, PhaseStats]()
+        self.counters = Counter[str]()
+        self.trace = trace
+        # (phase, start, end, thread id) of every call, if tracing
+        self.events = list[tuple[str, float, float, int]]()
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, start: float, end: float) -> None:
+        with self._lock:
+            stats = self.phases.get(phase)
+            if stats is None:
+                stats = self.phases[phase] = PhaseStats()
+            stats.calls += 1
+            stats.seconds += end - start
+            if self.trace:
+                self.events.append((phase, start, end, threading.get_ident()))
+
+    def count(self, counter: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += n
+
+    def summary(self) -> dict[str, Any]:
+        """
+        The calls and seconds of every phase, and the counters, as a JSON serializable dict
+        """
+        return {
+            "phases": {
+                phase: {"calls": stats.calls, "seconds": stats.seconds} for phase, stats in sorted(self.phases.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        The calls recorded while tracing, in the Chrome trace event format, which can be opened
+        in chrome://tracing or https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": phase,
+                    "cat": "urdf_compose",
+                    "ph": "X",
+                    "ts": (start - self.start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                }
+                for phase, start, end, tid in self.events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"counters": dict(sorted(self.counters.items()))},
+        }
+
+    def write_chrome_trace(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.chrome_trace()))
+
+
+_active: Instrumentation | None = None
+
+
+@contextmanager
+def instrument(trace: bool = False) -> Iterator[Instrumentation]:
+    """
+    Record the phases of everything composed in the block, in any thread of this process
+    """
+    global _active
+    previous = _active
+    _active = instrumentation = Instrumentation(trace)
+    try:
+        yield instrumentation
+    finally:
+        _active = previous
+
+
+def is_instrumenting() -> bool:
+    """
+    Whether counts are being recorded, for counts that cost something to compute
+    """
+    return _active is not None
+
+
+def count(counter: str, n: int = 1) -> None:
+    instrumentation = _active
+    if instrumentation is not None:
+        instrumentation.count(counter, n)
+
+
+def phase(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """
+    Record the calls of the decorated function as the given phase
+    """
+
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            instrumentation = _active
+            if instrumentation is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                instrumentation.record(name, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,105 @@
+"""
+How much memory a urdf takes, broken down by the components it was composed from
+"""
+
+import sys
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from typing import NamedTuple
+
+from urdf_compose import xml_backend
+from urdf_compose.composed_urdf import _CONTAINERS, ComposedURDFNameMap, ComposedURDFObj
+from urdf_compose.urdf_index import URDFIndex
+from urdf_compose.urdf_obj import URDFObj
+from urdf_compose.utils import get_name
+
+
+class ComponentMemory(NamedTuple):
+    # None for the elements that aren't from any component (the joints connecting components),
+    #   and unnamed elements
+    urdf: URDFObj | None
+    # Top level elements
+    elements: int
+    bytes: int
+
+
+class MemoryReport(NamedTuple):
+    components: list[ComponentMemory]
+    index_bytes: int
+    name_map_bytes: int
+
+    @property
+    def tree_bytes(self) -> int:
+        return sum(component.bytes for component in self.components)
+
+    @property
+    def total_bytes(self) -> int:
+        return self.tree_bytes + self.index_bytes + self.name_map_bytes
+
+
+def _retained_bytes(fn: Callable[[], object]) -> int:
+    # The bytes allocated by fn that are still allocated once it returns (as its result)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    del result
+    return after - before
+
+
+def _elements_bytes(elements: list[ET.Element]) -> int:
+    # Measured by parsing the elements with ElementTree, as tracemalloc can't see the memory
+    #   lxml allocates, and copying elements would share their strings
+    text = b"<robot>" + b"".join(xml_backend.tostring(el) for el in elements) + b"</robot>"
+    return _retained_bytes(lambda: ET.fromstring(text))
+
+
+def _name_map_bytes(name_map: ComposedURDFNameMap) -> int:
+    containers = [getattr(name_map, container) for container in _CONTAINERS]
+    offsets = {id(offsets): offsets for offsets in name_map._component_offsets}
+    return sum(sys.getsizeof(container) for container in containers + list(offsets.values()))
+
+
+def _component(urdf: URDFObj) -> URDFObj:
+    # The urdf a composed urdf of a single urdf stands for (see ComposedURDFObj.wrap)
+    while isinstance(urdf, ComposedURDFObj) and len(urdf.name_map._components) == 1:
+        urdf = urdf.name_map._components[0]
+    return urdf
+
+
+def memory_report(urdf: URDFObj) -> MemoryReport:
+    """
+    The bytes of the xml of urdf that came from each of its components, and of its index
+    and name map
+
+    Elements are measured with tracemalloc, as parsed by ElementTree, so the bytes are the
+    same whichever xml backend urdf is using
+    """
+    root = urdf.getroot()
+    name_to_urdf = dict[str, URDFObj]()
+    name_map_bytes = 0
+    if isinstance(urdf, ComposedURDFObj):
+        name_to_urdf = {name: _component(component) for component, _, name in urdf.name_map.items()}
+        name_map_bytes = _name_map_bytes(urdf.name_map)
+
+    elements_by_component = dict[URDFObj | None, list[ET.Element]]()
+    for el in root:
+        name = get_name(el)
+        component = urdf if not isinstance(urdf, ComposedURDFObj) else name_to_urdf.get(name) if name else None
+        elements_by_component.setdefault(component, []).append(el)
+
+    return MemoryReport(
+        [
+            ComponentMemory(component, len(elements), _elements_bytes(elements))
+            for component, elements in elements_by_component.items()
+        ],
+        _retained_bytes(lambda: URDFIndex(root)),
+        name_map_bytes,
+    )
@@ -0,0 +1,156 @@
+import os
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from urdf_compose import xml_backend
+from urdf_compose.urdf_index import URDFIndex
+
+
+class ParseCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+# (resolved path, modification time in ns, size in bytes, xml backend)
+ParseCacheKey = tuple[str, int, int, str]
+
+# How a file did when checked, by (check_urdf mode, check_urdf version if known): None if it
+#   passed, or the failure message
+CheckResults = dict[tuple[str, str | None], str | None]
+
+
+class ParsedURDF(NamedTuple):
+    tree: ET.ElementTree
+    urdf_index: URDFIndex
+    # Shared with check_results of the file, see ParsedURDFCache.check_results
+    check_results: CheckResults
+
+
+class ParsedURDFCache:
+    """
+    A bounded LRU cache of parsed urdf files, keyed by path, modification time and size,
+    so a file that changes on disk is parsed again
+
+    The parsed trees are shared by everyone who gets them from the cache, so they must be
+    treated as read only
+
+    How each file did when checked is kept under the same key, whether or not the file itself
+    was parsed through the cache, so a file is only checked once until it changes
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries = OrderedDict[ParseCacheKey, ParsedURDF]()
+        self._check_results = OrderedDict[ParseCacheKey, CheckResults]()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path: Path) -> ParseCacheKey:
+        resolved_path = path.resolve()
+        stat = os.stat(resolved_path)
+        return str(resolved_path), stat.st_mtime_ns, stat.st_size, xml_backend.get_xml_backend()
+
+    def _get_check_results(self, key: ParseCacheKey) -> CheckResults:
+        # (with the lock held)
+        check_results = self._check_results.get(key)
+        if check_results is not None:
+            self._check_results.move_to_end(key)
+            return check_results
+        check_results = CheckResults()
+        if self._maxsize > 0:
+            self._check_results[key] = check_results
+            while len(self._check_results) > self._maxsize:
+                self._check_results.popitem(last=False)
+        return check_results
+
+    def check_results(self, path: Path) -> CheckResults:
+        """
+        How the file, as it is now, did when checked, which can be added to
+        """
+        key = self._key(path)
+        with self._lock:
+            return self._get_check_results(key)
+
+    def parse(self, path: Path) -> ParsedURDF:
+        key = self._key(path)
+        with self._lock:
+            parsed = self._entries.get(key)
+            if parsed is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return parsed
+            self._misses += 1
+
+        tree = xml_backend.parse(path)
+        root = tree.getroot()
+        assert root is not None, f"Parsed {path} has no root element"
+        urdf_index = URDFIndex(root)
+
+        with self._lock:
+            parsed = ParsedURDF(tree, urdf_index, self._get_check_results(key))
+            if self._maxsize > 0:
+                self._entries[key] = parsed
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return parsed
+
+    def info(self) -> ParseCacheInfo:
+        with self._lock:
+            return ParseCacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._check_results.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def set_maxsize(self, maxsize: int) -> None:
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._entries) > max(maxsize, 0):
+                self._entries.popitem(last=False)
+            while len(self._check_results) > max(maxsize, 0):
+                self._check_results.popitem(last=False)
+
+
+_parse_cache = ParsedURDFCache(maxsize=128)
+
+
+def parse_cached(path: Path) -> ParsedURDF:
+    return _parse_cache.parse(path)
+
+
+def cached_check_results(path: Path) -> CheckResults:
+    return _parse_cache.check_results(path)
+
+
+def parse_cache_info() -> ParseCacheInfo:
+    """
+    Hit and miss statistics of the cache of parsed urdf files used by ExplicitURDFObj(use_cache=True)
+    """
+    return _parse_cache.info()
+
+
+def clear_parse_cache() -> None:
+    """
+    Drop every parsed urdf file, and every check result, from the cache used by ExplicitURDFObj, and reset its
+    statistics
+    """
+    _parse_cache.clear()
+
+
+def set_parse_cache_maxsize(maxsize: int) -> None:
+    """
+    Set how many parsed urdf files (and check results of files) the cache used by ExplicitURDFObj keeps. 0 disables
+    it
+    """
+    _parse_cache.set_maxsize(maxsize)
@@ -0,0 +1,294 @@
+"""
+Lazy compositions, which only build the composed xml when it is needed
+
+A CompositionPlan records its components and connections. Checking it or looking up
+names composes skeletons of the components instead: copies of their top level elements
+without the geometry, inertia, etc. inside them. The skeletons are composed with the same
+code as the real urdfs, so they get exactly the same names and errors, at a fraction of
+the cost. The real urdfs are only composed when the tree is accessed.
+
+Plans can also be written without composing the real urdfs: each skeleton element is
+marked with the element of the component it stands for, which is written with the names
+the skeleton composition gave it (see CompositionPlan.write_to).
+"""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO, Literal
+
+from urdf_compose import xml_backend
+from urdf_compose.builder import ComposedURDFBuilder
+from urdf_compose.compose import URDFObjChild, URDFObjOrError, fix_urdf_obj_child
+from urdf_compose.composed_urdf import ComposedURDFNameMap, ComposedURDFObj, URDFConn
+from urdf_compose.serialize import write_streamed
+from urdf_compose.urdf_compose_error import URDFComposeError
+from urdf_compose.urdf_index import URDFIndex, _reference_name
+from urdf_compose.urdf_obj import URDFObj
+
+_StepKind = Literal["attach", "append"]
+
+# Attribute marking a skeleton element with the element it stands for
+SOURCE_KEY = "urdf-compose-source"
+# Source marks, and ids of the component occurrences they come from, unique across plans
+_source_marks = itertools.count()
+_occurrence_ids = itertools.count()
+
+# source mark -> (id of the component occurrence it is in, element it stands for)
+_Sources = dict[str, tuple[int, ET.Element]]
+
+
+def _skeleton_tree(root: ET.Element, sources: _Sources, root_sources: _Sources | None = None) -> ET.ElementTree:
+    """
+    The top level elements of the urdf, with only what composition looks at inside them:
+    the whole of materials (which are compared when deduplicating), whether links are empty,
+    and every reference to a name (the parent and child of joints, the materials of visuals,
+    ...), which is renamed along with the name it refers to
+
+    Elements are marked with the element they stand for, which is added to sources. If
+    root is itself a skeleton, its marks are looked up in root_sources
+    """
+    occurrence_id = next(_occurrence_ids)
+    # Each occurrence in root is a new occurrence in the skeleton
+    occurrence_ids = dict[int, int]()
+    skeleton_root = xml_backend.new_element(root.tag, dict(root.attrib))
+    skeleton_root.text = root.text
+    for el in root:
+        if el.tag == "material" or (root_sources is not None and SOURCE_KEY not in el.attrib):
+            # Materials, and generated joints, are written as they are in the skeleton
+            skeleton_root.append(xml_backend.copy_element(el))
+            continue
+        if root_sources is not None:
+            root_occurrence_id, source_el = root_sources[el.attrib[SOURCE_KEY]]
+            el_occurrence_id = occurrence_ids.setdefault(root_occurrence_id, next(_occurrence_ids))
+        else:
+            el_occurrence_id, source_el = occurrence_id, el
+        mark = str(next(_source_marks))
+        sources[mark] = (el_occurrence_id, source_el)
+        skeleton_el = xml_backend.sub_element(skeleton_root, el.tag, dict(el.attrib) | {SOURCE_KEY: mark})
+        for sub_el in itertools.islice(el.iter(), 1, None):
+            if _reference_name(sub_el) is not None:
+                xml_backend.sub_element(skeleton_el, sub_el.tag, dict(sub_el.attrib))
+        if el.tag != "joint" and len(el) > 0:
+            xml_backend.sub_element(skeleton_el, "skeleton", {})
+    return xml_backend.element_tree(skeleton_root)
+
+
+class _SkeletonURDFObj(URDFObj):
+    """
+    A skeleton of a urdf, which stands for it in name maps
+    """
+
+    __slots__ = ("_urdf",)
+
+    def __init__(self, urdf: URDFObj, sources: _Sources) -> None:
+        super().__init__(_skeleton_tree(urdf.getroot(), sources))
+        self._urdf = urdf
+
+    def _identity(self) -> URDFObj:
+        return self._urdf._identity()
+
+    def __repr__(self) -> str:
+        return repr(self._urdf)
+
+
+class _SkeletonComposedURDFObj(ComposedURDFObj):
+    """
+    A skeleton of a composed urdf, which stands for it in name maps, and shares its name map
+    """
+
+    __slots__ = ("_urdf",)
+
+    def __init__(self, tree: ET.ElementTree, name_map: ComposedURDFNameMap, urdf: URDFObj) -> None:
+        super().__init__(tree, name_map)
+        self._urdf = urdf
+
+    def _identity(self) -> URDFObj:
+        return self._urdf._identity()
+
+    def __repr__(self) -> str:
+        return repr(self._urdf)
+
+
+def _skeleton(urdf: URDFObj, sources: _Sources) -> URDFObj | URDFComposeError:
+    if isinstance(urdf, CompositionPlan):
+        skeleton = urdf._skeleton()
+        if isinstance(skeleton, URDFComposeError):
+            return skeleton
+        if skeleton is urdf._result:
+            # Already composed
+            return _SkeletonComposedURDFObj(_skeleton_tree(skeleton.getroot(), sources), skeleton.name_map, urdf)
+        skeleton_tree = _skeleton_tree(skeleton.getroot(), sources, urdf._sources)
+        return _SkeletonComposedURDFObj(skeleton_tree, skeleton.name_map, urdf)
+    elif isinstance(urdf, ComposedURDFObj):
+        return _SkeletonComposedURDFObj(_skeleton_tree(urdf.getroot(), sources), urdf.name_map, urdf)
+    return _SkeletonURDFObj(urdf, sources)
+
+
+def _reference_names(el: ET.Element) -> list[str]:
+    # The name of el, and the names referred to inside it, in order
+    return [name for sub_el in el.iter() if (name := _reference_name(sub_el)) is not None]
+
+
+def _renamed(el: ET.Element, renames: dict[str, str]) -> ET.Element:
+    # A copy of el, renamed the way URDFIndex.rename renames elements
+    el = copy.deepcopy(el)
+    for sub_el in el.iter():
+        if (name := _reference_name(sub_el)) is not None and name in renames:
+            URDFIndex._set_reference_name(sub_el, renames[name])
+    return el
+
+
+class CompositionPlan(ComposedURDFObj):
+    """
+    A composed urdf that isn't composed until its tree is needed (see lazy_sequence and lazy_branch)
+
+    check, name_map and writing (write_to, to_bytes, write_xml) don't build the tree. getroot,
+    tree and index (and so anything else that reads the urdf) compose it, once, and raise
+    if composition fails.
+    Plans can be composed further, lazily or not.
+    """
+
+    __slots__ = ("_base", "_steps", "_skeleton_result", "_sources", "_result")
+
+    def __init__(self, base: URDFObjOrError, steps: list[tuple[_StepKind, URDFObjOrError, URDFConn]]) -> None:
+        # The urdf isn't built yet, so URDFObj.__init__ isn't called
+        self._base = base
+        self._steps = steps
+        self._skeleton_result: ComposedURDFObj | URDFComposeError | None = None
+        # The elements the skeleton's elements stand for
+        self._sources = _Sources()
+        self._result: ComposedURDFObj | URDFComposeError | None = None
+
+    def __getstate__(self) -> dict[str, object]:
+        # Only the plan's own slots, as its tree, index and name map are computed from them
+        return {slot: getattr(self, slot) for slot in CompositionPlan.__slots__}
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
+    def _compose(self, as_skeletons: bool) -> ComposedURDFObj | URDFComposeError:
+        def prepare(urdf: URDFObjOrError) -> URDFObjOrError:
+            if as_skeletons and not isinstance(urdf, URDFComposeError):
+                return _skeleton(urdf, self._sources)
+            if isinstance(urdf, CompositionPlan) and isinstance(result := urdf.materialize(), URDFComposeError):
+                # As the error of a nested sequence or branch is composed further
+                return result
+            return urdf
+
+        builder = ComposedURDFBuilder(prepare(self._base))
+        for kind, child, conn in self._steps:
+            if kind == "attach":
+                builder.attach(prepare(child), conn)
+            else:
+                builder.append(prepare(child), conn)
+        return builder.build()
+
+    def _skeleton(self) -> ComposedURDFObj | URDFComposeError:
+        if self._result is not None:
+            return self._result
+        if self._skeleton_result is None:
+            self._skeleton_result = self._compose(as_skeletons=True)
+            if isinstance(self._skeleton_result, URDFComposeError):
+                # Errors are rare, so get the error with the real urdfs, for debugging
+                self._skeleton_result = self.materialize()
+        return self._skeleton_result
+
+    def check(self) -> URDFComposeError | None:
+        """
+        The error composing this plan would return, if any, without building the tree
+        """
+        skeleton = self._skeleton()
+        return skeleton if isinstance(skeleton, URDFComposeError) else None
+
+    def materialize(self) -> ComposedURDFObj | URDFComposeError:
+        """
+        Compose the urdf (only the first time this is called)
+        """
+        if self._result is None:
+            self._result = self._compose(as_skeletons=False)
+        return self._result
+
+    def _materialized(self) -> ComposedURDFObj:
+        result = self.materialize()
+        if isinstance(result, URDFComposeError):
+            raise result
+        return result
+
+    @property
+    def tree(self) -> ET.ElementTree:  # type: ignore[override]
+        return self._materialized().tree
+
+    @property
+    def index(self) -> URDFIndex:  # type: ignore[override]
+        return self._materialized().index
+
+    @property
+    def name_map(self) -> ComposedURDFNameMap:  # type: ignore[override]
+        skeleton = self._skeleton()
+        if isinstance(skeleton, URDFComposeError):
+            raise skeleton
+        return skeleton.name_map
+
+    def copy(self) -> ComposedURDFObj:
+        return self._materialized().copy()
+
+    def _streamed_elements(self, skeleton_root: ET.Element) -> Iterator[ET.Element]:
+        # The names each occurrence of a component was given, by its original names, including
+        #   the names of its materials, which are only referred to from its other elements
+        renames = dict[int, dict[str, str]]()
+        for el in skeleton_root:
+            if (mark := el.attrib.get(SOURCE_KEY)) is not None:
+                occurrence_id, source_el = self._sources[mark]
+                occurrence_renames = renames.setdefault(occurrence_id, {})
+                for name, new_name in zip(_reference_names(source_el), _reference_names(el), strict=True):
+                    occurrence_renames[name] = new_name
+        for el in skeleton_root:
+            if (mark := el.attrib.get(SOURCE_KEY)) is not None:
+                occurrence_id, source_el = self._sources[mark]
+                yield _renamed(source_el, renames.get(occurrence_id, {}))
+            else:
+                yield el
+
+    def write_to(self, f: BinaryIO) -> None:
+        """
+        Write the urdf as xml, one element at a time from the components, without composing it
+        (unless it has already been composed)
+        """
+        skeleton = self._skeleton()
+        if isinstance(skeleton, URDFComposeError):
+            raise skeleton
+        if skeleton is self._result:
+            super().write_to(f)
+        else:
+            skeleton_root = skeleton.getroot()
+            write_streamed(f, skeleton_root, self._streamed_elements(skeleton_root))
+
+    def __repr__(self) -> str:
+        return f"CompositionPlan[{self._base}]"
+
+
+def _plan(base: URDFObjOrError, kind: _StepKind, children: Iterable[URDFObjChild]) -> CompositionPlan:
+    steps = list[tuple[_StepKind, URDFObjOrError, URDFConn]]()
+    for child in children:
+        child_urdf, conn = fix_urdf_obj_child(child)
+        steps.append((kind, child_urdf, conn))
+    return CompositionPlan(base, steps)
+
+
+def lazy_sequence(base: URDFObjOrError, *children: URDFObjChild) -> CompositionPlan:
+    """
+    Like `sequence`, but returns a plan which is only composed when needed
+    """
+    return _plan(base, "append", children)
+
+
+def lazy_branch(urdf: URDFObjOrError, children: Iterable[URDFObjChild]) -> CompositionPlan:
+    """
+    Like `branch`, but returns a plan which is only composed when needed
+    """
+    return _plan(urdf, "attach", children)
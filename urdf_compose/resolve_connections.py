@@ -1,64 +1,81 @@
 from dataclasses import dataclass
+from typing import Literal
 
 from urdf_compose.composed_urdf import URDFConn
+from urdf_compose.instrumentation import phase
 from urdf_compose.urdf_compose_error import URDFComposeError
 from urdf_compose.urdf_obj import URDFObj, check_urdf  # noqa
 
 
-@dataclass
+@dataclass(slots=True)
 class URDFDefConn:
     base_link: str
     extender_link: str
 
 
-def resolve_conn(
+# Why a connection can't be made, without any details, so it is cheap to get (see can_connect)
+ConnectionIssue = Literal[
+    "no_base_link",
+    "multiple_base_links",
+    "no_extender_link",
+    "multiple_extender_links",
+    "non_empty_base_link",
+    "base_link_connected",
+    "extender_link_connected",
+]
+
+
+def _matching_links(urdf: URDFObj, link_name: str | None, default_prefix: str, regular_prefix: str) -> list[str]:
+    if link_name is None:
+        return urdf.index.links_with_prefix(default_prefix)
+    links = urdf.index.named("link")
+    return [name for name in (f"{regular_prefix}-{link_name}", f"{default_prefix}-{link_name}") if name in links]
+
+
+def resolve_conn_issue(
     base_urdf: URDFObj,
     extender_urdf: URDFObj,
     conn: URDFConn,
-) -> URDFDefConn | URDFComposeError:
-    msg = f"Base URDFs: {base_urdf}, Extension URDFs: {extender_urdf}, Connection: {conn}"
+) -> URDFDefConn | ConnectionIssue:
+    """
+    Like resolve_conn, but only says why the connection can't be resolved, rather than building an error
+    """
+    base_links = _matching_links(base_urdf, conn.base_link, "OUTPUT", "output")
+    if len(base_links) != 1:
+        return "no_base_link" if len(base_links) == 0 else "multiple_base_links"
+    extender_links = _matching_links(extender_urdf, conn.extender_link, "INPUT", "input")
+    if len(extender_links) != 1:
+        return "no_extender_link" if len(extender_links) == 0 else "multiple_extender_links"
+    return URDFDefConn(base_links[0], extender_links[0])
 
-    def get_resolve_error(error: str) -> URDFComposeError:
-        return URDFComposeError(f"[{msg}]\n{error}", base_urdf, extender_urdf)
 
-    def check_for_link(
-        urdf: URDFObj, link_name: str | None, default_prefix: str, regular_prefix: str
-    ) -> str | URDFComposeError:
-        real_base_link = None
-        for el in urdf.getroot().findall("link"):
-            name = el.attrib["name"]
-            if (link_name is None and name.find(f"{default_prefix}-") == 0) or (
-                link_name is not None
-                and (name == f"{regular_prefix}-{link_name}" or name == f"{default_prefix}-{link_name}")
-            ):
-                if real_base_link is None:
-                    real_base_link = name
-                else:
-                    return get_resolve_error(
-                        f"Multiple matches for default {default_prefix} link"
-                        if link_name is None
-                        else f"Multiple matches for {regular_prefix} link {link_name}"
-                    )
+def _resolve_error(link_name: str | None, default_prefix: str, regular_prefix: str, multiple: bool) -> str:
+    if multiple:
+        return (
+            f"Multiple matches for default {default_prefix} link"
+            if link_name is None
+            else f"Multiple matches for {regular_prefix} link {link_name}"
+        )
+    return (
+        f"Could not find default {regular_prefix} link"
+        if link_name is None
+        else f"Could not find {regular_prefix} link {regular_prefix}-{link_name} or {default_prefix}-{link_name}"
+    )
 
-        if not real_base_link:
-            return get_resolve_error(
-                f"Could not find default {regular_prefix} link"
-                if link_name is None
-                else (
-                    f"Could not find {regular_prefix} link {regular_prefix}-{link_name} or "
-                    f"{default_prefix}-{link_name}"
-                )
-            )
-        return real_base_link
 
-    real_base_link = check_for_link(base_urdf, conn.base_link, "OUTPUT", "output")
-    if isinstance(real_base_link, URDFComposeError):
-        return real_base_link
-    real_extender_link = check_for_link(extender_urdf, conn.extender_link, "INPUT", "input")
-    if isinstance(real_extender_link, URDFComposeError):
-        return real_extender_link
+@phase("resolve_conn")
+def resolve_conn(
+    base_urdf: URDFObj,
+    extender_urdf: URDFObj,
+    conn: URDFConn,
+) -> URDFDefConn | URDFComposeError:
+    resolved = resolve_conn_issue(base_urdf, extender_urdf, conn)
+    if isinstance(resolved, URDFDefConn):
+        return resolved
 
-    return URDFDefConn(
-        real_base_link,
-        real_extender_link,
-    )
+    if resolved in ("no_base_link", "multiple_base_links"):
+        error = _resolve_error(conn.base_link, "OUTPUT", "output", resolved == "multiple_base_links")
+    else:
+        error = _resolve_error(conn.extender_link, "INPUT", "input", resolved == "multiple_extender_links")
+    msg = f"Base URDFs: {base_urdf}, Extension URDFs: {extender_urdf}, Connection: {conn}"
+    return URDFComposeError(f"[{msg}]\n{error}", base_urdf, extender_urdf)
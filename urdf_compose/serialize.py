@@ -0,0 +1,51 @@
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable
+from typing import BinaryIO
+
+from urdf_compose import xml_backend
+from urdf_compose.instrumentation import phase
+
+XML_DECLARATION = b"<?xml version='1.0' encoding='UTF-8'?>\n"
+
+
+def write_tree(f: BinaryIO, tree: ET.ElementTree) -> None:
+    """
+    Write a whole tree as a UTF-8 xml document, one top level element at a time, so only one
+    is serialized in memory at once
+    """
+    root = tree.getroot()
+    assert root is not None, "Can not write a tree without a root"
+    write_streamed(f, root, iter(root))
+
+
+@phase("serialize")
+def write_streamed(f: BinaryIO, root: ET.Element, elements: Iterable[ET.Element]) -> None:
+    """
+    Write a UTF-8 xml document with the tag, attributes, text and tail of root, and the given
+    top level elements, one element at a time
+
+    Produces the same bytes as write_tree would for root with the elements as its children
+    (for documents without namespaces)
+    """
+    # Serialize root around a placeholder child, to get its start and end tags as ElementTree would
+    shallow_root = ET.Element(root.tag, dict(root.attrib))
+    shallow_root.text = root.text
+    ET.SubElement(shallow_root, "placeholder")
+    start, end = ET.tostring(shallow_root, encoding="utf-8").split(b"<placeholder />")
+
+    f.write(XML_DECLARATION)
+    num_elements = 0
+    for el in elements:
+        if num_elements == 0:
+            f.write(start)
+        f.write(xml_backend.tostring(el))
+        num_elements += 1
+    if num_elements == 0:
+        # ElementTree writes childless elements differently
+        childless_root = ET.Element(root.tag, dict(root.attrib))
+        childless_root.text = root.text
+        f.write(ET.tostring(childless_root, encoding="utf-8"))
+    else:
+        f.write(end)
+    if root.tail:
+        f.write(root.tail.encode("utf-8"))
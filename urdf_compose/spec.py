@@ -0,0 +1,172 @@
+"""
+Declarative assembly specs, which describe composed urdfs as data rather than code
+
+A spec is a JSON or TOML file with the component urdfs, and the composed urdfs to build
+from them, ex:
+
+```toml
+[components]
+rod = "rod.urdf"
+v_rod = "v_rod.urdf"
+
+[outputs]
+"chain.urdf" = { sequence = ["rod", "rod", "rod"] }
+"branched_chain.urdf" = { branch = "v_rod", children = ["rod", { urdf = "rod", conn = "sideways_output" }] }
+```
+
+Each output is an expression, which is one of:
+- the name of a component
+- { sequence = [expression, child, ...] }, see `sequence`
+- { branch = expression, children = [child, ...] }, see `branch`
+
+where a child is either an expression, or { urdf = expression, conn = conn } with conn
+being the base link, or { base_link = ..., extender_link = ... } (see URDFConn).
+Paths are relative to the spec file.
+"""
+
+import json
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from urdf_compose.compose import URDFObjChild, URDFObjOrError, branch, sequence
+from urdf_compose.composed_urdf import URDFConn
+from urdf_compose.urdf_obj import URDFObj
+
+
+class SpecError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AssemblySpec:
+    # component name -> urdf path
+    components: dict[str, Path]
+    # output path -> expression
+    outputs: dict[Path, Any]
+
+
+def _load_toml(path: Path) -> dict[str, Any]:
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        try:
+            import tomli as tomllib
+        except ImportError as e:
+            raise SpecError(f"Reading {path} requires Python 3.11+, or tomli to be installed") from e
+    with open(path, "rb") as f:
+        try:
+            return tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise SpecError(f"{path}: invalid TOML: {e}") from e
+
+
+def _check_conn(conn: Any, where: str) -> None:
+    if isinstance(conn, str):
+        return
+    if not isinstance(conn, dict) or not set(conn) <= {"base_link", "extender_link"}:
+        raise SpecError(f"{where}: conn should be a link name or {{base_link = ..., extender_link = ...}}, got {conn}")
+
+
+def _check_expression(expression: Any, components: Mapping[str, Path], where: str) -> None:
+    if isinstance(expression, str):
+        if expression not in components:
+            raise SpecError(f"{where}: unknown component {expression}")
+    elif isinstance(expression, dict) and set(expression) == {"sequence"}:
+        children = expression["sequence"]
+        if not isinstance(children, list) or len(children) == 0:
+            raise SpecError(f"{where}: sequence should be a non empty list")
+        _check_expression(children[0], components, f"{where}.sequence[0]")
+        for i, child in enumerate(children[1:], start=1):
+            _check_child(child, components, f"{where}.sequence[{i}]")
+    elif isinstance(expression, dict) and set(expression) == {"branch", "children"}:
+        _check_expression(expression["branch"], components, f"{where}.branch")
+        if not isinstance(expression["children"], list):
+            raise SpecError(f"{where}: children should be a list")
+        for i, child in enumerate(expression["children"]):
+            _check_child(child, components, f"{where}.children[{i}]")
+    else:
+        raise SpecError(f"{where}: expected a component name, {{sequence = ...}} or {{branch = ..., children = ...}}")
+
+
+def _check_child(child: Any, components: Mapping[str, Path], where: str) -> None:
+    if isinstance(child, dict) and "urdf" in child:
+        if not set(child) <= {"urdf", "conn"}:
+            raise SpecError(f"{where}: unexpected keys {sorted(set(child) - {'urdf', 'conn'})}")
+        _check_expression(child["urdf"], components, f"{where}.urdf")
+        if "conn" in child:
+            _check_conn(child["conn"], where)
+    else:
+        _check_expression(child, components, where)
+
+
+def load_spec(path: Path) -> AssemblySpec:
+    """
+    Read and validate a JSON (.json) or TOML (.toml) assembly spec
+
+    Raises a SpecError if it is malformed
+    """
+    path = Path(path)
+    if path.suffix == ".toml":
+        raw_spec = _load_toml(path)
+    else:
+        with open(path) as f:
+            try:
+                raw_spec = json.load(f)
+            except json.JSONDecodeError as e:
+                raise SpecError(f"{path}: invalid JSON: {e}") from e
+    if not isinstance(raw_spec, dict) or not set(raw_spec) <= {"components", "outputs"}:
+        raise SpecError(f"{path}: a spec should only have components and outputs")
+    raw_components = raw_spec.get("components", {})
+    raw_outputs = raw_spec.get("outputs", {})
+    if not isinstance(raw_components, dict) or not all(isinstance(p, str) for p in raw_components.values()):
+        raise SpecError(f"{path}: components should map names to urdf paths")
+    if not isinstance(raw_outputs, dict):
+        raise SpecError(f"{path}: outputs should map urdf paths to expressions")
+
+    components = {name: path.parent / component_path for name, component_path in raw_components.items()}
+    for output, expression in raw_outputs.items():
+        _check_expression(expression, components, f"{path}: outputs.{output}")
+    return AssemblySpec(components, {path.parent / output: expression for output, expression in raw_outputs.items()})
+
+
+def expression_components(expression: Any) -> set[str]:
+    """
+    The names of the components used in an expression
+    """
+    if isinstance(expression, str):
+        return {expression}
+    elif "urdf" in expression:
+        return expression_components(expression["urdf"])
+    elif "sequence" in expression:
+        return set().union(*(expression_components(child) for child in expression["sequence"]))
+    else:
+        return expression_components(expression["branch"]).union(
+            *(expression_components(child) for child in expression["children"])
+        )
+
+
+def _compose_child(child: Any, components: Mapping[str, URDFObj]) -> URDFObjChild:
+    if not (isinstance(child, dict) and "urdf" in child):
+        return compose_expression(child, components)
+    conn = child.get("conn", {})
+    urdf_conn = URDFConn(conn) if isinstance(conn, str) else URDFConn(**conn)
+    return compose_expression(child["urdf"], components), urdf_conn
+
+
+def compose_expression(expression: Any, components: Mapping[str, URDFObj]) -> URDFObjOrError:
+    """
+    Compose a (validated) spec expression out of the given components
+    """
+    if isinstance(expression, str):
+        return components[expression]
+    elif "sequence" in expression:
+        base, *children = expression["sequence"]
+        return sequence(compose_expression(base, components), *(_compose_child(c, components) for c in children))
+    else:
+        return branch(
+            compose_expression(expression["branch"], components),
+            [_compose_child(c, components) for c in expression["children"]],
+        )
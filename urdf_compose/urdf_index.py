@@ -0,0 +1,382 @@
+import hashlib
+import xml.etree.ElementTree as ET
+from collections.abc import Container, Iterator, Mapping, Sequence
+
+import urdf_compose.xml_utils as xml
+
+NAME_KEY: str = "name"
+# Attributes through which an element can name, or refer to the name of, a top level element
+REFERENCE_KEYS: tuple[str, ...] = (NAME_KEY, "link")
+
+
+def _reference_name(el: ET.Element) -> str | None:
+    for key in REFERENCE_KEYS:
+        if key in el.attrib:
+            return el.attrib[key]
+    return None
+
+
+def make_name(name: str, suffix: int) -> str:
+    """
+    The name(k) scheme used to make names unique, ex: "joint(2)"
+    """
+    if suffix == 0:
+        return name
+    else:
+        return name + "(" + str(suffix) + ")"
+
+
+def _split_suffix(name: str) -> tuple[str, int] | None:
+    # Inverse of make_name for names with a suffix, ex: "joint(2)" -> ("joint", 2)
+    if not name.endswith(")"):
+        return None
+    start = name.rfind("(")
+    digits = name[start + 1 : -1]
+    if start == -1 or not (digits.isascii() and digits.isdigit()) or digits != str(int(digits)) or int(digits) == 0:
+        return None
+    return name[:start], int(digits)
+
+
+class NameAllocator(Mapping[str, int]):
+    """
+    The top level names in use in a urdf (mapped to the number of elements with that name),
+    which can hand out unused names following the name(k) scheme
+
+    It remembers, per name, a suffix below which every name(k) is taken, so that handing
+    out many suffixes of the same name doesn't probe through all the earlier ones
+    """
+
+    def __init__(self) -> None:
+        self._counts = dict[str, int]()
+        # name -> suffix k such that name(1) ... name(k - 1) are all in use
+        self._next_suffix = dict[str, int]()
+        # The names with more than one element
+        self._duplicates = set[str]()
+
+    def __getitem__(self, name: str) -> int:
+        return self._counts[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._counts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def duplicates(self) -> set[str]:
+        """
+        The names in use by more than one element
+        """
+        return self._duplicates
+
+    def add(self, name: str) -> None:
+        self._counts[name] = self._counts.get(name, 0) + 1
+        if self._counts[name] == 2:
+            self._duplicates.add(name)
+
+    def discard(self, name: str) -> None:
+        self._counts[name] -= 1
+        if self._counts[name] == 1:
+            self._duplicates.discard(name)
+        elif self._counts[name] == 0:
+            del self._counts[name]
+            if (split_name := _split_suffix(name)) is not None:
+                base_name, suffix = split_name
+                if suffix < self._next_suffix.get(base_name, 1):
+                    self._next_suffix[base_name] = suffix
+
+    def _first_unused_suffix(self, name: str) -> int:
+        # The first k such that name(k) isn't in use, remembered for the next time
+        suffix = self._next_suffix.get(name, 1)
+        while make_name(name, suffix) in self._counts:
+            suffix += 1
+        self._next_suffix[name] = suffix
+        return suffix
+
+    def first_available(
+        self, name: str, outlawed_new_names: Container[str] = (), reserved_names: Container[str] = ()
+    ) -> str:
+        """
+        The first of name, name(1), name(2), ... that isn't in use or reserved
+
+        Suffixed names must also not be in outlawed_new_names (the names of the urdf being renamed)
+        """
+        if name not in self._counts and name not in reserved_names:
+            return name
+        suffix = self._first_unused_suffix(name)
+        if isinstance(outlawed_new_names, NameAllocator):
+            # Skip the suffixes it remembers to be in use, which would be skipped anyway
+            suffix = max(suffix, outlawed_new_names._first_unused_suffix(name))
+        while (
+            make_name(name, suffix) in self._counts
+            or make_name(name, suffix) in outlawed_new_names
+            or make_name(name, suffix) in reserved_names
+        ):
+            suffix += 1
+        return make_name(name, suffix)
+
+
+def _name_prefix(name: str) -> str | None:
+    # ex: "OUTPUT" for "OUTPUT-rod"
+    prefix, sep, _ = name.partition("-")
+    return prefix if sep else None
+
+
+class URDFIndex:
+    """
+    Lookups into the elements of a urdf by name, kept up to date as the urdf is mutated
+    so that they don't require scanning the tree
+
+    Top level elements are looked up by tag and name. Every element that names or refers to
+    a name (through a "name" or "link" attribute) is also tracked, so that renames only touch
+    the elements that use the name.
+
+    Note: mutations of the tree that don't go through the index won't be reflected in it
+    """
+
+    def __init__(self, root: ET.Element) -> None:
+        # tag -> name -> top level element
+        self._by_tag = dict[str, dict[str, ET.Element]]()
+        # top level names, with the number of top level elements with each name
+        self._names = NameAllocator()
+        # prefix -> link names with that prefix, ordered as they were added
+        self._links_by_prefix = dict[str, dict[str, None]]()
+        # name -> every element, at any depth, naming or referring to that name,
+        #   along with the top level element it is in (as dict keys, so they can be removed in O(1))
+        self._references = dict[str, dict[tuple[ET.Element, ET.Element], None]]()
+        self._top_level = set[ET.Element]()
+        # link name -> top level joints with that link as their parent/child
+        self._joints_by_parent = dict[str, list[ET.Element]]()
+        self._joints_by_child = dict[str, list[ET.Element]]()
+        # structural hash (see xml_utils.el_hash) -> top level materials with that hash
+        self._materials_by_hash = dict[int, list[ET.Element]]()
+        # The hashes with more than one material
+        self._shared_material_hashes = set[int]()
+        # Memoized xml_utils.fingerprint of elements in the urdf, and of the urdf as a whole
+        self._fingerprints = dict[ET.Element, bytes]()
+        self._urdf_fingerprint: bytes | None = None
+
+        for el in root:
+            self.add(el)
+
+    def find(self, tag: str | None, name: str) -> ET.Element | None:
+        """
+        Find the top level element with the given name, and the given tag if it isn't None
+        """
+        if tag is not None:
+            return self._by_tag.get(tag, {}).get(name)
+        for elements in self._by_tag.values():
+            if (el := elements.get(name)) is not None:
+                return el
+        return None
+
+    def names(self) -> NameAllocator:
+        """
+        All names of top level elements (mapped to the number of elements with that name)
+        """
+        return self._names
+
+    def named(self, tag: str) -> Mapping[str, ET.Element]:
+        """
+        The top level elements with the given tag, by name
+        """
+        return self._by_tag.get(tag, {})
+
+    def links_with_prefix(self, prefix: str) -> list[str]:
+        """
+        The names of links that start with f"{prefix}-"
+        """
+        return list(self._links_by_prefix.get(prefix, {}))
+
+    def joints_with_parent(self, link: str) -> Sequence[ET.Element]:
+        """
+        The top level joints whose parent is the given link
+        """
+        return self._joints_by_parent.get(link, [])
+
+    def joints_with_child(self, link: str) -> Sequence[ET.Element]:
+        """
+        The top level joints whose child is the given link
+        """
+        return self._joints_by_child.get(link, [])
+
+    def fingerprint(self, root: ET.Element) -> bytes:
+        """
+        A digest of the top level elements of the urdf (see xml_utils.fingerprint), memoized
+        until the urdf is mutated
+        """
+        if self._urdf_fingerprint is None:
+            digest = hashlib.blake2b(str(len(root)).encode(), digest_size=16)
+            for el in root:
+                digest.update(xml.fingerprint(el, self._fingerprints))
+            self._urdf_fingerprint = digest.digest()
+        return self._urdf_fingerprint
+
+    def invalidate_fingerprint(self) -> None:
+        """
+        Forget every memoized fingerprint, for when the tree was mutated without the index
+        """
+        self._fingerprints.clear()
+        self._urdf_fingerprint = None
+
+    def _invalidate_fingerprints(self, top_level_el: ET.Element) -> None:
+        self._urdf_fingerprint = None
+        if top_level_el in self._fingerprints:
+            for el in top_level_el.iter():
+                self._fingerprints.pop(el, None)
+
+    def find_equal_material(self, material: ET.Element) -> ET.Element | None:
+        """
+        Find a top level material equal to the given one (according to xml_utils.el_equal)
+        """
+        for el in self._materials_by_hash.get(xml.el_hash(material), []):
+            if xml.el_equal(el, material):
+                return el
+        return None
+
+    def num_material_hashes(self) -> int:
+        """
+        The number of distinct structural hashes of top level materials (about the number of materials)
+        """
+        return len(self._materials_by_hash)
+
+    def materials(self) -> Iterator[ET.Element]:
+        """
+        The top level materials, grouped by structural hash
+        """
+        for materials in self._materials_by_hash.values():
+            yield from materials
+
+    def materials_with_shared_hashes(self) -> Iterator[ET.Element]:
+        """
+        The top level materials whose structural hash is shared with another material, which
+        includes every material with an equal one in the urdf
+        """
+        for el_hash in self._shared_material_hashes:
+            yield from self._materials_by_hash[el_hash]
+
+    def _add_material(self, el: ET.Element) -> None:
+        el_hash = xml.el_hash(el)
+        materials = self._materials_by_hash.setdefault(el_hash, [])
+        materials.append(el)
+        if len(materials) == 2:
+            self._shared_material_hashes.add(el_hash)
+
+    def _remove_material(self, el: ET.Element) -> None:
+        el_hash = xml.el_hash(el)
+        materials = self._materials_by_hash[el_hash]
+        materials.remove(el)
+        if len(materials) == 1:
+            self._shared_material_hashes.discard(el_hash)
+        elif len(materials) == 0:
+            del self._materials_by_hash[el_hash]
+
+    def _joint_adjacencies(self, el: ET.Element) -> Iterator[tuple[dict[str, list[ET.Element]], str]]:
+        if el.tag != "joint":
+            return
+        for sub_tag, joints_by_link in (("parent", self._joints_by_parent), ("child", self._joints_by_child)):
+            sub_el = el.find(sub_tag)
+            if sub_el is not None and (link := sub_el.attrib.get("link")) is not None:
+                yield joints_by_link, link
+
+    def _add_name(self, el: ET.Element, name: str) -> None:
+        self._by_tag.setdefault(el.tag, {}).setdefault(name, el)
+        self._names.add(name)
+        if el.tag == "link" and (prefix := _name_prefix(name)) is not None:
+            self._links_by_prefix.setdefault(prefix, {})[name] = None
+
+    def _remove_name(self, el: ET.Element, name: str) -> None:
+        elements = self._by_tag.get(el.tag, {})
+        if elements.get(name) is el:
+            del elements[name]
+        self._names.discard(name)
+        if name not in self._names:
+            if el.tag == "link" and (prefix := _name_prefix(name)) is not None:
+                del self._links_by_prefix[prefix][name]
+
+    def add(self, el: ET.Element) -> None:
+        """
+        Index an element that was added to the top level of the urdf
+        """
+        self._top_level.add(el)
+        self._urdf_fingerprint = None
+        if (name := el.attrib.get(NAME_KEY)) is not None:
+            self._add_name(el, name)
+        if el.tag == "material":
+            self._add_material(el)
+        for joints_by_link, link in self._joint_adjacencies(el):
+            joints_by_link.setdefault(link, []).append(el)
+        for sub_el in el.iter():
+            if (ref_name := _reference_name(sub_el)) is not None:
+                self._references.setdefault(ref_name, {})[(sub_el, el)] = None
+
+    def remove(self, el: ET.Element) -> None:
+        """
+        Unindex an element that was removed from the top level of the urdf
+        """
+        self._top_level.remove(el)
+        self._invalidate_fingerprints(el)
+        if (name := el.attrib.get(NAME_KEY)) is not None:
+            self._remove_name(el, name)
+        if el.tag == "material":
+            self._remove_material(el)
+        for joints_by_link, link in self._joint_adjacencies(el):
+            joints = joints_by_link[link]
+            joints.remove(el)
+            if len(joints) == 0:
+                del joints_by_link[link]
+        for sub_el in el.iter():
+            if (ref_name := _reference_name(sub_el)) is not None:
+                references = self._references[ref_name]
+                del references[(sub_el, el)]
+                if len(references) == 0:
+                    del self._references[ref_name]
+
+    def rename(self, name_map: Mapping[str, str]) -> None:
+        """
+        Rename every element naming or referring to a name in name_map
+
+        Renames are applied simultaneously, so {"a": "b", "b": "a"} swaps the names
+        """
+        renamed = [
+            (name, new_name, self._references.pop(name))
+            for name, new_name in name_map.items()
+            if name != new_name and name in self._references
+        ]
+        # Unindex all the old names before indexing any new ones, so swapped names don't clash
+        for name, _, references in renamed:
+            for el, top_level_el in references:
+                self._invalidate_fingerprints(top_level_el)
+                if self._is_named_top_level(el):
+                    self._remove_name(el, name)
+                    if el.tag == "material":
+                        self._remove_material(el)
+        moved_joints = [
+            (joints_by_link, new_name, joints_by_link.pop(name))
+            for name, new_name, _ in renamed
+            for joints_by_link in (self._joints_by_parent, self._joints_by_child)
+            if name in joints_by_link
+        ]
+        for joints_by_link, new_name, joints in moved_joints:
+            joints_by_link.setdefault(new_name, []).extend(joints)
+        for _, new_name, references in renamed:
+            for el, _ in references:
+                self._set_reference_name(el, new_name)
+            self._references.setdefault(new_name, {}).update(references)
+        for _, new_name, references in renamed:
+            for el, _ in references:
+                if self._is_named_top_level(el):
+                    self._add_name(el, new_name)
+                    if el.tag == "material":
+                        self._add_material(el)
+
+    def _is_named_top_level(self, el: ET.Element) -> bool:
+        return el in self._top_level and NAME_KEY in el.attrib
+
+    @staticmethod
+    def _set_reference_name(el: ET.Element, name: str) -> None:
+        for key in REFERENCE_KEYS:
+            if key in el.attrib:
+                el.attrib[key] = name
@@ -1,8 +1,22 @@
-import os
+import io
 import subprocess
+import tempfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import BinaryIO, Literal, NamedTuple, TypeAlias
 
+from urdf_compose import xml_backend
+from urdf_compose.check_cache import (
+    CheckCacheInfo,
+    CheckURDFCache,
+    check_urdf_version,
+    default_check_cache_dir,
+)
+from urdf_compose.instrumentation import phase
+from urdf_compose.parse_cache import cached_check_results, parse_cached
+from urdf_compose.serialize import write_tree
+from urdf_compose.urdf_index import URDFIndex
+from urdf_compose.validate import urdf_problems
 from urdf_compose.xml_utils import elements_equal
 
 # URDFObj should not be specific to us as Tutor
@@ -33,10 +47,92 @@ def globally_enable_check_urdf() -> None:
     _global_check_urdf_enabled = True
 
 
-def check_urdf(urdf_path: Path) -> CheckURDFFailure | None:
-    if not _global_check_urdf_enabled:
-        return None
+CheckURDFMode: TypeAlias = Literal["subprocess", "in_process"]
+"""
+How urdfs are checked when loaded and written:
+- "subprocess": by running check_urdf on the file
+- "in_process": by validating the in memory urdf (see URDFObj.validate), without check_urdf
+"""
+_check_urdf_mode: CheckURDFMode = "subprocess"
+
+
+def set_check_urdf_mode(mode: CheckURDFMode) -> None:
+    """
+    Choose how urdfs are checked, see CheckURDFMode
+    The "in_process" mode doesn't need check_urdf to be installed, and doesn't touch the disk
+    """
+    global _check_urdf_mode
+    _check_urdf_mode = mode
+
+
+def get_check_urdf_mode() -> CheckURDFMode:
+    return _check_urdf_mode
+
+
+_check_urdf_cache: CheckURDFCache | None = None
+_check_urdf_version: str | None = None
+
+
+def enable_check_urdf_cache(directory: Path | None = None, max_entries: int = 10_000) -> None:
+    """
+    Cache check_urdf results on disk, so files with the same contents are only checked once,
+    across runs and processes, until check_urdf changes
+
+    directory defaults to ~/.cache/urdf_compose/check_urdf (see default_check_cache_dir)
+    Once there are more than max_entries results, the least recently used are evicted (see CheckURDFCache)
+    """
+    global _check_urdf_cache, _check_urdf_version
+    _check_urdf_cache = CheckURDFCache(default_check_cache_dir() if directory is None else directory, max_entries)
+    _check_urdf_version = check_urdf_version()
+
+
+def disable_check_urdf_cache() -> None:
+    """
+    Stop using the check_urdf cache (the results already on disk are kept)
+    """
+    global _check_urdf_cache
+    _check_urdf_cache = None
+
+
+def clear_check_urdf_cache() -> None:
+    """
+    Delete every result in the check_urdf cache, if it is enabled
+    """
+    if _check_urdf_cache is not None:
+        _check_urdf_cache.clear()
+
+
+def check_urdf_cache_info() -> CheckCacheInfo | None:
+    """
+    Hit and miss statistics of the check_urdf cache, or None if it isn't enabled
+    """
+    return None if _check_urdf_cache is None else _check_urdf_cache.info()
+
+
+class CheckURDFSettings(NamedTuple):
+    enabled: bool
+    mode: CheckURDFMode
+    cache: CheckURDFCache | None
+    cache_version: str | None
+
+
+def get_check_urdf_settings() -> CheckURDFSettings:
+    """
+    The global check_urdf settings, so they can be passed on to other processes
+    """
+    return CheckURDFSettings(_global_check_urdf_enabled, _check_urdf_mode, _check_urdf_cache, _check_urdf_version)
+
+
+def set_check_urdf_settings(settings: CheckURDFSettings) -> None:
+    global _global_check_urdf_enabled, _check_urdf_mode, _check_urdf_cache, _check_urdf_version
+    _global_check_urdf_enabled, _check_urdf_mode, _check_urdf_cache, _check_urdf_version = settings
 
+
+@phase("check_urdf")
+def _run_check_urdf(urdf_path: Path) -> str:
+    """
+    The error output of check_urdf on the file, which is empty if it is valid
+    """
     with subprocess.Popen(
         [f'check_urdf "{urdf_path}" > /dev/null'],
         stdout=subprocess.PIPE,
@@ -44,37 +140,126 @@ def check_urdf(urdf_path: Path) -> CheckURDFFailure | None:
         shell=True,
     ) as p:
         assert p.stderr is not None, "Pstderr was None"
-        stderr = str(p.stderr.read(), "utf-8")
+        return str(p.stderr.read(), "utf-8")
+
+
+def check_urdf(urdf_path: Path) -> CheckURDFFailure | None:
+    if not _global_check_urdf_enabled:
+        return None
+
+    # Without a check_urdf version, results can't safely be reused
+    if _check_urdf_cache is None or _check_urdf_version is None:
+        stderr = _run_check_urdf(urdf_path)
+    else:
+        key = _check_urdf_cache.key(urdf_path, _check_urdf_version)
+        cached_stderr = _check_urdf_cache.get(key)
+        if cached_stderr is None:
+            stderr = _run_check_urdf(urdf_path)
+            _check_urdf_cache.put(key, stderr)
+        else:
+            stderr = cached_stderr
     if stderr == "":
         return None
     return CheckURDFFailure(stderr)
 
 
+def check_urdf_obj(urdf: "URDFObj", path: Path | None = None) -> CheckURDFFailure | None:
+    """
+    Check the urdf according to the check urdf mode
+
+    path is where the urdf is written, if anywhere. In "subprocess" mode, urdfs that
+    aren't written anywhere are written to a temporary file to be checked
+    """
+    if not _global_check_urdf_enabled:
+        return None
+    if _check_urdf_mode == "in_process":
+        return urdf.validate()
+    if path is not None:
+        return check_urdf(path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir) / "check.urdf"
+        urdf.write_xml(tmp_path)
+        return check_urdf(tmp_path)
+
+
 class URDFObj:
     """
     Represents a single urdf
     """
 
-    def __init__(self, tree: ET.ElementTree):
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: ET.ElementTree, index: URDFIndex | None = None):
         self.tree = tree
+        self.index = URDFIndex(self.getroot()) if index is None else index
 
     def getroot(self) -> ET.Element:
         return self.tree.getroot()
 
     def write_xml(self, dest: Path) -> None:
-        dir = dest.parent
-        if not dir.is_dir():
-            os.makedirs(str(dest.parents[0]))
-        dest.touch(exist_ok=True)
-        self.tree.write(str(dest), xml_declaration=True, encoding="UTF-8")
+        # exist_ok, as other threads may be writing to the same directory
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with open(dest, "wb") as f:
+            self.write_to(f)
+
+    def write_to(self, f: BinaryIO) -> None:
+        """
+        Write the urdf as xml to a binary file like object
+        """
+        write_tree(f, self.tree)
+
+    def to_bytes(self) -> bytes:
+        """
+        The urdf as xml
+        """
+        f = io.BytesIO()
+        self.write_to(f)
+        return f.getvalue()
+
+    def _identity(self) -> "URDFObj":
+        """
+        The urdf this stands for in name maps, which is itself unless this is a stand in
+        for another urdf (see plan.py)
+        """
+        return self
 
     def __hash__(self) -> int:
-        return hash(id(self))
+        return hash(id(self._identity()))
 
     def __eq__(self, __value: object) -> bool:
-        return isinstance(__value, URDFObj) and id(self) == id(__value)
+        return isinstance(__value, URDFObj) and self._identity() is __value._identity()
+
+    def fingerprint(self) -> bytes:
+        """
+        A digest of the structure of the urdf, such that urdfs with the same fingerprint
+        have the same structure (barring a 128 bit hash collision)
+
+        It is memoized until the urdf is mutated through urdf_compose. After editing the tree
+        directly, call invalidate_fingerprint
+        """
+        return self.index.fingerprint(self.getroot())
+
+    def invalidate_fingerprint(self) -> None:
+        """
+        Forget the memoized fingerprint, so it is computed again from the tree as it is now
+
+        Needed after editing the tree directly (rather than through urdf_compose), which the
+        memoized fingerprint doesn't follow
+        """
+        self.index.invalidate_fingerprint()
+
+    def same_structure(self, urdf: "URDFObj", use_fingerprint: bool = True) -> bool:
+        """
+        Whether the top level elements of the urdfs are all equal (see xml_utils.elements_equal)
+
+        By default this compares memoized fingerprints, so comparing against the same urdfs
+        repeatedly is cheap. Fingerprints don't follow edits made to a tree directly: call
+        invalidate_fingerprint after such edits, or pass use_fingerprint=False for an element
+        by element comparison
+        """
+        if use_fingerprint:
+            return self.fingerprint() == urdf.fingerprint()
 
-    def same_structure(self, urdf: "URDFObj") -> bool:
         root1 = self.getroot()
         root2 = urdf.getroot()
 
@@ -87,6 +272,14 @@ class URDFObj:
 
         return True
 
+    @phase("validate")
+    def validate(self) -> CheckURDFFailure | None:
+        """
+        Check the structure of the urdf in process, without check_urdf (see validate.urdf_problems)
+        """
+        problems = urdf_problems(self.getroot())
+        return None if len(problems) == 0 else CheckURDFFailure("\n".join(problems))
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}[{self.getroot().attrib['name']}]"
 
@@ -94,21 +287,40 @@ class URDFObj:
 class ExplicitURDFObj(URDFObj):
     """
     Represents the urdf of a certain file
+
+    With use_cache, the parsed file comes from a process wide cache (see parse_cache_info), so
+    loading the same file many times only parses it once. The tree and index are then shared
+    with the other ExplicitURDFObjs of the file loaded with use_cache, and must be treated as
+    read only--composition always copies them before changing anything. By default, the file
+    is parsed into a tree of this urdf's own.
+
+    Either way, how the file did when checked is cached (with the parsed files, until the file
+    changes, see clear_parse_cache), so each file is only checked once per check_urdf mode and
+    version.
     """
 
-    def __init__(self, path: Path, check: bool = True):
+    __slots__ = ("path",)
+
+    def __init__(self, path: Path, check: bool = True, use_cache: bool = False):
         self.path = Path(path)
         if not self.path.exists():
             raise RuntimeError(f"Attempted to create URDFObj from non-existent file {self.path}")
 
-        tree = ET.ElementTree()
-        tree.parse(str(self.path))
-        super().__init__(tree)
+        parsed = parse_cached(self.path) if use_cache else None
+        if parsed is not None:
+            super().__init__(parsed.tree, parsed.urdf_index)
+        else:
+            super().__init__(xml_backend.parse(self.path))
 
-        if check:
-            check_urdf_result = check_urdf(path)
-            if check_urdf_result is not None:
-                raise check_urdf_result
+        if check and _global_check_urdf_enabled:
+            check_results = cached_check_results(self.path) if parsed is None else parsed.check_results
+            checked_by = (_check_urdf_mode, _check_urdf_version)
+            if checked_by not in check_results:
+                check_urdf_result = check_urdf_obj(self, self.path)
+                check_results[checked_by] = None if check_urdf_result is None else str(check_urdf_result)
+            failure = check_results[checked_by]
+            if failure is not None:
+                raise CheckURDFFailure(failure)
 
     def __repr__(self) -> str:
         return f"ExplicitURDFObj from {self.path.name}"
@@ -1,11 +1,9 @@
 import xml.etree.ElementTree as ET
 from collections.abc import Iterator
 
-import urdf_compose.xml_utils as xml
+from urdf_compose.urdf_index import NAME_KEY
 from urdf_compose.urdf_obj import URDFObj
 
-NAME_KEY: str = "name"
-
 name_key_set = frozenset([NAME_KEY])
 
 
@@ -27,18 +25,11 @@ def set_name(i: ET.Element, name: str, name_keys: frozenset[str] = name_key_set)
 
 
 def all_names(urdf: URDFObj) -> set[str]:
-    names = set()
-    for i in urdf.getroot():
-        if name := get_name(i):
-            names.add(name)
-    return names
+    return set(urdf.index.names())
 
 
 def find_element_named(urdf: URDFObj, element: str | None, name: str) -> ET.Element | None:
-    for el, val in xml.xml_attributes(urdf.getroot(), element, "name"):
-        if val == name:
-            return el
-    return None
+    return urdf.index.find(element, name)
 
 
 def iter_model_attribute(urdf: URDFObj, element: str, attribute: str) -> Iterator[tuple[ET.Element, str]]:
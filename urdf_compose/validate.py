@@ -0,0 +1,115 @@
+import math
+import xml.etree.ElementTree as ET
+from collections import Counter
+
+JOINT_TYPES = frozenset(("revolute", "continuous", "prismatic", "fixed", "floating", "planar"))
+# Joint types that check_urdf requires to have a <limit effort=... velocity=...>
+LIMITED_JOINT_TYPES = frozenset(("revolute", "prismatic"))
+# Top level tags whose names must be unique
+UNIQUELY_NAMED_TAGS = ("link", "joint", "material")
+
+
+def _vector_problem(el: ET.Element, attr: str) -> str | None:
+    value = el.attrib.get(attr)
+    if value is None:
+        return None
+    parts = value.split()
+    if len(parts) != 3:
+        return f'{attr}="{value}" should have 3 values'
+    try:
+        if not all(math.isfinite(float(part)) for part in parts):
+            return f'{attr}="{value}" should be finite'
+    except ValueError:
+        return f'{attr}="{value}" should be numbers'
+    return None
+
+
+def _joint_problems(joint: ET.Element, link_names: set[str]) -> list[str]:
+    name = joint.attrib.get("name")
+    problems = list[str]()
+    joint_type = joint.attrib.get("type")
+    if joint_type not in JOINT_TYPES:
+        problems.append(f"Joint {name} has invalid type {joint_type}")
+    if joint_type in LIMITED_JOINT_TYPES:
+        limit = joint.find("limit")
+        if limit is None or "effort" not in limit.attrib or "velocity" not in limit.attrib:
+            problems.append(f"Joint {name} is of type {joint_type} but doesn't specify an effort and velocity limit")
+    for sub_tag in ("parent", "child"):
+        sub_el = joint.find(sub_tag)
+        if sub_el is None or "link" not in sub_el.attrib:
+            problems.append(f"Joint {name} has no {sub_tag} link")
+        elif sub_el.attrib["link"] not in link_names:
+            problems.append(f"Joint {name} has {sub_tag} link {sub_el.attrib['link']}, which doesn't exist")
+    for el, attrs in ((joint.find("origin"), ("xyz", "rpy")), (joint.find("axis"), ("xyz",))):
+        if el is None:
+            continue
+        for attr in attrs:
+            if (problem := _vector_problem(el, attr)) is not None:
+                problems.append(f"Joint {name} {el.tag} {problem}")
+    return problems
+
+
+def _tree_problems(root: ET.Element, link_names: set[str]) -> list[str]:
+    # Valid joints only, the others have already been reported
+    parent_of = dict[str, str]()
+    children_of = dict[str, list[str]]()
+    problems = list[str]()
+    for joint in root.iterfind("joint"):
+        parent = joint.find("parent")
+        child = joint.find("child")
+        if parent is None or child is None:
+            continue
+        parent_link = parent.attrib.get("link")
+        child_link = child.attrib.get("link")
+        if parent_link not in link_names or child_link not in link_names:
+            continue
+        assert parent_link is not None and child_link is not None, "Links are in link_names"
+        if child_link in parent_of:
+            problems.append(f"Link {child_link} has multiple parents, {parent_of[child_link]} and {parent_link}")
+            continue
+        parent_of[child_link] = parent_link
+        children_of.setdefault(parent_link, []).append(child_link)
+
+    root_links = [name for name in link_names if name not in parent_of]
+    if len(root_links) != 1:
+        problems.append(f"Expected a single root link, found {sorted(root_links)}")
+        return problems
+
+    # Every link has at most one parent and there is a single root, so a link can only
+    #   be unreachable from the root if it is in a cycle
+    reached = {root_links[0]}
+    to_visit = [root_links[0]]
+    while len(to_visit) > 0:
+        for child_link in children_of.get(to_visit.pop(), []):
+            if child_link not in reached:
+                reached.add(child_link)
+                to_visit.append(child_link)
+    if len(reached) != len(link_names):
+        problems.append(f"Links {sorted(link_names - reached)} are in a cycle")
+    return problems
+
+
+def urdf_problems(root: ET.Element) -> list[str]:
+    """
+    The structural problems in a urdf, found without check_urdf
+
+    Checks for unique names, valid joint types, that joints' parent and child links exist,
+    well formed joint origins and axes, and that the links form a tree with a single root
+    """
+    if root.tag != "robot":
+        return [f"Root element is {root.tag}, expected robot"]
+
+    problems = list[str]()
+    for tag in UNIQUELY_NAMED_TAGS:
+        name_counts = Counter(el.attrib.get("name") for el in root.iterfind(tag))
+        if None in name_counts:
+            problems.append(f"{name_counts.pop(None)} {tag}(s) have no name")
+        problems.extend(f"{tag} {name} is not unique" for name, count in name_counts.items() if count > 1)
+
+    link_names = {el.attrib["name"] for el in root.iterfind("link") if "name" in el.attrib}
+    if len(link_names) == 0:
+        return problems + ["No links found"]
+    for joint in root.iterfind("joint"):
+        problems.extend(_joint_problems(joint, link_names))
+    problems.extend(_tree_problems(root, link_names))
+    return problems
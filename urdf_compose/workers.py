@@ -0,0 +1,31 @@
+"""
+State shared by the worker processes of generate_configurations and build_spec
+"""
+
+from pathlib import Path
+
+from urdf_compose.urdf_obj import (
+    CheckURDFSettings,
+    ExplicitURDFObj,
+    set_check_urdf_settings,
+)
+
+# path -> component, loaded once per worker process
+_worker_components = dict[Path, ExplicitURDFObj]()
+
+
+def init_worker(check_urdf_settings: CheckURDFSettings) -> None:
+    """
+    Set up a worker process, with the check_urdf settings of the process that started it
+    """
+    set_check_urdf_settings(check_urdf_settings)
+    _worker_components.clear()
+
+
+def load_component(path: Path, check: bool) -> ExplicitURDFObj:
+    """
+    The component urdf at path, only loaded the first time it is used by this worker process
+    """
+    if (component := _worker_components.get(path)) is None:
+        component = _worker_components[path] = ExplicitURDFObj(path, check, use_cache=True)
+    return component
@@ -0,0 +1,180 @@
+"""
+The xml library urdfs are parsed, copied and written with
+
+lxml is used when it is installed (it parses, copies and serializes much faster), and
+xml.etree.ElementTree otherwise. Either way the trees are used through the ElementTree
+API, and are written as exactly the same bytes, so which backend is in use only affects speed.
+
+Trees of both backends can be mixed: copy_tree and copy_element convert elements to the
+backend of what they are being put in, and tostring writes elements of either.
+"""
+
+import copy
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Literal
+
+from urdf_compose import instrumentation
+from urdf_compose.instrumentation import phase
+
+try:
+    import lxml.etree as LET  # type: ignore[import-untyped]
+except ImportError:  # pragma: no cover
+    LET = None
+
+XMLBackend = Literal["lxml", "etree"]
+
+# Comments, processing instructions and entities are dropped, as ElementTree drops them
+_lxml_parser = LET.XMLParser(remove_comments=True, remove_pis=True, resolve_entities=False) if LET is not None else None
+
+_xml_backend: XMLBackend = "lxml" if LET is not None else "etree"
+
+
+def lxml_available() -> bool:
+    return LET is not None
+
+
+def set_xml_backend(backend: XMLBackend | Literal["auto"]) -> None:
+    """
+    Parse and copy urdfs with lxml, the standard library's ElementTree ("etree"), or lxml
+    if it is installed ("auto", the default)
+
+    Only affects urdfs parsed and copied afterwards
+    """
+    global _xml_backend
+    if backend == "auto":
+        backend = "lxml" if LET is not None else "etree"
+    elif backend == "lxml" and LET is None:
+        raise ImportError("The lxml xml backend requires lxml to be installed")
+    elif backend not in ("lxml", "etree"):
+        raise ValueError(f"Unknown xml backend {backend}, expected lxml, etree or auto")
+    _xml_backend = backend
+
+
+def get_xml_backend() -> XMLBackend:
+    return _xml_backend
+
+
+def is_lxml(el: ET.Element) -> bool:
+    return LET is not None and isinstance(el, LET._Element)
+
+
+def element_backend(el: ET.Element) -> XMLBackend:
+    return "lxml" if is_lxml(el) else "etree"
+
+
+@phase("parse")
+def parse(path: Path) -> ET.ElementTree:
+    if _xml_backend == "lxml":
+        tree: ET.ElementTree = LET.parse(str(path), _lxml_parser)
+    else:
+        tree = ET.ElementTree()
+        tree.parse(str(path))
+    if instrumentation.is_instrumenting():
+        instrumentation.count("parsed_elements", sum(1 for _ in tree.iter()))
+    return tree
+
+
+def fromstring(text: str, backend: XMLBackend | None = None) -> ET.Element:
+    """
+    Parse an element with the given backend (by default, the one in use)
+    """
+    if (backend or _xml_backend) == "lxml":
+        el: ET.Element = LET.fromstring(text, _lxml_parser)
+        return el
+    return ET.fromstring(text)
+
+
+def new_element(tag: str, attrib: dict[str, str], backend: XMLBackend | None = None) -> ET.Element:
+    if (backend or _xml_backend) == "lxml":
+        el: ET.Element = LET.Element(tag, attrib)
+        return el
+    return ET.Element(tag, attrib)
+
+
+def sub_element(parent: ET.Element, tag: str, attrib: dict[str, str]) -> ET.Element:
+    """
+    Add a new element to parent, of parent's backend
+    """
+    if is_lxml(parent):
+        el: ET.Element = LET.SubElement(parent, tag, attrib)
+        return el
+    return ET.SubElement(parent, tag, attrib)
+
+
+def element_tree(root: ET.Element) -> ET.ElementTree:
+    if is_lxml(root):
+        tree: ET.ElementTree = root.getroottree()  # type: ignore[attr-defined]
+        return tree
+    return ET.ElementTree(root)
+
+
+def _convert(el: ET.Element, backend: XMLBackend) -> ET.Element:
+    # A copy of el (with its tail) of the other backend
+    text = _etree_tostring(el, with_tail=False) if backend == "lxml" else _lxml_tostring(el, with_tail=False)
+    converted = fromstring(text.decode("utf-8"), backend)
+    converted.tail = el.tail
+    return converted
+
+
+def copy_element(el: ET.Element, backend: XMLBackend | None = None) -> ET.Element:
+    """
+    A deep copy of el, of the given backend (by default, the one in use)
+    """
+    backend = backend or _xml_backend
+    if instrumentation.is_instrumenting():
+        instrumentation.count("copied_elements", sum(1 for _ in el.iter()))
+    if element_backend(el) == backend:
+        return copy.deepcopy(el)
+    return _convert(el, backend)
+
+
+@phase("copy_tree")
+def copy_tree(tree: ET.ElementTree) -> ET.ElementTree:
+    """
+    A deep copy of tree, of the backend in use
+    """
+    root = tree.getroot()
+    assert root is not None, "Can not copy a tree without a root"
+    if instrumentation.is_instrumenting():
+        instrumentation.count("copied_trees")
+        instrumentation.count("copied_elements", sum(1 for _ in root.iter()))
+    if element_backend(root) == _xml_backend:
+        return copy.deepcopy(tree)
+    return element_tree(_convert(root, _xml_backend))
+
+
+def _etree_tostring(el: ET.Element, with_tail: bool = True) -> bytes:
+    tail = el.tail
+    if not with_tail:
+        el.tail = None
+    try:
+        text: bytes = ET.tostring(el, encoding="utf-8")
+    finally:
+        el.tail = tail
+    return text
+
+
+def _lxml_tostring(el: ET.Element, with_tail: bool = True) -> bytes:
+    text: bytes = LET.tostring(el, encoding="utf-8", with_tail=with_tail)
+    return text
+
+
+# What lxml writes differently from ElementTree, which are written by ElementTree instead:
+# carriage returns in text (which ElementTree doesn't escape), comments and processing
+# instructions (which may contain "/>"), and namespaces (which ElementTree renames)
+_LXML_FALLBACK_MARKERS = (b"&#13;", b"<!--", b"<?", b"xmlns")
+
+
+def tostring(el: ET.Element) -> bytes:
+    """
+    The UTF-8 xml of el (with its tail, and without an xml declaration), exactly as
+    ElementTree writes it, whichever backend el is of
+    """
+    if not is_lxml(el):
+        return _etree_tostring(el)
+    text = _lxml_tostring(el)
+    if any(marker in text for marker in _LXML_FALLBACK_MARKERS):
+        return _etree_tostring(_convert(el, "etree"))
+    # ElementTree writes a space before the end of empty elements, and escapes tabs with two digits
+    return text.replace(b"/>", b" />").replace(b"&#9;", b"&#09;")
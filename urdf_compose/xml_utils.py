@@ -1,5 +1,6 @@
+import hashlib
 import xml.etree.ElementTree as ET
-from collections.abc import Iterator
+from collections.abc import Iterator, MutableMapping
 
 
 def xml_attributes(el: ET.Element, element: str | None, attribute: str) -> Iterator[tuple[ET.Element, str]]:
@@ -18,9 +19,36 @@ def el_equal(el1: ET.Element, el2: ET.Element) -> bool:
     return header_eq and contents_eq
 
 
+def el_hash(el: ET.Element) -> int:
+    """
+    A structural hash of the element, such that el_equal(el1, el2) implies el_hash(el1) == el_hash(el2)
+    """
+    return hash((el.tag, frozenset(el.attrib.items()), tuple(el_hash(el_) for el_ in el)))
+
+
 def elements_info_equal(e1: ET.Element, e2: ET.Element) -> bool:
     return e1.tag == e2.tag and e1.text == e2.text and e1.tail == e2.tail and e1.attrib == e2.attrib
 
 
 def elements_equal(e1: ET.Element, e2: ET.Element) -> bool:
     return elements_info_equal(e1, e2) and len(e1) == len(e2) and all(elements_equal(c1, c2) for c1, c2 in zip(e1, e2))
+
+
+def fingerprint(el: ET.Element, cache: MutableMapping[ET.Element, bytes] | None = None) -> bytes:
+    """
+    A Merkle-style digest of the element and everything in it, such that equal digests
+    mean elements_equal holds (barring a 128 bit hash collision)
+
+    If a cache is given, the digest of every element in the subtree is memoized in it, so it
+    is on the caller to remove the entries of an element and its ancestors if it is mutated
+    """
+    if cache is not None and (cached_fingerprint := cache.get(el)) is not None:
+        return cached_fingerprint
+    tag = el.tag if isinstance(el.tag, str) else getattr(el.tag, "__name__", str(el.tag))
+    digest = hashlib.blake2b(repr((tag, el.text, el.tail, sorted(el.attrib.items()))).encode(), digest_size=16)
+    for el_ in el:
+        digest.update(fingerprint(el_, cache))
+    el_fingerprint = digest.digest()
+    if cache is not None:
+        cache[el] = el_fingerprint
+    return el_fingerprint